@@ -71,6 +71,16 @@ async def graceful_shutdown():  # sourcery skip: use-named-expression
         # 停止所有异步任务
         await async_task_manager.stop_and_wait_all_tasks()
 
+        # 停止入站消息的处理协程
+        from src.chat.message_receive.bot import chat_bot
+
+        await chat_bot.message_dispatcher.stop()
+
+        # 写入缓冲区中剩余的LLM使用记录
+        from src.llm_models.utils import llm_usage_recorder
+
+        llm_usage_recorder.flush()
+
         # 获取所有剩余任务，排除当前任务
         remaining_tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
 
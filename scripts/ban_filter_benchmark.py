@@ -0,0 +1,88 @@
+"""
+消息过滤（过滤词 + 过滤正则）的基准测试
+
+- 旧实现：对每个过滤词执行 word in text；对每个正则执行 re.search(pattern, text)
+- 新实现：BanFilter（过滤词 Aho-Corasick 自动机，正则预编译并合并为一个交替表达式）
+
+随机生成过滤词、正则与消息（少量消息含有过滤词），输出处理全部消息的耗时，并检查两种实现的过滤结果是否一致。
+
+用法:
+    python scripts/ban_filter_benchmark.py
+    python scripts/ban_filter_benchmark.py --words 1000 --regex 50 --messages 10000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.message_receive.ban_filter import BanFilter  # noqa: E402
+from src.config.config import global_config  # noqa: E402
+
+CHARS = "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长"
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(CHARS) for _ in range(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消息过滤：逐个匹配 vs 自动机/合并正则")
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--regex", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ban_words = {random_text(rng, rng.randint(3, 6)) for _ in range(args.words)}
+    ban_msgs_regex = {f"{random_text(rng, 2)}.{{0,3}}{random_text(rng, 2)}" for _ in range(args.regex)}
+    ban_msgs_regex.add(r"https?://\S+\.(?:xyz|top)")
+    word_list = sorted(ban_words)
+    messages = []
+    for _ in range(args.messages):
+        text = random_text(rng, rng.randint(5, 80))
+        if rng.random() < 0.02:
+            position = rng.randint(0, len(text))
+            text = text[:position] + rng.choice(word_list) + text[position:]
+        messages.append(text)
+
+    global_config.message_receive.ban_words = ban_words
+    global_config.message_receive.ban_msgs_regex = ban_msgs_regex
+
+    start = time.perf_counter()
+    legacy_words = [any(word in text for word in ban_words) for text in messages]
+    legacy_word_time = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_regex = [any(re.search(pattern, text) for pattern in ban_msgs_regex) for text in messages]
+    legacy_regex_time = time.perf_counter() - start
+
+    ban_filter = BanFilter()
+    start = time.perf_counter()
+    ban_filter.match_word("")
+    ban_filter.match_regex("")
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    new_words = [ban_filter.match_word(text) is not None for text in messages]
+    new_word_time = time.perf_counter() - start
+    start = time.perf_counter()
+    new_regex = [ban_filter.match_regex(text) is not None for text in messages]
+    new_regex_time = time.perf_counter() - start
+
+    print(
+        f"过滤词 {len(ban_words)} 个 × 消息 {len(messages)} 条 | 旧 {legacy_word_time * 1000:.1f}ms | "
+        f"新 {new_word_time * 1000:.1f}ms | 命中 {sum(new_words)} 条，结果一致: {legacy_words == new_words}"
+    )
+    print(
+        f"过滤正则 {len(ban_msgs_regex)} 个 × 消息 {len(messages)} 条 | 旧 {legacy_regex_time * 1000:.1f}ms | "
+        f"新 {new_regex_time * 1000:.1f}ms | 命中 {sum(new_regex)} 条，结果一致: {legacy_regex == new_regex}"
+    )
+    print(f"自动机与正则构建耗时 {build_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+命令匹配（ComponentRegistry.find_command_by_text）的基准测试
+
+- 旧实现：对每条消息逐个执行全部命令正则的 match，命中后再匹配一次取命名组
+- 新实现：CommandDispatcher（按命令固定前缀建立前缀树，只匹配前缀相符的命令，复用匹配结果）
+
+生成若干插件命令（大部分以 "/xxx" 开头，少数没有固定前缀）与消息（少量为命令），
+输出每条消息的平均耗时，并检查两种实现的匹配结果是否一致。
+
+用法:
+    python scripts/command_dispatch_benchmark.py
+    python scripts/command_dispatch_benchmark.py --commands 50 500 --messages 20000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.plugin_system.core.command_dispatcher import CommandDispatcher  # noqa: E402
+
+CHARS = "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自着去"
+
+
+def legacy_find(patterns: dict[re.Pattern, str], text: str) -> tuple[str, dict] | None:
+    """旧实现（保留原逻辑用于对比）"""
+    candidates = [pattern for pattern in patterns if pattern.match(text)]
+    if not candidates:
+        return None
+    return patterns[candidates[0]], candidates[0].match(text).groupdict()  # type: ignore
+
+
+def new_find(dispatcher: CommandDispatcher, text: str) -> tuple[str, dict] | None:
+    candidates = dispatcher.match(text)
+    if not candidates:
+        return None
+    pattern, match = candidates[0]
+    return dispatcher.command_names[pattern], match.groupdict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令匹配：逐个正则匹配 vs 前缀树分发")
+    parser.add_argument("--commands", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    for command_count in args.commands:
+        rng = random.Random(command_count)
+        names = [f"cmd{i}" for i in range(command_count)]
+        patterns: dict[re.Pattern, str] = {}
+        for i, name in enumerate(names):
+            if i % 20 == 19:
+                source = rf"^(?P<who>\S+)[,，]\s*帮我{name}(?P<arg>.*)$"  # 没有固定前缀
+            elif i % 2:
+                source = rf"^/{name}(?:\s+(?P<arg>.+))?$"
+            else:
+                source = rf"^(?:/{name}|#{name})\s*(?P<arg>.*)$"
+            patterns[re.compile(source, re.IGNORECASE | re.DOTALL)] = name
+
+        messages = []
+        for _ in range(args.messages):
+            if rng.random() < 0.05:
+                name = rng.choice(names)
+                messages.append(rng.choice([f"/{name} 参数", f"/{name.upper()}", f"#{name}x", f"小明，帮我{name}"]))
+            else:
+                messages.append("".join(rng.choice(CHARS) for _ in range(rng.randint(3, 60))))
+
+        start = time.perf_counter()
+        legacy_results = [legacy_find(patterns, text) for text in messages]
+        legacy_time = (time.perf_counter() - start) / len(messages)
+
+        start = time.perf_counter()
+        dispatcher = CommandDispatcher(patterns)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        new_results = [new_find(dispatcher, text) for text in messages]
+        new_time = (time.perf_counter() - start) / len(messages)
+
+        print(
+            f"命令 {command_count:>4} 个 | 旧 {legacy_time * 1e6:7.2f}µs/条 | 新 {new_time * 1e6:6.2f}µs/条"
+            f"（构建 {build_time * 1000:.1f}ms） | 命中 {sum(r is not None for r in new_results)} 条，"
+            f"结果一致: {legacy_results == new_results}"
+        )
+
+
+if __name__ == "__main__":
+    main()
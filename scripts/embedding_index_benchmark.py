@@ -0,0 +1,121 @@
+"""
+向量索引基准测试
+
+在 data/embedding 下的段落/实体/关系嵌入库上（或随机生成的向量上），比较：
+- flat：精确检索（IndexFlatIP），作为召回率的参照
+- ivf_flat / ivf_pq / hnsw：近似检索
+
+输出每种索引的构建耗时、单次查询耗时与 recall@k，并测试增量追加（add_with_ids）相对全量重建的耗时。
+不会修改 data/embedding 下的任何文件。
+
+用法:
+    python scripts/embedding_index_benchmark.py --k 10 --queries 200
+    python scripts/embedding_index_benchmark.py --synthetic 200000 --dim 1024
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.knowledge.embedding_store import EMBEDDING_DATA_DIR_STR, EmbeddingStore, EmbeddingTable  # noqa: E402
+from src.config.config import global_config  # noqa: E402
+
+INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "hnsw"]
+
+
+def load_datasets(args) -> list[tuple[str, np.ndarray]]:
+    """读取真实嵌入库的向量矩阵，或生成带聚类结构的随机向量"""
+    if args.synthetic > 0:
+        rng = np.random.default_rng(42)
+        centers = rng.normal(size=(max(1, args.synthetic // 100), args.dim))
+        vectors = centers[rng.integers(0, len(centers), args.synthetic)] + 0.5 * rng.normal(
+            size=(args.synthetic, args.dim)
+        )
+        return [("synthetic", vectors.astype(np.float32))]
+
+    datasets = []
+    for namespace in ("paragraph", "entity", "relation"):
+        table = EmbeddingTable(namespace, EMBEDDING_DATA_DIR_STR)
+        if not table.exists():
+            print(f"{namespace} 嵌入库不存在（旧版parquet嵌入库请先启动一次麦麦完成迁移），跳过")
+            continue
+        table.load()
+        datasets.append((namespace, table.vectors()))
+    return datasets
+
+
+def make_queries(vectors: np.ndarray, count: int) -> np.ndarray:
+    """从库中抽样并加入少量噪声作为查询，模拟与库内内容相近但不完全相同的问题"""
+    rng = np.random.default_rng(7)
+    picked = vectors[rng.choice(len(vectors), min(count, len(vectors)), replace=False)]
+    scale = np.linalg.norm(picked, axis=1, keepdims=True) * 0.3 / np.sqrt(vectors.shape[1])
+    return picked + rng.normal(size=picked.shape) * scale
+
+
+def bench_dataset(namespace: str, vectors: np.ndarray, args):
+    queries = make_queries(vectors, args.queries)
+    global_config.lpmm_knowledge.embedding_dimension = vectors.shape[1]
+    print(f"\n[{namespace}] 向量数 {len(vectors):,}, 维度 {vectors.shape[1]}, 查询数 {len(queries)}, k={args.k}")
+    # 最后1%的向量用于测试增量追加
+    split = len(vectors) - max(1, len(vectors) // 100)
+
+    ground_truth = None
+    for index_type in args.types:
+        global_config.lpmm_knowledge.embedding_index_type = index_type
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = EmbeddingStore(namespace, tmp_dir)
+            for i in range(split):
+                store.store.append(f"{namespace}-{i}", vectors[i], str(i))
+            start = time.perf_counter()
+            store.build_faiss_index()
+            build_time = time.perf_counter() - start
+            actual_type = store._index_type_of(store.faiss_index)
+
+            for i in range(split, len(vectors)):
+                store.store.append(f"{namespace}-{i}", vectors[i], str(i))
+            start = time.perf_counter()
+            store.update_faiss_index()
+            append_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = [{h for h, _ in store.search_top_k(q, args.k)} for q in queries]
+            query_time = (time.perf_counter() - start) / max(len(queries), 1)
+
+        if ground_truth is None:
+            ground_truth = results
+        recall = np.mean([len(r & g) / max(len(g), 1) for r, g in zip(results, ground_truth, strict=True)])
+        print(
+            f"  {index_type:>8} (实际 {actual_type:>8}) | 构建 {build_time:7.2f}s | "
+            f"查询 {query_time * 1000:8.3f}ms/次 | recall@{args.k} {recall:.3f} | "
+            f"追加{len(vectors) - split:,}条 {append_time * 1000:8.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量索引：精确检索 vs 近似检索")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=INDEX_TYPES)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--synthetic", type=int, default=0, help="使用随机向量代替真实嵌入库，指定向量数")
+    parser.add_argument("--dim", type=int, default=1024, help="随机向量的维度")
+    args = parser.parse_args()
+    # 第一个索引作为召回率参照，确保flat排在最前
+    args.types = ["flat"] + [t for t in args.types if t != "flat"]
+
+    datasets = load_datasets(args)
+    if not datasets:
+        print("没有可用的嵌入库，可使用 --synthetic 生成随机向量")
+        return
+    for namespace, vectors in datasets:
+        bench_dataset(namespace, vectors, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+表情包情感标签检索（EmojiManager.get_emoji_for_text）的基准测试
+
+- 旧实现：对每个表情包的每个情感标签计算编辑距离，再对全部表情包排序取前10
+- 新实现：EmojiTagIndex（标签倒排索引 + 字符索引筛选候选标签 + 编辑距离缓存）
+
+随机生成情感标签词表与表情包库，输出每次查询的平均耗时，并检查两种实现返回的前10个结果是否一致。
+
+用法:
+    python scripts/emoji_tag_index_benchmark.py
+    python scripts/emoji_tag_index_benchmark.py --emojis 1000 10000 --queries 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.emoji_system.emoji_manager import MaiEmoji  # noqa: E402
+from src.chat.emoji_system.emoji_tag_index import EmojiTagIndex, levenshtein_distance  # noqa: E402
+
+CHARS = "开心难过生气无语害羞惊讶委屈得意嫌弃尴尬疑惑感动兴奋害怕困倦期待可爱搞笑嘲讽喜欢讨厌紧张放松骄傲"
+
+
+def legacy_search(emojis: list[MaiEmoji], text_emotion: str) -> list[tuple[MaiEmoji, float, str]]:
+    """旧实现（保留原逻辑用于对比，编辑距离不使用缓存）"""
+    emoji_similarities = []
+    for emoji in emojis:
+        if emoji.is_deleted or not emoji.emotion:
+            continue
+        max_similarity = 0
+        best_matching_emotion = ""
+        for emotion in emoji.emotion:
+            distance = levenshtein_distance.__wrapped__(text_emotion, emotion)
+            max_len = max(len(text_emotion), len(emotion))
+            similarity = 1 - (distance / max_len if max_len > 0 else 0)
+            if similarity > max_similarity:
+                max_similarity = similarity
+                best_matching_emotion = emotion
+        if best_matching_emotion:
+            emoji_similarities.append((emoji, max_similarity, best_matching_emotion))
+    emoji_similarities.sort(key=lambda x: x[1], reverse=True)
+    return emoji_similarities[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表情包情感检索：逐个计算编辑距离 vs 标签索引")
+    parser.add_argument("--emojis", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--tags", type=int, default=300, help="情感标签词表大小")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = sorted({"".join(rng.sample(CHARS, rng.randint(2, 4))) for _ in range(args.tags)})
+    queries = [
+        rng.choice(vocabulary) if rng.random() < 0.5 else "".join(rng.sample(CHARS, 2)) for _ in range(args.queries)
+    ]
+
+    for emoji_count in args.emojis:
+        emojis = []
+        for i in range(emoji_count):
+            emoji = MaiEmoji(f"data/emoji_registed/{i}.png")
+            emoji.hash = f"{i:032x}"
+            emoji.emotion = rng.sample(vocabulary, rng.randint(1, 3))
+            emojis.append(emoji)
+
+        start = time.perf_counter()
+        index = EmojiTagIndex()
+        index.rebuild(emojis)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_results = [legacy_search(emojis, query) for query in queries]
+        legacy_time = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        new_results = [index.search(query) for query in queries]
+        new_time = (time.perf_counter() - start) / len(queries)
+
+        mismatches = sum(
+            [(e.hash, s, t) for e, s, t in old] != [(e.hash, s, t) for e, s, t in new]
+            for old, new in zip(legacy_results, new_results, strict=True)
+        )
+        print(
+            f"表情包 {emoji_count:>6,} | 旧实现 {legacy_time * 1000:8.2f}ms/次 | "
+            f"新实现 {new_time * 1000:6.3f}ms/次（建索引 {build_time * 1000:.1f}ms） | 结果不一致 {mismatches}/{len(queries)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+GIF表情包转静态拼接图（ImageManager.transform_gif）的基准测试
+
+- 旧实现：逐帧转换为全尺寸RGB，逐帧计算与上一张选中帧的MSE（uint8相减会溢出），再缩放拼接
+- 新实现：在缩略图上向量化比较帧差异，只缩放选中的帧，选够帧数后不再解码，整体放到线程中执行
+
+语料默认读取机器人保存的表情包目录（data/emoji、data/emoji_registed）中的GIF，
+目录不存在或没有GIF时生成合成动图。另外测量在事件循环中转换时，其他协程的最大调度延迟。
+
+用法:
+    python scripts/gif_transform_benchmark.py
+    python scripts/gif_transform_benchmark.py --dirs path/to/gifs --repeat 3
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.utils.utils_image import ImageManager, get_image_manager  # noqa: E402
+
+
+def legacy_transform_gif(gif_base64: str, similarity_threshold: float = 1000.0, max_frames: int = 15) -> str | None:
+    """旧实现（保留原逻辑用于对比）"""
+    gif = Image.open(io.BytesIO(base64.b64decode(gif_base64)))
+    all_frames = []
+    try:
+        while True:
+            gif.seek(len(all_frames))
+            all_frames.append(gif.convert("RGB").copy())
+    except EOFError:
+        pass
+    selected_frames = []
+    last_selected_frame_np = None
+    for i, current_frame in enumerate(all_frames):
+        current_frame_np = np.array(current_frame)
+        if i == 0:
+            selected_frames.append(current_frame)
+            last_selected_frame_np = current_frame_np
+            continue
+        mse = np.mean((current_frame_np - last_selected_frame_np) ** 2)
+        if mse > similarity_threshold:
+            selected_frames.append(current_frame)
+            last_selected_frame_np = current_frame_np
+            if len(selected_frames) >= max_frames:
+                break
+    frame_width, frame_height = selected_frames[0].size
+    target_width = max(1, int((200 / frame_height) * frame_width))
+    resized_frames = [frame.resize((target_width, 200), Image.Resampling.LANCZOS) for frame in selected_frames]
+    combined_image = Image.new("RGB", (target_width * len(resized_frames), 200))
+    for idx, frame in enumerate(resized_frames):
+        combined_image.paste(frame, (idx * target_width, 0))
+    buffer = io.BytesIO()
+    combined_image.save(buffer, format="JPEG", quality=85)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def load_corpus(dirs: list[str]) -> list[tuple[str, str]]:
+    corpus = []
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            try:
+                with Image.open(path) as image:
+                    if image.format != "GIF":
+                        continue
+                with open(path, "rb") as f:
+                    corpus.append((name, base64.b64encode(f.read()).decode("utf-8")))
+            except Exception:
+                continue
+    return corpus
+
+
+def synthetic_corpus() -> list[tuple[str, str]]:
+    """合成动图：背景上移动的色块，若干帧静止（应被去重）"""
+    rng = np.random.default_rng(0)
+    corpus = []
+    for size, frame_count in [(240, 20), (480, 60), (512, 120), (800, 200)]:
+        background = rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+        base = np.asarray(Image.fromarray(background).resize((size, size), Image.Resampling.BICUBIC))
+        frames = []
+        for i in range(frame_count):
+            frame = base.copy()
+            offset = (i // 3) * size // frame_count * 3  # 每3帧移动一次
+            frame[size // 3 : size // 2, offset : offset + size // 5] = (255, 255, 255)
+            frames.append(Image.fromarray(frame).convert("P", palette=Image.Palette.ADAPTIVE))
+        buffer = io.BytesIO()
+        frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=40, loop=0)
+        corpus.append((f"synthetic_{size}px_{frame_count}f.gif", base64.b64encode(buffer.getvalue()).decode("utf-8")))
+    return corpus
+
+
+async def max_loop_lag(coro) -> float:
+    """执行coro期间，每1ms唤醒一次的协程观测到的最大调度延迟"""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await coro
+    done = True
+    await task
+    return lag
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="GIF转静态拼接图：旧实现 vs 向量化实现")
+    default_dirs = [os.path.join(project_root, "data", "emoji"), os.path.join(project_root, "data", "emoji_registed")]
+    parser.add_argument("--dirs", nargs="+", default=default_dirs)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.dirs) or synthetic_corpus()
+    manager = get_image_manager()
+
+    legacy_total = new_total = 0.0
+    for name, data in corpus:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            legacy_result = legacy_transform_gif(data)
+        legacy_time = (time.perf_counter() - start) / args.repeat
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            new_result = ImageManager.transform_gif(data)
+        new_time = (time.perf_counter() - start) / args.repeat
+        legacy_total += legacy_time
+        new_total += new_time
+        legacy_width = Image.open(io.BytesIO(base64.b64decode(legacy_result))).width  # type: ignore
+        new_width = Image.open(io.BytesIO(base64.b64decode(new_result))).width  # type: ignore
+        print(
+            f"{name[:40]:<40} | 旧 {legacy_time * 1000:8.1f}ms，拼接宽 {legacy_width:>5} | "
+            f"新 {new_time * 1000:8.1f}ms，拼接宽 {new_width:>5}"
+        )
+    print(f"合计 {len(corpus)} 个GIF | 旧 {legacy_total * 1000:.1f}ms | 新 {new_total * 1000:.1f}ms")
+
+    largest = max(corpus, key=lambda item: len(item[1]))[1]
+    blocking_lag = await max_loop_lag(_run_blocking(largest))
+    threaded_lag = await max_loop_lag(manager.transform_gif_async(largest))
+    print(f"最大GIF转换期间事件循环最大延迟 | 直接调用 {blocking_lag * 1000:.1f}ms | 线程 {threaded_lag * 1000:.1f}ms")
+
+
+async def _run_blocking(data: str) -> None:
+    ImageManager.transform_gif(data)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
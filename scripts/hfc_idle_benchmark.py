@@ -0,0 +1,142 @@
+"""
+空闲聊天流下 HeartFChatting 主循环开销的基准测试
+
+- 旧实现：每个聊天流每约0.6秒查询一次数据库（get_messages_by_time_in_chat），判断是否有足够的新消息
+- 新实现：主循环挂起等待 notify_new_message 通知，新消息数与兴趣值保存在内存中
+
+模拟若干个空闲的聊天流运行一段时间，其中少量聊天流持续收到消息，
+输出两种实现在这段时间内消耗的CPU时间，以及新实现中各聊天流的唤醒次数。
+
+用法:
+    python scripts/hfc_idle_benchmark.py
+    python scripts/hfc_idle_benchmark.py --streams 50 200 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.heart_flow.heartFC_chat import HeartFChatting, NEW_MESSAGE_LIMIT  # noqa: E402
+from src.plugin_system.apis import message_api  # noqa: E402
+
+ACTIVE_STREAMS = 2  # 持续收到消息的聊天流数量
+MESSAGE_INTERVAL = 0.5  # 活跃聊天流的消息间隔（秒）
+
+
+def make_chat(stream_id: str) -> HeartFChatting:
+    """只初始化主循环用到的属性，_observe 替换为计数"""
+    chat = HeartFChatting.__new__(HeartFChatting)
+    chat.stream_id = stream_id
+    chat.log_prefix = f"[{stream_id}]"
+    chat.running = True
+    chat.last_read_time = time.time() - 10
+    chat.focus_energy = 1
+    chat.recent_interest_records = deque(maxlen=3)
+    chat.talk_frequency_control = SimpleNamespace(get_current_talk_frequency=lambda: 0.1)
+    chat._new_message_event = asyncio.Event()
+    chat._pending_messages = deque(maxlen=NEW_MESSAGE_LIMIT)
+    chat._last_waiting_log_time = 0.0
+    chat.wakeups = 0
+
+    async def observe(interest_value: float = 0.0) -> bool:
+        return True
+
+    original_wait = chat._wait_for_new_messages
+
+    async def wait_for_new_messages():
+        result = await original_wait()
+        chat.wakeups += 1
+        return result
+
+    chat._observe = observe  # type: ignore
+    chat._wait_for_new_messages = wait_for_new_messages  # type: ignore
+    return chat
+
+
+def make_message(index: int):
+    return SimpleNamespace(
+        is_command=False,
+        interest_value=0.1,
+        processed_plain_text="消息",
+        message_info=SimpleNamespace(
+            message_id=f"bench_{index}", time=time.time(), user_info=SimpleNamespace(user_id="10000")
+        ),
+    )
+
+
+async def run_legacy(stream_ids: list[str], seconds: float) -> int:
+    """旧实现的轮询：查询数据库后 sleep(0.5) + sleep(0.1)"""
+    queries = 0
+    deadline = time.time() + seconds
+
+    async def poll(stream_id: str):
+        nonlocal queries
+        last_read_time = time.time() - 10
+        while time.time() < deadline:
+            message_api.get_messages_by_time_in_chat(
+                chat_id=stream_id,
+                start_time=last_read_time,
+                end_time=time.time(),
+                limit=10,
+                limit_mode="latest",
+                filter_mai=True,
+                filter_command=True,
+            )
+            queries += 1
+            await asyncio.sleep(0.5)
+            await asyncio.sleep(0.1)
+
+    await asyncio.gather(*(poll(stream_id) for stream_id in stream_ids))
+    return queries
+
+
+async def run_event_driven(stream_ids: list[str], seconds: float) -> list[HeartFChatting]:
+    chats = [make_chat(stream_id) for stream_id in stream_ids]
+    tasks = [asyncio.create_task(chat._main_chat_loop()) for chat in chats]
+    deadline = time.time() + seconds
+    index = 0
+    while time.time() < deadline:
+        for chat in chats[:ACTIVE_STREAMS]:
+            chat.notify_new_message(make_message(index))  # type: ignore
+            index += 1
+        await asyncio.sleep(MESSAGE_INTERVAL)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return chats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="空闲聊天流：数据库轮询 vs 事件唤醒")
+    parser.add_argument("--streams", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for stream_count in args.streams:
+        stream_ids = [f"bench_stream_{i}" for i in range(stream_count)]
+
+        start = time.process_time()
+        queries = asyncio.run(run_legacy(stream_ids, args.seconds))
+        legacy_cpu = time.process_time() - start
+
+        start = time.process_time()
+        chats = asyncio.run(run_event_driven(stream_ids, args.seconds))
+        new_cpu = time.process_time() - start
+        active_wakeups = sum(chat.wakeups for chat in chats[:ACTIVE_STREAMS])
+        idle_wakeups = sum(chat.wakeups for chat in chats[ACTIVE_STREAMS:])
+
+        print(
+            f"聊天流 {stream_count:>4} 个 × {args.seconds:.0f}秒 | 旧 CPU {legacy_cpu * 1000:7.1f}ms（查询 {queries} 次） | "
+            f"新 CPU {new_cpu * 1000:6.1f}ms（活跃流唤醒 {active_wakeups} 次，空闲流唤醒 {idle_wakeups} 次）"
+        )
+
+
+if __name__ == "__main__":
+    main()
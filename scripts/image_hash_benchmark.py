@@ -0,0 +1,109 @@
+"""
+图片描述内存缓存（感知哈希近似重复匹配）的基准测试
+
+随机生成若干原图，再把每张原图重新压缩/缩放成若干变体（模拟群聊中被转发多次的同一张图），
+先把原图的描述放入 ImageHashIndex，再用变体查询：
+- 变体命中率：MD5不同的变体中通过感知哈希找到原图描述的比例（旧实现只能按MD5精确匹配，命中率为0）
+- 误命中数：用另一批互不相关的图片查询时错误返回描述的次数
+- 换配字误命中数：同一模板换了配字的图片（如表情包）错误复用原图描述的次数
+- 平均查询耗时（含计算感知指纹）
+
+用法:
+    python scripts/image_hash_benchmark.py
+    python scripts/image_hash_benchmark.py --images 2000 --variants 4
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.utils.image_hash import ImageHashIndex, compute_fingerprint  # noqa: E402
+
+
+def make_image(rng: np.random.Generator) -> Image.Image:
+    """低分辨率随机色块放大并模糊，得到有明暗结构的“照片”"""
+    blocks = rng.integers(0, 256, size=(6, 6, 3), dtype=np.uint8)
+    size = int(rng.integers(240, 640))
+    image = Image.fromarray(blocks).resize((size, size), Image.Resampling.BICUBIC)
+    return image.filter(ImageFilter.GaussianBlur(2))
+
+
+CAPTIONS = ["no way", "me at 3am", "why tho", "cant even", "this is fine", "big mood", "say less", "bruh"]
+
+
+def add_caption(image: Image.Image, text: str) -> Image.Image:
+    """在图片底部加一条白底黑字的配字，模拟同一表情包模板配上不同的文字"""
+    captioned = image.copy()
+    draw = ImageDraw.Draw(captioned)
+    top = int(captioned.height * 0.8)
+    draw.rectangle([0, top, captioned.width, captioned.height], fill="white")
+    font = ImageFont.load_default(size=max(12, captioned.width // 12))
+    draw.text((captioned.width // 20, top + captioned.height // 40), text, fill="black", font=font)
+    return captioned
+
+
+def encode(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def make_variant(image: Image.Image, rng: random.Random) -> bytes:
+    """重新压缩、缩放"""
+    scale = rng.uniform(0.5, 1.0)
+    resized = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+    return encode(resized, rng.randint(40, 90))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片描述缓存：MD5精确匹配 vs 感知哈希近似匹配")
+    parser.add_argument("--images", type=int, default=1000)
+    parser.add_argument("--variants", type=int, default=3, help="每张原图的变体数")
+    args = parser.parse_args()
+
+    np_rng = np.random.default_rng(0)
+    rng = random.Random(0)
+    captions = [rng.sample(CAPTIONS, 2) for _ in range(args.images)]
+    originals = [add_caption(make_image(np_rng), caption[0]) for caption in captions]
+    unrelated = [encode(make_image(np_rng), 85) for _ in range(args.images)]
+
+    index = ImageHashIndex(max_size=args.images * (args.variants + 1))
+    for i, image in enumerate(originals):
+        data = encode(image, 95)
+        index.put(hashlib.md5(data).hexdigest(), compute_fingerprint(data), f"desc-{i}")
+
+    variants = [(i, make_variant(image, rng)) for i, image in enumerate(originals) for _ in range(args.variants)]
+    correct = 0
+    start = time.perf_counter()
+    for i, data in variants:
+        description, _ = index.get(hashlib.md5(data).hexdigest(), compute_fingerprint(data))
+        correct += description == f"desc-{i}"
+    lookup_time = (time.perf_counter() - start) / len(variants)
+
+    false_hits = sum(
+        index.get(hashlib.md5(data).hexdigest(), compute_fingerprint(data))[0] is not None for data in unrelated
+    )
+    recaptioned = [
+        encode(add_caption(image, caption[1]), 85) for image, caption in zip(originals, captions, strict=True)
+    ]
+    caption_hits = sum(
+        index.get(hashlib.md5(data).hexdigest(), compute_fingerprint(data))[0] is not None for data in recaptioned
+    )
+    print(
+        f"原图 {args.images}，变体 {len(variants)} | 变体命中 {correct / len(variants):.1%}（MD5精确匹配 0.0%） | "
+        f"无关图片误命中 {false_hits}/{len(unrelated)} | 换配字误命中 {caption_hits}/{len(recaptioned)} | 平均查询 {lookup_time * 1000:.3f}ms/次 | {index.get_stats()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+关键词提取基准测试
+
+以数据库中 Messages.key_words（LLM 提取的历史结果）为参照，
+比较本地关键词提取（TF-IDF / TextRank + 记忆图词表）的召回率与耗时。
+
+用法:
+    python scripts/keyword_extraction_benchmark.py --limit 2000 --algorithm tfidf
+    python scripts/keyword_extraction_benchmark.py --llm-sample 20   # 额外实测LLM路径耗时
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.common.database.database_model import Messages, GraphNodes  # noqa: E402
+from src.chat.memory_system.keyword_extractor import LocalKeywordExtractor  # noqa: E402
+
+
+def load_samples(limit: int) -> List[tuple[str, List[str]]]:
+    """读取带有LLM关键词的历史消息"""
+    samples = []
+    query = (
+        Messages.select(Messages.processed_plain_text, Messages.key_words)
+        .where(Messages.key_words.is_null(False) & (Messages.key_words != "") & (Messages.key_words != "[]"))
+        .order_by(Messages.time.desc())
+        .limit(limit)
+    )
+    for msg in query:
+        try:
+            keywords = json.loads(msg.key_words)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if msg.processed_plain_text and keywords:
+            samples.append((msg.processed_plain_text, keywords))
+    return samples
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def measure_llm_latency(texts: List[str]) -> List[float]:
+    """实测LLM关键词提取耗时"""
+    from src.chat.memory_system.Hippocampus import Hippocampus
+    from src.config.config import model_config
+    from src.llm_models.utils_model import LLMRequest
+
+    hippocampus = Hippocampus()
+    hippocampus.model_small = LLMRequest(model_set=model_config.model_task_config.utils_small, request_type="benchmark")
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        await hippocampus.get_keywords_from_text(text, fast_retrieval=False)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地关键词提取 vs LLM 关键词提取")
+    parser.add_argument("--limit", type=int, default=2000, help="参与测试的历史消息数量")
+    parser.add_argument("--algorithm", choices=["tfidf", "textrank"], default="tfidf")
+    parser.add_argument("--threshold", type=float, default=0.4, help="回退到LLM的置信度阈值")
+    parser.add_argument("--llm-sample", type=int, default=0, help="实测LLM耗时的样本数，0表示不调用LLM")
+    args = parser.parse_args()
+
+    vocabulary = {node.concept for node in GraphNodes.select(GraphNodes.concept)}
+    samples = load_samples(args.limit)
+    if not samples:
+        print("没有找到带有关键词的历史消息")
+        return
+
+    extractor = LocalKeywordExtractor(args.algorithm)
+    extractor.extract("预热", vocabulary)  # 预热jieba词典
+
+    latencies = []
+    recalls = []
+    graph_recalls = []
+    fallback_count = 0
+    for text, llm_keywords in samples:
+        start = time.perf_counter()
+        keywords, confidence = extractor.extract(text, vocabulary)
+        latencies.append(time.perf_counter() - start)
+        if confidence < args.threshold:
+            fallback_count += 1
+
+        local_set = set(keywords)
+        recalls.append(len(local_set & set(llm_keywords)) / len(llm_keywords))
+        # 只有记忆图中存在的关键词会影响激活值，这部分召回率更能反映兴趣度计算的差异
+        graph_keywords = {k for k in llm_keywords if k in vocabulary}
+        if graph_keywords:
+            graph_recalls.append(len(local_set & graph_keywords) / len(graph_keywords))
+
+    print(f"样本数: {len(samples)}, 记忆图词表大小: {len(vocabulary)}, 算法: {args.algorithm}")
+    print(f"召回率(全部LLM关键词): {statistics.mean(recalls):.3f}")
+    if graph_recalls:
+        print(f"召回率(记忆图内关键词): {statistics.mean(graph_recalls):.3f} ({len(graph_recalls)} 条)")
+    print(f"回退到LLM的比例(阈值{args.threshold}): {fallback_count / len(samples):.2%}")
+    print(
+        f"本地耗时: 平均 {statistics.mean(latencies) * 1000:.3f}ms, "
+        f"P50 {percentile(latencies, 0.5) * 1000:.3f}ms, P95 {percentile(latencies, 0.95) * 1000:.3f}ms"
+    )
+
+    if args.llm_sample > 0:
+        texts = [text for text, _ in samples[: args.llm_sample]]
+        llm_latencies = asyncio.run(measure_llm_latency(texts))
+        print(
+            f"LLM耗时: 平均 {statistics.mean(llm_latencies) * 1000:.1f}ms, "
+            f"P50 {percentile(llm_latencies, 0.5) * 1000:.1f}ms, P95 {percentile(llm_latencies, 0.95) * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
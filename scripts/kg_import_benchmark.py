@@ -0,0 +1,140 @@
+"""
+LPMM 知识图谱导入的基准测试
+
+将随机生成的三元组（默认10万/100万条）分批增量导入 KGManager，模拟多次运行 import_openie：
+- 旧实现：每批导入前取出全部边转为字符串列表，逐条在列表中判断边/节点是否存在（随图的规模平方增长）
+- 新实现：KGManager 维护的节点/边哈希索引 + 批量写入边
+
+输出每种规模下的总耗时、首批与末批的耗时（线性扩展时两者应接近），并校验两种实现得到的图一致。
+近义词连接依赖嵌入向量，不在本测试范围内。
+
+用法:
+    python scripts/kg_import_benchmark.py
+    python scripts/kg_import_benchmark.py --triples 100000 --batch 5000 --legacy-max 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from quick_algo import di_graph
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.knowledge.kg_manager import KGManager  # noqa: E402
+
+
+class _StrStore:
+    """只提供 get_str 的嵌入库替身，导入时仅用于读取节点内容"""
+
+    @staticmethod
+    def get_str(node_hash: str) -> str:
+        return node_hash[:24]
+
+
+FAKE_EMBEDDING_MANAGER = SimpleNamespace(
+    entities_embedding_store=SimpleNamespace(store=_StrStore()),
+    paragraphs_embedding_store=SimpleNamespace(store=_StrStore()),
+)
+
+
+def make_batches(triple_count: int, batch_size: int, seed: int) -> list[dict[str, list[list[str]]]]:
+    """每个段落约5个三元组，实体数约为三元组数的一半（实体会在不同批次间重复出现）"""
+    rng = random.Random(seed)
+    entity_count = max(triple_count // 2, 10)
+    batches = []
+    paragraph_id = 0
+    for start in range(0, triple_count, batch_size):
+        batch: dict[str, list[list[str]]] = {}
+        for _ in range(start, min(start + batch_size, triple_count), 5):
+            batch[f"{paragraph_id:016x}"] = [
+                [f"实体{rng.randrange(entity_count)}", "关系", f"实体{rng.randrange(entity_count)}"] for _ in range(5)
+            ]
+            paragraph_id += 1
+        batches.append(batch)
+    return batches
+
+
+def legacy_update_graph(kg: KGManager, node_to_node: dict[tuple[str, str], float]):
+    """旧版 KGManager._update_graph"""
+    existed_nodes = kg.graph.get_node_list()
+    existed_edges = [str((edge[0], edge[1])) for edge in kg.graph.get_edge_list()]
+    now_time = time.time()
+    for src_tgt, weight in node_to_node.items():
+        if str(src_tgt) not in existed_edges:
+            kg.graph.add_edge(
+                di_graph.DiEdge(
+                    src_tgt[0], src_tgt[1], {"weight": weight, "create_time": now_time, "update_time": now_time}
+                )
+            )
+        else:
+            edge_item = kg.graph[src_tgt[0], src_tgt[1]]
+            edge_item["weight"] += weight
+            edge_item["update_time"] = now_time
+            kg.graph.update_edge(edge_item)
+    for src_tgt in node_to_node.keys():
+        for node_hash in src_tgt:
+            if node_hash not in existed_nodes:
+                node_item = kg.graph[node_hash]
+                node_item["content"] = _StrStore.get_str(node_hash)
+                node_item["type"] = "ent" if node_hash.startswith("entity") else "pg"
+                node_item["create_time"] = now_time
+                kg.graph.update_node(node_item)
+
+
+def import_batches(batches, legacy: bool) -> tuple[KGManager, list[float]]:
+    kg = KGManager()
+    batch_times = []
+    for batch in batches:
+        start = time.perf_counter()
+        node_to_node = {}
+        kg._build_edges_between_ent(node_to_node, batch)
+        kg._build_edges_between_ent_pg(node_to_node, batch)
+        if legacy:
+            legacy_update_graph(kg, node_to_node)
+        else:
+            kg._update_graph(node_to_node, FAKE_EMBEDDING_MANAGER)  # type: ignore
+        batch_times.append(time.perf_counter() - start)
+    return kg, batch_times
+
+
+def graph_signature(kg: KGManager) -> tuple[int, int, float]:
+    edges = kg.graph.get_edge_list()
+    total_weight = sum(kg.graph[src, tgt]["weight"] for src, tgt in edges)
+    return len(kg.graph.get_node_list()), len(edges), round(total_weight, 6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KG导入：列表查找 vs 哈希索引")
+    parser.add_argument("--triples", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=10_000, help="每批（每次运行导入）的三元组数")
+    parser.add_argument(
+        "--legacy-max", type=int, default=20_000, help="旧实现只在不超过该三元组数的规模上运行（旧实现随规模平方增长）"
+    )
+    args = parser.parse_args()
+
+    sizes = sorted({*args.triples, args.legacy_max})
+    for triple_count in sizes:
+        batches = make_batches(triple_count, args.batch, seed=triple_count)
+
+        kg, new_times = import_batches(batches, legacy=False)
+        line = (
+            f"三元组 {triple_count:>9,} | 新实现 总计 {sum(new_times):7.2f}s "
+            f"({triple_count / sum(new_times):>9,.0f} 条/s，首批 {new_times[0] * 1000:7.1f}ms，末批 {new_times[-1] * 1000:7.1f}ms)"
+        )
+        if triple_count <= args.legacy_max:
+            legacy_kg, legacy_times = import_batches(batches, legacy=True)
+            consistent = graph_signature(kg) == graph_signature(legacy_kg)
+            line += (
+                f" | 旧实现 总计 {sum(legacy_times):7.2f}s（首批 {legacy_times[0] * 1000:7.1f}ms，"
+                f"末批 {legacy_times[-1] * 1000:8.1f}ms） | 结果一致 {consistent}"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+LPMM 知识检索中个性化PageRank的基准测试
+
+在随机生成的KG（实体之间双向连接，实体指向所在段落）上模拟 kg_search 的PPR步骤：
+- 旧实现：quick_algo.pagerank.run_pagerank 全图从头迭代，再按节点名前缀筛选段落并排序
+- 新实现：PPREngine（稀疏转移矩阵 + 全局PageRank热启动 + 残差提前结束 + 结果缓存）
+
+输出每次查询的平均耗时（新实现分别列出未命中缓存与命中缓存的耗时），并以充分收敛的结果为参照，
+统计两种实现的前10个段落与参照不一致的查询数（旧实现按 节点数*tol 判断收敛，大图上会过早停止）。
+
+用法:
+    python scripts/kg_ppr_benchmark.py
+    python scripts/kg_ppr_benchmark.py --paragraphs 10000 100000 --queries 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from quick_algo import di_graph, pagerank
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.knowledge.ppr_engine import PPREngine  # noqa: E402
+
+ALPHA = 0.8
+TOP_N = 10
+
+
+def build_graph(paragraph_count: int, rng: random.Random) -> tuple[di_graph.DiGraph, list[str], list[str]]:
+    """每个段落5个三元组，实体数约为三元组数的一半"""
+    entity_count = paragraph_count * 5 // 2
+    entities = [f"entity-{i:08d}" for i in range(entity_count)]
+    paragraphs = [f"paragraph-{i:08d}" for i in range(paragraph_count)]
+    edges: dict[tuple[str, str], float] = {}
+    for pg in paragraphs:
+        for _ in range(5):
+            a, b = rng.choice(entities), rng.choice(entities)
+            if a != b:
+                edges[(a, b)] = edges.get((a, b), 0) + 1.0
+                edges[(b, a)] = edges.get((b, a), 0) + 1.0
+            edges[(a, pg)] = edges.get((a, pg), 0) + 1.0
+    graph = di_graph.DiGraph()
+    for (src, dst), weight in edges.items():
+        graph.add_edge(di_graph.DiEdge(src, dst, {"weight": weight}))
+    return graph, [n for n in entities if n in graph], paragraphs
+
+
+def make_query(rng: random.Random, entities: list[str], paragraphs: list[str]) -> dict[str, float]:
+    """与 kg_search 相同：约10个实体权重在[0.05, 1]之间，文段权重为 归一化相似度*0.05"""
+    weights = {ent: rng.uniform(0.05, 1.0) for ent in rng.sample(entities, 10)}
+    weights.update({pg: rng.random() * 0.05 for pg in rng.sample(paragraphs, min(len(paragraphs), 1000))})
+    return weights
+
+
+def legacy_rank(
+    graph: di_graph.DiGraph, weights: dict[str, float], max_iter: int = 100, tol: float = 1e-6
+) -> list[tuple[str, float]]:
+    ppr_res = pagerank.run_pagerank(graph, personalization=weights, max_iter=max_iter, alpha=ALPHA, tol=tol)
+    passage_node_res = [(node_key, score) for node_key, score in ppr_res.items() if node_key.startswith("paragraph")]
+    return sorted(passage_node_res, key=lambda item: item[1], reverse=True)
+
+
+def top_n(result: list[tuple[str, float]]) -> list[str]:
+    return [node for node, _ in result[:TOP_N]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="个性化PageRank：quick_algo 全量迭代 vs PPREngine")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--queries", type=int, default=20, help="不同查询的数量（每个查询随后再重复一次以测缓存）")
+    parser.add_argument("--reference-queries", type=int, default=5, help="计算充分收敛参照解的查询数")
+    args = parser.parse_args()
+
+    for paragraph_count in args.paragraphs:
+        rng = random.Random(paragraph_count)
+        graph, entities, paragraphs = build_graph(paragraph_count, rng)
+        queries = [make_query(rng, entities, paragraphs) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        legacy_results = [legacy_rank(graph, weights) for weights in queries]
+        legacy_time = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        engine = PPREngine(graph)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        new_results = [engine.rank_paragraphs(weights, ALPHA) for weights in queries]
+        miss_time = (time.perf_counter() - start) / len(queries)
+        start = time.perf_counter()
+        for weights in queries:
+            engine.rank_paragraphs(weights, ALPHA)
+        hit_time = (time.perf_counter() - start) / len(queries)
+
+        references = [
+            legacy_rank(graph, weights, max_iter=1000, tol=1e-15) for weights in queries[: args.reference_queries]
+        ]
+        legacy_mismatches = sum(top_n(r) != top_n(ref) for r, ref in zip(legacy_results, references, strict=False))
+        new_mismatches = sum(top_n(r) != top_n(ref) for r, ref in zip(new_results, references, strict=False))
+        print(
+            f"段落 {paragraph_count:>7,}（节点 {engine.node_count:>8,}） | 旧实现 {legacy_time * 1000:8.1f}ms/次 | "
+            f"新实现 构建 {build_time * 1000:7.1f}ms，未命中 {miss_time * 1000:7.1f}ms/次，命中 {hit_time * 1000:6.3f}ms/次 | "
+            f"前{TOP_N}与收敛解不一致 旧 {legacy_mismatches}/{len(references)}，新 {new_mismatches}/{len(references)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
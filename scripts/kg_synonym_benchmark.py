@@ -0,0 +1,130 @@
+"""
+LPMM 同义词连接的基准测试
+
+在随机生成的实体嵌入库（默认1万/5万个实体，按簇分布以产生同义词）上运行 KGManager._synonym_connect：
+- 旧实现：逐个实体以单行查询调用 search_top_k
+- 新实现：按块批量检索（精确索引直接在索引矩阵上做矩阵乘法，近似索引一次 Faiss search），阈值筛选在 NumPy 中完成
+
+旧实现耗时随实体数线性增长且常数很大，默认只在 --legacy-max 个实体的规模上运行，并校验两种实现建立的同义边一致。
+嵌入库写在临时目录中，不会影响 data/embedding。
+
+用法:
+    python scripts/kg_synonym_benchmark.py
+    python scripts/kg_synonym_benchmark.py --entities 10000 100000 --dim 256 --legacy-max 5000
+    python scripts/kg_synonym_benchmark.py --entities 100000 --index-type hnsw
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.knowledge.embedding_store import EmbeddingStore  # noqa: E402
+from src.chat.knowledge.kg_manager import KGManager  # noqa: E402
+from src.chat.knowledge.utils.hash import get_sha256  # noqa: E402
+from src.config.config import global_config  # noqa: E402
+
+
+def build_entity_store(entity_count: int, dim: int, dir_path: str) -> tuple[EmbeddingStore, dict]:
+    """每簇约5个实体，簇内向量彼此接近（余弦相似度约0.9），作为同义词"""
+    rng = np.random.default_rng(entity_count)
+    centers = rng.standard_normal((max(entity_count // 5, 1), dim)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), entity_count)
+    noise = rng.standard_normal((entity_count, dim)).astype(np.float32) * 0.33
+    vectors = centers[assignments] + noise
+
+    store = EmbeddingStore("entity", dir_path)
+    store.store.dim = dim
+    triple_list_data = {}
+    for i, vector in enumerate(vectors):
+        name = f"实体{i}"
+        store.store.append("entity-" + get_sha256(name), vector, name)
+        triple_list_data.setdefault(f"{i // 10:016x}", []).append([name, "关系", name])
+    store.build_faiss_index()
+    return store, triple_list_data
+
+
+def legacy_synonym_connect(node_to_node, triple_list_data, entity_store: EmbeddingStore) -> int:
+    """旧版 KGManager._synonym_connect（去掉进度条与打印）"""
+    new_edge_cnt = 0
+    ent_hash_list = set()
+    for triple_list in triple_list_data.values():
+        for triple in triple_list:
+            ent_hash_list.add("entity" + "-" + get_sha256(triple[0]))
+            ent_hash_list.add("entity" + "-" + get_sha256(triple[2]))
+    # 与新实现相同按行号顺序处理，使“已作为同义词的实体跳过”的结果可比
+    ent_hash_list = sorted(ent_hash_list, key=lambda h: entity_store.store.hash2row[h])
+
+    synonym_hash_set = set()
+    for ent_hash in ent_hash_list:
+        if ent_hash in synonym_hash_set:
+            continue
+        ent_embedding = entity_store.store.get_embedding(ent_hash)
+        if ent_embedding is None:
+            continue
+        similar_ents = entity_store.search_top_k(ent_embedding, global_config.lpmm_knowledge.rag_synonym_search_top_k)
+        for res_ent_hash, similarity in similar_ents:
+            if res_ent_hash == ent_hash or similarity < global_config.lpmm_knowledge.rag_synonym_threshold:
+                continue
+            node_to_node[(res_ent_hash, ent_hash)] = similarity
+            node_to_node[(ent_hash, res_ent_hash)] = similarity
+            synonym_hash_set.add(res_ent_hash)
+            new_edge_cnt += 1
+    return new_edge_cnt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同义词连接：逐实体检索 vs 批量矩阵检索")
+    parser.add_argument("--entities", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=global_config.lpmm_knowledge.embedding_dimension)
+    parser.add_argument(
+        "--index-type",
+        choices=["flat", "ivf_flat", "ivf_pq", "hnsw"],
+        default=global_config.lpmm_knowledge.embedding_index_type,
+        help="实体嵌入库使用的索引类型（默认取配置）",
+    )
+    parser.add_argument("--legacy-max", type=int, default=10_000, help="旧实现只在不超过该实体数的规模上运行")
+    args = parser.parse_args()
+    global_config.lpmm_knowledge.embedding_index_type = args.index_type
+
+    print(
+        f"维度 {args.dim}，索引类型 {args.index_type}，"
+        f"top_k {global_config.lpmm_knowledge.rag_synonym_search_top_k}，"
+        f"阈值 {global_config.lpmm_knowledge.rag_synonym_threshold}"
+    )
+    for entity_count in args.entities:
+        with tempfile.TemporaryDirectory() as dir_path:
+            entity_store, triple_list_data = build_entity_store(entity_count, args.dim, dir_path)
+            embedding_manager = SimpleNamespace(entities_embedding_store=entity_store)
+
+            new_edges = {}
+            start = time.perf_counter()
+            # 进度条输出到 stderr/stdout 会干扰结果表格，这里丢弃
+            with contextlib.redirect_stdout(io.StringIO()):
+                new_cnt = KGManager._synonym_connect(new_edges, triple_list_data, embedding_manager)  # type: ignore
+            new_time = time.perf_counter() - start
+            line = f"实体数 {entity_count:>7,} | 批量检索 {new_time:7.2f}s，同义关系 {new_cnt}"
+
+            if entity_count <= args.legacy_max:
+                legacy_edges = {}
+                start = time.perf_counter()
+                legacy_cnt = legacy_synonym_connect(legacy_edges, triple_list_data, entity_store)
+                legacy_time = time.perf_counter() - start
+                consistent = legacy_cnt == new_cnt and legacy_edges.keys() == new_edges.keys()
+                line += (
+                    f" | 逐实体检索 {legacy_time:7.2f}s | 加速 {legacy_time / new_time:6.1f}x | 结果一致 {consistent}"
+                )
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
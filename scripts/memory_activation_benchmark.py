@@ -0,0 +1,147 @@
+"""
+记忆图扩散激活基准测试
+
+在随机生成的记忆图（默认1万/10万/100万条边）上比较：
+- 旧实现：基于 networkx 的逐关键词 BFS（list.pop(0) + G[current][neighbor] 字典查找）
+- 新实现：GraphSnapshot 的 CSR 向量化多源扩散
+- 构建记忆时图在查询之间不断变化：每次修改后整体重建快照 vs 在快照上增量修改（覆盖层）
+
+用法:
+    python scripts/memory_activation_benchmark.py
+    python scripts/memory_activation_benchmark.py --edges 10000 100000 --queries 200 --depth 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.memory_system.Hippocampus import MemoryGraph  # noqa: E402
+from src.chat.memory_system.graph_snapshot import GraphSnapshot  # noqa: E402
+
+
+def build_graph(edge_count: int, avg_degree: int = 8, seed: int = 42) -> nx.Graph:
+    """生成带 strength 属性的随机记忆图"""
+    rng = random.Random(seed)
+    node_count = max(2, edge_count * 2 // avg_degree)
+    graph = nx.Graph()
+    graph.add_nodes_from(f"topic_{i}" for i in range(node_count))
+    while graph.number_of_edges() < edge_count:
+        u, v = rng.randrange(node_count), rng.randrange(node_count)
+        if u != v:
+            graph.add_edge(f"topic_{u}", f"topic_{v}", strength=rng.randint(1, 10))
+    return graph
+
+
+def legacy_spread(graph: nx.Graph, keywords: list[str], max_depth: int) -> dict[str, float]:
+    """旧版 Hippocampus 中的扩散实现"""
+    activate_map = {}
+    for keyword in keywords:
+        activation_values = {keyword: 1.0}
+        visited_nodes = {keyword}
+        nodes_to_process = [(keyword, 1.0, 0)]
+        while nodes_to_process:
+            current_node, current_activation, current_depth = nodes_to_process.pop(0)
+            if current_activation <= 0 or current_depth >= max_depth:
+                continue
+            for neighbor in list(graph.neighbors(current_node)):
+                if neighbor in visited_nodes:
+                    continue
+                strength = graph[current_node][neighbor].get("strength", 1)
+                new_activation = current_activation - (1 / strength)
+                if new_activation > 0:
+                    activation_values[neighbor] = new_activation
+                    visited_nodes.add(neighbor)
+                    nodes_to_process.append((neighbor, new_activation, current_depth + 1))
+        for node, value in activation_values.items():
+            if value > 0:
+                activate_map[node] = activate_map.get(node, 0) + value
+    return activate_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扩散激活：networkx BFS vs CSR 快照")
+    parser.add_argument("--edges", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=100, help="每种规模的查询次数")
+    parser.add_argument(
+        "--legacy-queries", type=int, default=5, help="旧实现的查询次数（旧实现在大图上是平方级的，默认只跑少量）"
+    )
+    parser.add_argument("--keywords", type=int, default=3, help="每次查询的关键词数量")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--mutations", type=int, default=50, help="图变化场景中 修改+查询 的轮数")
+    args = parser.parse_args()
+
+    for edge_count in args.edges:
+        graph = build_graph(edge_count)
+        nodes = list(graph.nodes())
+        rng = random.Random(edge_count)
+        queries = [rng.sample(nodes, args.keywords) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        snapshot = GraphSnapshot.from_graph(graph)
+        build_time = time.perf_counter() - start
+
+        legacy_queries = queries[: args.legacy_queries]
+        start = time.perf_counter()
+        legacy_results = [legacy_spread(graph, q, args.depth) for q in legacy_queries]
+        legacy_time = (time.perf_counter() - start) / max(len(legacy_queries), 1)
+
+        start = time.perf_counter()
+        snapshot_results = [snapshot.spread_activation(q, args.depth) for q in queries]
+        snapshot_time = (time.perf_counter() - start) / len(queries)
+
+        consistent = sum(
+            1
+            for a, b in zip(legacy_results, snapshot_results, strict=False)
+            if a.keys() == b.keys() and all(abs(a[k] - b[k]) < 1e-9 for k in a)
+        )
+        print(
+            f"边数 {edge_count:>9,} | 节点数 {len(nodes):>8,} | 快照构建 {build_time * 1000:8.1f}ms | "
+            f"BFS {legacy_time * 1000:9.3f}ms/次 | CSR {snapshot_time * 1000:8.3f}ms/次 | "
+            f"加速 {legacy_time / max(snapshot_time, 1e-9):7.1f}x | 结果一致 {consistent}/{len(legacy_results)}"
+        )
+        bench_mutations(graph, nodes, queries, args.depth, args.mutations, rng)
+
+
+def bench_mutations(graph: nx.Graph, nodes: list, queries: list, depth: int, rounds: int, rng: random.Random) -> None:
+    """每轮新增一条边、删除一条边后查询一次，比较整体重建与增量修改的耗时"""
+    memory_graph = MemoryGraph()
+    memory_graph.G = graph
+    memory_graph.snapshot  # noqa: B018
+    operations = []
+    for _ in range(rounds):
+        added = tuple(rng.sample(nodes, 2))
+        removed = rng.choice(list(graph.edges(rng.choice(nodes)))) if graph.number_of_edges() else None
+        operations.append((added, removed))
+
+    rebuild_time = incremental_time = 0.0
+    consistent = 0
+    for i, ((a, b), removed) in enumerate(operations):
+        start = time.perf_counter()
+        memory_graph.connect_dot(a, b)
+        if removed is not None and memory_graph.G.has_edge(*removed):
+            memory_graph.remove_edge(*removed)
+        incremental = memory_graph.spread_activation(queries[i % len(queries)], depth)
+        incremental_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        rebuilt = GraphSnapshot.from_graph(memory_graph.G).spread_activation(queries[i % len(queries)], depth)
+        rebuild_time += time.perf_counter() - start
+        consistent += incremental.keys() == rebuilt.keys() and all(
+            abs(incremental[k] - rebuilt[k]) < 1e-9 for k in rebuilt
+        )
+
+    print(
+        f"{'':<14} 图变化场景 | 每次修改后重建 {rebuild_time / rounds * 1000:9.3f}ms/轮 | "
+        f"增量修改 {incremental_time / rounds * 1000:8.3f}ms/轮 | 结果一致 {consistent}/{rounds}"
+    )
+
+
+if __name__ == "__main__":
+    main()
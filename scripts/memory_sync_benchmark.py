@@ -0,0 +1,128 @@
+"""
+记忆图数据库同步基准测试
+
+在临时 SQLite 数据库上，对一个随机记忆图（默认20万条边）施加1%的变化，比较：
+- 旧实现：每次同步都读出全部 GraphNodes/GraphEdges 行，对整张图重新计算哈希并逐行 UPDATE
+- 新实现：EntorhinalCortex.sync_memory_to_db 只同步脏节点/脏边，单事务批量写入
+
+不会触碰 data/MaiBot.db。
+
+用法:
+    python scripts/memory_sync_benchmark.py --edges 200000 --churn 0.01
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from peewee import SqliteDatabase
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.common.database.database_model import GraphNodes, GraphEdges  # noqa: E402
+from src.chat.memory_system.Hippocampus import Hippocampus, EntorhinalCortex  # noqa: E402
+
+
+def build_memory(hippocampus: Hippocampus, edge_count: int, avg_degree: int = 8, seed: int = 42):
+    rng = random.Random(seed)
+    node_count = max(2, edge_count * 2 // avg_degree)
+    now = time.time()
+    graph = hippocampus.memory_graph.G
+    for i in range(node_count):
+        graph.add_node(
+            f"topic_{i}", memory_items=f"关于topic_{i}的记忆", weight=1.0, created_time=now, last_modified=now
+        )
+    while graph.number_of_edges() < edge_count:
+        u, v = rng.randrange(node_count), rng.randrange(node_count)
+        if u != v:
+            graph.add_edge(f"topic_{u}", f"topic_{v}", strength=rng.randint(1, 10), created_time=now, last_modified=now)
+
+
+def apply_churn(hippocampus: Hippocampus, ratio: float, seed: int = 7):
+    """按比例修改节点记忆、边强度，并删除少量节点"""
+    rng = random.Random(seed)
+    memory_graph = hippocampus.memory_graph
+    now = time.time()
+    nodes = list(memory_graph.G.nodes())
+    edges = list(memory_graph.G.edges())
+    for node in rng.sample(nodes, int(len(nodes) * ratio)):
+        asyncio.run(memory_graph.add_dot(node, f"{node}的新记忆"))
+    for u, v in rng.sample(edges, int(len(edges) * ratio)):
+        if memory_graph.G.has_edge(u, v):
+            memory_graph.set_edge_strength(u, v, memory_graph.G[u][v]["strength"] + 1, now)
+    for node in rng.sample(nodes, max(1, int(len(nodes) * ratio / 10))):
+        if node in memory_graph.G:
+            memory_graph.remove_node(node)
+
+
+def legacy_sync(hippocampus: Hippocampus):
+    """旧版 sync_memory_to_db 的核心开销：全表读取 + 全图哈希 + 逐行更新"""
+    graph = hippocampus.memory_graph.G
+    db_nodes = {node.concept: node for node in GraphNodes.select()}
+    for concept, data in graph.nodes(data=True):
+        memory_hash = hippocampus.calculate_node_hash(concept, data["memory_items"])
+        if concept in db_nodes and db_nodes[concept].hash != str(memory_hash):
+            GraphNodes.update(memory_items=data["memory_items"], hash=memory_hash).where(
+                GraphNodes.concept == concept
+            ).execute()
+    db_edges = {
+        (edge.source, edge.target): hippocampus.calculate_edge_hash(edge.source, edge.target)
+        for edge in GraphEdges.select()
+    }
+    for source, target, data in graph.edges(data=True):
+        if db_edges.get((source, target)) != hippocampus.calculate_edge_hash(source, target):
+            GraphEdges.update(strength=data["strength"]).where(
+                (GraphEdges.source == source) & (GraphEdges.target == target)
+            ).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="记忆图同步：全量 vs 增量")
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--churn", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_db = SqliteDatabase(os.path.join(tmp_dir, "bench.db"), pragmas={"journal_mode": "wal", "synchronous": 0})
+        with test_db.bind_ctx([GraphNodes, GraphEdges]):
+            test_db.create_tables([GraphNodes, GraphEdges])
+
+            hippocampus = Hippocampus()
+            cortex = EntorhinalCortex(hippocampus)
+            build_memory(hippocampus, args.edges)
+            print(
+                f"记忆图: {hippocampus.memory_graph.G.number_of_nodes():,} 个节点, "
+                f"{hippocampus.memory_graph.G.number_of_edges():,} 条边, 变化比例 {args.churn:.1%}"
+            )
+
+            start = time.perf_counter()
+            asyncio.run(cortex.resync_memory_to_db())
+            print(f"初始全量写入: {time.perf_counter() - start:.2f}s")
+
+            apply_churn(hippocampus, args.churn)
+            dirty = (len(hippocampus.memory_graph.dirty_nodes), len(hippocampus.memory_graph.dirty_edges))
+            print(f"脏节点 {dirty[0]:,} 个, 脏边 {dirty[1]:,} 条")
+
+            start = time.perf_counter()
+            legacy_sync(hippocampus)
+            print(f"旧版全量同步: {time.perf_counter() - start:.2f}s")
+
+            start = time.perf_counter()
+            asyncio.run(cortex.sync_memory_to_db())
+            print(f"增量同步: {time.perf_counter() - start:.2f}s")
+
+            db_nodes = GraphNodes.select().count()
+            db_edges = GraphEdges.select().count()
+            print(
+                f"同步后数据库: {db_nodes:,} 个节点, {db_edges:,} 条边 "
+                f"(内存: {hippocampus.memory_graph.G.number_of_nodes():,} / {hippocampus.memory_graph.G.number_of_edges():,})"
+            )
+
+
+if __name__ == "__main__":
+    main()
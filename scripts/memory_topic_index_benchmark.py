@@ -0,0 +1,125 @@
+"""
+记忆构建中相似主题查找的基准测试
+
+在随机生成的记忆图（默认1千/1万/5万个节点）上，模拟一次记忆构建为若干个新主题查找相似的已有主题并写入图中：
+- 旧实现：对每个新主题遍历全部节点，逐个 jieba 分词后构建0/1向量计算余弦相似度
+- 新实现：TopicTokenIndex 倒排索引，只比较共享词的主题
+
+输出每次记忆构建的耗时（新实现另列出首次查询时构建索引的一次性耗时），并校验两种实现的结果一致。
+
+用法:
+    python scripts/memory_topic_index_benchmark.py
+    python scripts/memory_topic_index_benchmark.py --nodes 10000 50000 --topics 10 --builds 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import jieba
+import numpy as np
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.memory_system.topic_index import TopicTokenIndex  # noqa: E402
+
+jieba.setLogLevel(60)
+
+
+def load_vocabulary(size: int = 20000, seed: int = 42) -> list[str]:
+    """从 jieba 词典中抽取常用的中文词作为主题素材"""
+    jieba.initialize()
+    words = [w for w, freq in jieba.dt.FREQ.items() if freq > 50 and 1 < len(w) <= 4]
+    random.Random(seed).shuffle(words)
+    return words[:size]
+
+
+def make_topic(rng: random.Random, vocabulary: list[str]) -> str:
+    """主题通常是1~3个词组成的短语"""
+    return "".join(rng.choice(vocabulary) for _ in range(rng.choice([1, 1, 2, 2, 3])))
+
+
+def legacy_similar(topic: str, existing_topics: list[str], threshold: float = 0.7) -> list[tuple[str, float]]:
+    """旧版 memory_compress 中的相似主题查找"""
+    similar_topics = []
+    for existing_topic in existing_topics:
+        topic_words = set(jieba.cut(topic))
+        existing_words = set(jieba.cut(existing_topic))
+        all_words = topic_words | existing_words
+        v1 = [1 if word in topic_words else 0 for word in all_words]
+        v2 = [1 if word in existing_words else 0 for word in all_words]
+        norm1, norm2 = np.linalg.norm(v1), np.linalg.norm(v2)
+        similarity = 0 if norm1 == 0 or norm2 == 0 else np.dot(v1, v2) / (norm1 * norm2)
+        if similarity >= threshold:
+            similar_topics.append((existing_topic, similarity))
+    similar_topics.sort(key=lambda x: x[1], reverse=True)
+    return similar_topics[:3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="相似主题查找：全量遍历 vs 倒排索引")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--topics", type=int, default=10, help="每次记忆构建产生的新主题数")
+    parser.add_argument("--builds", type=int, default=20, help="新实现模拟的记忆构建次数")
+    parser.add_argument(
+        "--legacy-builds", type=int, default=1, help="旧实现模拟的记忆构建次数（旧实现随节点数线性增长，默认只跑一次）"
+    )
+    args = parser.parse_args()
+
+    vocabulary = load_vocabulary()
+    print(f"词表大小 {len(vocabulary)}，每次记忆构建 {args.topics} 个新主题")
+
+    for node_count in args.nodes:
+        rng = random.Random(node_count)
+        unique_topics = set()
+        while len(unique_topics) < node_count:
+            unique_topics.add(make_topic(rng, vocabulary))
+        topics = sorted(unique_topics)
+        rng.shuffle(topics)
+        # 新主题一半与已有主题相近（共享部分词），一半是全新的
+        builds = [
+            [
+                rng.choice(topics) + rng.choice(vocabulary) if i % 2 == 0 else make_topic(rng, vocabulary)
+                for i in range(args.topics)
+            ]
+            for _ in range(max(args.builds, args.legacy_builds))
+        ]
+
+        start = time.perf_counter()
+        legacy_results = []
+        existing = list(topics)
+        for new_topics in builds[: args.legacy_builds]:
+            legacy_results.append([legacy_similar(t, existing) for t in new_topics])
+            existing.extend(new_topics)
+        legacy_time = (time.perf_counter() - start) / args.legacy_builds
+
+        index = TopicTokenIndex()
+        start = time.perf_counter()
+        index.build(topics)
+        index_build_time = time.perf_counter() - start
+
+        new_results = []
+        start = time.perf_counter()
+        for new_topics in builds[: args.builds]:
+            new_results.append([index.find_similar(t, 0.7, 3) for t in new_topics])
+            for t in new_topics:
+                index.add(t)
+        new_time = (time.perf_counter() - start) / args.builds
+
+        mismatches = sum(
+            {(n, round(float(s), 6)) for n, s in legacy} != {(n, round(float(s), 6)) for n, s in new}
+            for legacy_build, new_build in zip(legacy_results, new_results, strict=False)
+            for legacy, new in zip(legacy_build, new_build, strict=True)
+        )
+        print(
+            f"节点数 {node_count:>7,} | 旧实现 {legacy_time * 1000:10.1f}ms/次构建 | "
+            f"倒排索引 {new_time * 1000:7.2f}ms/次构建（首次建索引 {index_build_time * 1000:8.1f}ms） | "
+            f"加速 {legacy_time / max(new_time, 1e-9):8.0f}x | 结果不一致 {mismatches}"
+        )
+
+
+if __name__ == "__main__":
+    main()
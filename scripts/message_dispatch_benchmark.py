@@ -0,0 +1,135 @@
+"""
+入站消息分发（MessageDispatcher）的基准测试
+
+模拟一次突发：许多聊天流同时来消息，其中一个聊天流刷屏且每条消息处理很慢。对比三种处理方式：
+- 逐条处理：收到一条处理完再处理下一条，慢聊天流阻塞所有聊天流
+- 每条消息一个任务：maim_message 的默认行为，没有队头阻塞，但同一聊天流的消息会乱序、并发不受限
+- MessageDispatcher：按聊天流排队，同一聊天流按顺序处理，总并发受限，刷屏聊天流的排队数受限
+
+输出普通聊天流消息从到达到处理完成的延迟（P50/P99）、乱序消息数与分发器统计。
+
+用法:
+    python scripts/message_dispatch_benchmark.py
+    python scripts/message_dispatch_benchmark.py --chats 200 --messages 5 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+from src.chat.message_receive.message_dispatcher import MessageDispatcher  # noqa: E402
+
+SLOW_CHAT = "flood"
+SLOW_PROCESS_TIME = 0.05  # 刷屏聊天流每条消息的处理时间（秒）
+SLOW_MESSAGES = 100  # 刷屏聊天流的消息数
+
+
+def make_messages(chat_count: int, per_chat: int, rng: random.Random) -> list[dict]:
+    messages = [(f"chat{chat}", i) for chat in range(chat_count) for i in range(per_chat)]
+    messages += [(SLOW_CHAT, i) for i in range(SLOW_MESSAGES)]
+    rng.shuffle(messages)
+    # 同一聊天流内按序号重新排列，保证到达顺序与序号一致
+    counters: dict[str, int] = {}
+    result = []
+    for chat, _ in messages:
+        seq = counters.get(chat, 0)
+        counters[chat] = seq + 1
+        result.append(
+            {
+                "message_info": {"platform": "bench", "group_info": {"group_id": chat}, "user_info": {"user_id": "1"}},
+                "message_segment": {"type": "text", "data": str(seq)},
+                "seq": seq,
+            }
+        )
+    return result
+
+
+class Recorder:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.latencies: list[float] = []
+        self.last_seq: dict[str, int] = {}
+        self.out_of_order = 0
+        self.processed = 0
+
+    async def handle(self, message_data: dict) -> None:
+        chat = message_data["message_info"]["group_info"]["group_id"]
+        if chat == SLOW_CHAT:
+            await asyncio.sleep(SLOW_PROCESS_TIME)
+        else:
+            await asyncio.sleep(self.rng.uniform(0.001, 0.01))
+            self.latencies.append(time.perf_counter() - message_data["arrive"])
+        if message_data["seq"] < self.last_seq.get(chat, -1):
+            self.out_of_order += 1
+        self.last_seq[chat] = message_data["seq"]
+        self.processed += 1
+
+    def summary(self) -> str:
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        return f"普通聊天流延迟 P50 {p50:8.1f}ms / P99 {p99:8.1f}ms | 乱序 {self.out_of_order:4d} 条 | 处理 {self.processed} 条"
+
+
+async def run_sequential(messages: list[dict], recorder: Recorder) -> None:
+    for message_data in messages:
+        message_data["arrive"] = time.perf_counter()
+    for message_data in messages:
+        await recorder.handle(message_data)
+
+
+async def run_tasks(messages: list[dict], recorder: Recorder) -> None:
+    tasks = []
+    for message_data in messages:
+        message_data["arrive"] = time.perf_counter()
+        tasks.append(asyncio.create_task(recorder.handle(message_data)))
+    await asyncio.gather(*tasks)
+
+
+async def run_dispatcher(messages: list[dict], recorder: Recorder, concurrency: int, max_pending: int) -> dict:
+    dispatcher = MessageDispatcher(recorder.handle, worker_count=concurrency, max_pending_per_chat=max_pending)
+    for message_data in messages:
+        message_data["arrive"] = time.perf_counter()
+        await dispatcher.dispatch(message_data)
+    while dispatcher.processed + dispatcher.dropped < len(messages):
+        await asyncio.sleep(0.01)
+    stats = dispatcher.get_stats()
+    await dispatcher.stop()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入站消息：逐条处理 vs 每条一个任务 vs 按聊天流排队")
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=5, help="每个普通聊天流的消息数")
+    parser.add_argument("--concurrency", type=int, default=32, help="最多同时处理的消息数")
+    parser.add_argument("--max-pending", type=int, default=50)
+    args = parser.parse_args()
+
+    for name in ("逐条处理", "每条一个任务", "按聊天流排队"):
+        messages = make_messages(args.chats, args.messages, random.Random(0))
+        recorder = Recorder(random.Random(1))
+        start = time.perf_counter()
+        stats = None
+        if name == "逐条处理":
+            asyncio.run(run_sequential(messages, recorder))
+        elif name == "每条一个任务":
+            asyncio.run(run_tasks(messages, recorder))
+        else:
+            stats = asyncio.run(run_dispatcher(messages, recorder, args.concurrency, args.max_pending))
+        print(f"{name:<8} | 总耗时 {time.perf_counter() - start:6.2f}s | {recorder.summary()}")
+        if stats:
+            print(
+                f"{'':<10} 丢弃 {stats['dropped']} 条 | 平均排队 {stats['avg_wait_time'] * 1000:.1f}ms | "
+                f"最长排队 {stats['max_wait_time'] * 1000:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
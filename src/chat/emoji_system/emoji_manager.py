@@ -18,6 +18,7 @@ from src.common.database.database import db as peewee_db
 from src.common.logger import get_logger
 from src.config.config import global_config, model_config
 from src.chat.utils.utils_image import image_path_to_base64, get_image_manager
+from src.chat.emoji_system.emoji_tag_index import EmojiTagIndex
 from src.llm_models.utils_model import LLMRequest
 
 install(extra_lines=3)
@@ -388,6 +389,7 @@ class EmojiManager:
         self.emoji_num_max = global_config.emoji.max_reg_num
         self.emoji_num_max_reach_deletion = global_config.emoji.do_replace
         self.emoji_objects: list[MaiEmoji] = []  # 存储MaiEmoji对象的列表，使用类型注解明确列表元素类型
+        self.tag_index = EmojiTagIndex()  # emoji_objects 的哈希与情感标签索引，随注册/删除增量更新
 
         logger.info("启动表情包管理器")
 
@@ -437,37 +439,8 @@ class EmojiManager:
                 logger.warning("内存中没有任何表情包对象")
                 return None
 
-            # 计算每个表情包与输入文本的最大情感相似度
-            emoji_similarities = []
-            for emoji in all_emojis:
-                # 跳过已标记为删除的对象
-                if emoji.is_deleted:
-                    continue
-
-                emotions = emoji.emotion
-                if not emotions:
-                    continue
-
-                # 计算与每个emotion标签的相似度，取最大值
-                max_similarity = 0
-                best_matching_emotion = ""
-                for emotion in emotions:
-                    # 使用编辑距离计算相似度
-                    distance = self._levenshtein_distance(text_emotion, emotion)
-                    max_len = max(len(text_emotion), len(emotion))
-                    similarity = 1 - (distance / max_len if max_len > 0 else 0)
-                    if similarity > max_similarity:
-                        max_similarity = similarity
-                        best_matching_emotion = emotion
-
-                if best_matching_emotion:
-                    emoji_similarities.append((emoji, max_similarity, best_matching_emotion))
-
-            # 按相似度降序排序
-            emoji_similarities.sort(key=lambda x: x[1], reverse=True)
-
-            # 获取前10个最相似的表情包
-            top_emojis = emoji_similarities[:10] if len(emoji_similarities) > 10 else emoji_similarities
+            # 通过情感标签索引获取前10个最相似的表情包
+            top_emojis = self.tag_index.search(text_emotion, top_k=10)
 
             if not top_emojis:
                 logger.warning("未找到匹配的表情包")
@@ -491,35 +464,6 @@ class EmojiManager:
             logger.error(f"[错误] 获取表情包失败: {str(e)}")
             return None
 
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        # sourcery skip: simplify-empty-collection-comparison, simplify-len-comparison, simplify-str-len-comparison
-        """计算两个字符串的编辑距离
-
-        Args:
-            s1: 第一个字符串
-            s2: 第二个字符串
-
-        Returns:
-            int: 编辑距离
-        """
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-
-        if len(s2) == 0:
-            return len(s1)
-
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
-
     async def check_emoji_file_integrity(self) -> None:
         """检查表情包文件完整性
         遍历self.emoji_objects中的所有对象，检查文件是否存在
@@ -570,6 +514,8 @@ class EmojiManager:
             # 从 self.emoji_objects 中移除标记的对象
             if objects_to_remove:
                 self.emoji_objects = [e for e in self.emoji_objects if e not in objects_to_remove]
+                for emoji in objects_to_remove:
+                    self.tag_index.remove(emoji)
 
             # 清理 EMOJI_REGISTERED_DIR 目录中未被追踪的文件
             removed_count = await clean_unused_emojis(EMOJI_REGISTERED_DIR, self.emoji_objects, removed_count)
@@ -652,6 +598,7 @@ class EmojiManager:
             # 更新内存中的列表和数量
             self.emoji_objects = emoji_objects
             self.emoji_num = len(emoji_objects)
+            self.tag_index.rebuild(emoji_objects)
 
             logger.info(f"[数据库] 加载完成: 共加载 {self.emoji_num} 个表情包记录。")
             if load_errors > 0:
@@ -661,6 +608,7 @@ class EmojiManager:
             logger.error(f"[错误] 从数据库加载所有表情包对象失败: {str(e)}")
             self.emoji_objects = []  # 加载失败则清空列表
             self.emoji_num = 0
+            self.tag_index.rebuild([])
 
     async def get_emoji_from_db(self, emoji_hash: Optional[str] = None) -> List["MaiEmoji"]:
         """获取指定哈希值的表情包并初始化为MaiEmoji类对象列表 (主要用于调试或特定查找)
@@ -695,19 +643,14 @@ class EmojiManager:
             return []
 
     async def get_emoji_from_manager(self, emoji_hash: str) -> Optional["MaiEmoji"]:
-        # sourcery skip: use-next
-        """从内存中的 emoji_objects 列表获取表情包
+        """从内存中的 emoji_objects 列表获取表情包（通过哈希索引查找）
 
         参数:
             emoji_hash: 要查找的表情包哈希值
         返回:
             MaiEmoji 或 None: 如果找到则返回 MaiEmoji 对象，否则返回 None
         """
-        for emoji in self.emoji_objects:
-            # 确保对象未被标记为删除且哈希值匹配
-            if not emoji.is_deleted and emoji.hash == emoji_hash:
-                return emoji
-        return None  # 如果循环结束还没找到，则返回 None
+        return self.tag_index.get(emoji_hash)
     
     async def get_emoji_tag_by_hash(self, emoji_hash: str) -> Optional[List[str]]:
         """根据哈希值获取已注册表情包的情感标签列表
@@ -798,6 +741,7 @@ class EmojiManager:
             if success:
                 # 从emoji_objects列表中移除该对象
                 self.emoji_objects = [e for e in self.emoji_objects if e.hash != emoji_hash]
+                self.tag_index.remove(emoji)
                 # 更新计数
                 self.emoji_num -= 1
                 logger.info(f"[统计] 当前表情包数量: {self.emoji_num}")
@@ -879,6 +823,7 @@ class EmojiManager:
                         register_success = await new_emoji.register_to_db()
                         if register_success:
                             self.emoji_objects.append(new_emoji)
+                            self.tag_index.add(new_emoji)
                             self.emoji_num += 1
                             logger.info(f"[成功] 注册: {new_emoji.filename}")
                             return True
@@ -937,7 +882,7 @@ class EmojiManager:
             else:
                 logger.info("[VLM分析] 生成新的详细描述")
                 if image_format in ["gif", "GIF"]:
-                    image_base64 = get_image_manager().transform_gif(image_base64)  # type: ignore
+                    image_base64 = await get_image_manager().transform_gif_async(image_base64)  # type: ignore
                     if not image_base64:
                         raise RuntimeError("GIF表情包转换失败")
                     prompt = "这是一个动态图表情包，每一张图代表了动态图的某一帧，黑色背景代表透明，描述一下表情包表达的情感和内容，描述细节，从互联网梗,meme的角度去分析"
@@ -1079,6 +1024,7 @@ class EmojiManager:
                 if register_success:
                     # 注册成功后，添加到内存列表
                     self.emoji_objects.append(new_emoji)
+                    self.tag_index.add(new_emoji)
                     self.emoji_num += 1
                     logger.info(f"[成功] 注册新表情包: {filename} (当前: {self.emoji_num}/{self.emoji_num_max})")
                     return True
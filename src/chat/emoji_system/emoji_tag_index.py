@@ -0,0 +1,149 @@
+import itertools
+import heapq
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from src.chat.emoji_system.emoji_manager import MaiEmoji
+
+
+@lru_cache(maxsize=4096)
+def levenshtein_distance(s1: str, s2: str) -> int:
+    """计算两个字符串的编辑距离（情感标签种类有限，结果按字符串对缓存）
+
+    Args:
+        s1: 第一个字符串
+        s2: 第二个字符串
+
+    Returns:
+        int: 编辑距离
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    if not s2:
+        return len(s1)
+
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+class EmojiTagIndex:
+    """
+    已注册表情包的情感标签索引
+
+    - 哈希 -> 表情包，按哈希查找无需遍历列表
+    - 情感标签 -> 表情包哈希（倒排索引），同一标签只需计算一次相似度
+    - 字符 -> 情感标签：与查询文本没有公共字符的标签编辑距离等于较长者的长度，相似度为0，
+      不会被选中，因此只需对与查询有公共字符的标签计算编辑距离
+
+    注册/删除表情包时由 EmojiManager 增量更新，查询开销只与命中标签相关，与表情包总数无关。
+    """
+
+    def __init__(self):
+        self._emojis: Dict[str, "MaiEmoji"] = {}
+        """哈希 -> 表情包"""
+        self._order: Dict[str, int] = {}
+        """哈希 -> 加入顺序，相似度相同时先加入的排在前面（与遍历列表排序的结果一致）"""
+        self._seq = itertools.count()
+        self._tag_emojis: Dict[str, Set[str]] = {}
+        """情感标签 -> 表情包哈希"""
+        self._char_tags: Dict[str, Set[str]] = {}
+        """字符 -> 情感标签"""
+
+    def __len__(self) -> int:
+        return len(self._emojis)
+
+    def rebuild(self, emojis: List["MaiEmoji"]) -> None:
+        """按给定的表情包列表重建索引"""
+        self._emojis.clear()
+        self._order.clear()
+        self._tag_emojis.clear()
+        self._char_tags.clear()
+        for emoji in emojis:
+            self.add(emoji)
+
+    def add(self, emoji: "MaiEmoji") -> None:
+        if emoji.hash in self._emojis:
+            self.remove(self._emojis[emoji.hash])
+        self._emojis[emoji.hash] = emoji
+        self._order[emoji.hash] = next(self._seq)
+        for tag in set(emoji.emotion):
+            if tag not in self._tag_emojis:
+                self._tag_emojis[tag] = set()
+                for char in set(tag):
+                    self._char_tags.setdefault(char, set()).add(tag)
+            self._tag_emojis[tag].add(emoji.hash)
+
+    def remove(self, emoji: "MaiEmoji") -> None:
+        if self._emojis.get(emoji.hash) is not emoji:
+            return
+        del self._emojis[emoji.hash]
+        del self._order[emoji.hash]
+        for tag in set(emoji.emotion):
+            hashes = self._tag_emojis.get(tag)
+            if hashes is None:
+                continue
+            hashes.discard(emoji.hash)
+            if hashes:
+                continue
+            # 标签不再被任何表情包使用，从字符索引中移除
+            del self._tag_emojis[tag]
+            for char in set(tag):
+                if tags := self._char_tags.get(char):
+                    tags.discard(tag)
+                    if not tags:
+                        del self._char_tags[char]
+
+    def get(self, emoji_hash: str) -> Optional["MaiEmoji"]:
+        """按哈希获取表情包（不含已标记删除的）"""
+        emoji = self._emojis.get(emoji_hash)
+        return None if emoji is None or emoji.is_deleted else emoji
+
+    def search(self, text_emotion: str, top_k: int = 10) -> List[Tuple["MaiEmoji", float, str]]:
+        """
+        查找与情感描述最相似的表情包
+        Args:
+            text_emotion: 情感描述
+            top_k: 返回的最大数量
+        Returns:
+            List[Tuple[表情包, 相似度, 最匹配的情感标签]]: 按相似度降序排列，只包含相似度大于0的表情包
+        """
+        candidate_tags: Set[str] = set()
+        for char in set(text_emotion):
+            candidate_tags.update(self._char_tags.get(char, ()))
+
+        similarities: Dict[str, float] = {}
+        candidate_hashes: Set[str] = set()
+        for tag in candidate_tags:
+            max_len = max(len(text_emotion), len(tag))
+            similarity = 1 - levenshtein_distance(text_emotion, tag) / max_len
+            if similarity > 0:
+                similarities[tag] = similarity
+                candidate_hashes.update(self._tag_emojis[tag])
+
+        results = []
+        for emoji_hash in candidate_hashes:
+            emoji = self._emojis[emoji_hash]
+            if emoji.is_deleted:
+                continue
+            # 与逐个比较相同：取相似度最大的标签，相同时取靠前的标签
+            max_similarity = 0.0
+            best_matching_emotion = ""
+            for emotion in emoji.emotion:
+                similarity = similarities.get(emotion, 0.0)
+                if similarity > max_similarity:
+                    max_similarity = similarity
+                    best_matching_emotion = emotion
+            results.append((emoji, max_similarity, best_matching_emotion))
+
+        return heapq.nsmallest(top_k, results, key=lambda item: (-item[1], self._order[item[0].hash]))
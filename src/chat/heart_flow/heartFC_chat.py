@@ -33,6 +33,7 @@ from src.chat.utils.chat_message_builder import (
 )
 
 if TYPE_CHECKING:
+    from src.chat.message_receive.message import MessageRecv
     from src.common.data_models.database_data_model import DatabaseMessages
 
 
@@ -59,6 +60,10 @@ install(extra_lines=3)
 
 logger = get_logger("hfc")  # Logger Name Changed
 
+NEW_MESSAGE_LIMIT = 10  # 判断是否结束等待时最多统计的新消息数（最新的若干条）
+PENDING_RECHECK_INTERVAL = 5.0  # 有未处理的新消息时重新判断的间隔（秒），活跃度可能随时段变化
+WAITING_LOG_INTERVAL = 15.0  # 等待状态日志的输出间隔（秒）
+
 
 class HeartFChatting:
     """
@@ -106,6 +111,13 @@ class HeartFChatting:
 
         self.last_read_time = time.time() - 10
 
+        # 新消息通知：HeartFCMessageReceiver 处理完消息后调用 notify_new_message，
+        # 主循环在没有新消息时挂起等待，不再轮询数据库
+        self._new_message_event = asyncio.Event()
+        self._pending_messages: deque = deque(maxlen=NEW_MESSAGE_LIMIT)
+        """自 last_read_time 以来的新消息 (message_id, 消息时间, 兴趣度)"""
+        self._last_waiting_log_time = 0.0
+
         self.focus_energy = 1
         self.no_action_consecutive = 0
         # 最近三次no_action的新消息兴趣度记录
@@ -123,6 +135,7 @@ class HeartFChatting:
             # 标记为活动状态，防止重复启动
             self.running = True
 
+            self._load_pending_messages()
             self._loop_task = asyncio.create_task(self._main_chat_loop())
             self._loop_task.add_done_callback(self._handle_loop_completion)
             logger.info(f"{self.log_prefix} HeartFChatting 启动完成")
@@ -212,35 +225,79 @@ class HeartFChatting:
                 logger.info(f"{self.log_prefix} 兴趣度充足，等待新消息")
                 self.focus_energy = 1
 
-    async def _should_process_messages(self, new_message: List["DatabaseMessages"]) -> tuple[bool, float]:
+    def _load_pending_messages(self) -> None:
+        """启动时从数据库读取 last_read_time 之后已有的新消息，之后的新消息由 notify_new_message 通知"""
+        recent_messages_list = message_api.get_messages_by_time_in_chat(
+            chat_id=self.stream_id,
+            start_time=self.last_read_time,
+            end_time=time.time(),
+            limit=NEW_MESSAGE_LIMIT,
+            limit_mode="latest",
+            filter_mai=True,
+            filter_command=True,
+        )
+        for msg in recent_messages_list:
+            interest_value = msg.interest_value if msg.processed_plain_text else None
+            self._pending_messages.append((msg.message_id, msg.time, float(interest_value or 0.0)))
+        if self._pending_messages:
+            self._new_message_event.set()
+
+    def notify_new_message(self, message: "MessageRecv") -> None:
+        """
+        通知主循环有新消息（由 HeartFCMessageReceiver 在消息存储后调用）
+
+        与原先的数据库查询保持一致：不统计麦麦自己的消息和命令消息，没有文本的消息不计兴趣度
+        """
+        user_id = str(message.message_info.user_info.user_id)  # type: ignore
+        if message.is_command or user_id == str(global_config.bot.qq_account):
+            return
+        message_id = message.message_info.message_id
+        if any(pending[0] == message_id for pending in self._pending_messages):
+            return
+        interest_value = message.interest_value if message.processed_plain_text else None
+        self._pending_messages.append(
+            (message_id, float(message.message_info.time), float(interest_value or 0.0))  # type: ignore
+        )
+        self._new_message_event.set()
+
+    async def _wait_for_new_messages(self) -> Tuple[int, float]:
+        """
+        挂起直到有新消息；已有未处理的新消息时最多等待 PENDING_RECHECK_INTERVAL 秒后重新判断
+
+        Returns:
+            Tuple[int, float]: (新消息数, 累计兴趣值)
+        """
+        timeout = PENDING_RECHECK_INTERVAL if self._pending_messages else None
+        try:
+            await asyncio.wait_for(self._new_message_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._new_message_event.clear()
+
+        new_messages = [pending for pending in self._pending_messages if pending[1] > self.last_read_time]
+        return len(new_messages), sum(interest for _, _, interest in new_messages)
+
+    def _should_process_messages(self, new_message_count: int, total_interest: float) -> tuple[bool, float]:
         """
         判断是否应该处理消息
 
         Args:
-            new_message: 新消息列表
-            mode: 当前聊天模式
+            new_message_count: 新消息数量
+            total_interest: 新消息的累计兴趣值
 
         Returns:
             bool: 是否应该处理消息
         """
-        new_message_count = len(new_message)
         talk_frequency = self.talk_frequency_control.get_current_talk_frequency()
 
         modified_exit_count_threshold = self.focus_energy * 0.5 / talk_frequency
         modified_exit_interest_threshold = 1.5 / talk_frequency
-        total_interest = 0.0
-        for msg in new_message:
-            interest_value = msg.interest_value
-            if interest_value is not None and msg.processed_plain_text:
-                total_interest += float(interest_value)
 
         if new_message_count >= modified_exit_count_threshold:
             self.recent_interest_records.append(total_interest)
             logger.info(
                 f"{self.log_prefix} 累计消息数量达到{new_message_count}条(>{modified_exit_count_threshold:.1f})，结束等待"
             )
-            # logger.info(self.last_read_time)
-            # logger.info(new_message)
             return True, total_interest / new_message_count if new_message_count > 0 else 0.0
 
         # 检查累计兴趣值
@@ -260,36 +317,25 @@ class HeartFChatting:
                 )
                 return True, total_interest / new_message_count if new_message_count > 0 else 0.0
 
-        # 每10秒输出一次等待状态
-        if int(time.time() - self.last_read_time) > 0 and int(time.time() - self.last_read_time) % 15 == 0:
+        # 定期输出等待状态
+        if time.time() - self._last_waiting_log_time >= WAITING_LOG_INTERVAL:
             logger.debug(
                 f"{self.log_prefix} 已等待{time.time() - self.last_read_time:.0f}秒，累计{new_message_count}条消息，累计兴趣{total_interest:.1f}，继续等待..."
             )
-            await asyncio.sleep(0.5)
+            self._last_waiting_log_time = time.time()
 
         return False, 0.0
 
     async def _loopbody(self):
-        recent_messages_list = message_api.get_messages_by_time_in_chat(
-            chat_id=self.stream_id,
-            start_time=self.last_read_time,
-            end_time=time.time(),
-            limit=10,
-            limit_mode="latest",
-            filter_mai=True,
-            filter_command=True,
-        )
-        # 统一的消息处理逻辑
-        should_process, interest_value = await self._should_process_messages(recent_messages_list)
+        # 没有新消息时挂起，不查询数据库
+        new_message_count, total_interest = await self._wait_for_new_messages()
+        should_process, interest_value = self._should_process_messages(new_message_count, total_interest)
 
         if should_process:
             self.last_read_time = time.time()
+            self._pending_messages.clear()
             await self._observe(interest_value=interest_value)
 
-        else:
-            # Normal模式：消息数量不足，等待
-            await asyncio.sleep(0.5)
-            return True
         return True
 
     async def _send_and_store_reply(
@@ -124,6 +124,7 @@ class HeartFCMessageReceiver:
             await self.storage.store_message(message, chat)
 
             heartflow_chat: HeartFChatting = await heartflow.get_or_create_heartflow_chat(chat.stream_id)  # type: ignore
+            heartflow_chat.notify_new_message(message)
 
             # subheartflow.add_message_to_normal_chat_cache(message, interested_rate, is_mentioned)
             if global_config.mood.enable_mood:  
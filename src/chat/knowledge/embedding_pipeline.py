@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Coroutine, Deque, List, Optional, Tuple, TypeVar
+
+from .global_logger import logger
+
+T = TypeVar("T")
+
+# 批大小自适应：连续成功若干批且耗时低于目标时增大，失败时减半
+BATCH_GROW_AFTER = 3  # 连续成功多少批后尝试增大批大小
+BATCH_TARGET_LATENCY = 10.0  # 单批请求的目标耗时（秒），超过则不再增大
+
+
+def run_coroutine_sync(coro_factory: Callable[[], Coroutine[None, None, T]]) -> T:
+    """在同步代码中运行协程
+
+    没有运行中的事件循环时直接 asyncio.run；已处于事件循环中（如 import_openie 的 main_async）时，
+    放到一个独立线程的新事件循环里运行并等待结果，避免嵌套事件循环。
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro_factory())
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(lambda: asyncio.run(coro_factory())).result()
+
+
+class EmbeddingPipeline:
+    """批量异步嵌入流水线
+
+    - 以列表形式调用服务商的批量嵌入接口，一个请求处理一批文本
+    - 至多 max_concurrency 个请求同时进行，所有请求共用同一个 LLMRequest（及其缓存的客户端连接池）
+    - 批大小自适应：连续成功且耗时正常时翻倍（不超过 max_batch_size），失败时减半后重试，
+      单条仍失败则记为失败（返回空向量）
+    - 每完成一批立即回调 on_batch，调用方可据此落盘，实现断点续传
+    """
+
+    def __init__(self, batch_size: int = 16, max_batch_size: int = 64, max_concurrency: int = 4):
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_size = max(1, min(batch_size, self.max_batch_size))
+        self.max_concurrency = max(1, max_concurrency)
+        self._success_streak = 0
+
+    def _on_success(self, latency: float) -> None:
+        self._success_streak += 1
+        if (
+            self._success_streak >= BATCH_GROW_AFTER
+            and latency < BATCH_TARGET_LATENCY
+            and self.batch_size < self.max_batch_size
+        ):
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+            self._success_streak = 0
+            logger.debug(f"嵌入批大小增大至 {self.batch_size}")
+
+    def _on_failure(self, failed_size: int) -> None:
+        self._success_streak = 0
+        self.batch_size = max(1, min(self.batch_size, failed_size // 2))
+        logger.debug(f"嵌入批大小减小至 {self.batch_size}")
+
+    async def embed(
+        self,
+        strs: List[str],
+        on_batch: Optional[Callable[[List[Tuple[str, List[float]]]], None]] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> List[Tuple[str, List[float]]]:
+        """批量获取嵌入
+
+        Args:
+            strs: 要获取嵌入的字符串列表
+            on_batch: 每完成一批时的回调，参数为该批的(原始字符串, 嵌入向量)列表
+            progress_callback: 进度回调函数，接收一个参数表示新完成的数量
+
+        Returns:
+            包含(原始字符串, 嵌入向量)的元组列表，保持与输入顺序一致，失败项的嵌入为空列表
+        """
+        from src.config.config import model_config
+        from src.llm_models.utils_model import LLMRequest
+
+        llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type="embedding")
+        results: List[List[float]] = [[] for _ in strs]
+        # 待处理的下标，失败的批会放回队首，以减半后的批大小重新切分
+        pending: Deque[int] = deque()
+        for i, s in enumerate(strs):
+            if s:
+                pending.append(i)
+            elif progress_callback:
+                # 空字符串无法获取嵌入
+                progress_callback(1)
+
+        async def worker() -> None:
+            while pending:
+                batch = [pending.popleft() for _ in range(min(self.batch_size, len(pending)))]
+                start_time = time.perf_counter()
+                try:
+                    embeddings, _ = await llm.get_embeddings([strs[i] for i in batch])
+                except Exception as e:
+                    if len(batch) == 1:
+                        logger.error(f"获取嵌入失败: {strs[batch[0]][:50]}, 错误: {e}")
+                        if progress_callback:
+                            progress_callback(1)
+                        continue
+                    logger.warning(f"{len(batch)}条文本的批量嵌入失败，减小批大小后重试: {e}")
+                    self._on_failure(len(batch))
+                    pending.extendleft(reversed(batch))
+                    continue
+
+                self._on_success(time.perf_counter() - start_time)
+                for i, embedding in zip(batch, embeddings, strict=True):
+                    results[i] = embedding
+                if on_batch:
+                    on_batch([(strs[i], results[i]) for i in batch])
+                if progress_callback:
+                    progress_callback(len(batch))
+
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        return list(zip(strs, results, strict=True))
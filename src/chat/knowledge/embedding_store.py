@@ -2,16 +2,15 @@ from dataclasses import dataclass
 import json
 import os
 import math
-import asyncio
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
-import pandas as pd
+import pyarrow.parquet as pq
 
 # import tqdm
 import faiss
 
+from .embedding_pipeline import EmbeddingPipeline, run_coroutine_sync
 from .utils.hash import get_sha256
 from .global_logger import logger
 from rich.traceback import install
@@ -31,19 +30,27 @@ from src.config.config import global_config
 
 install(extra_lines=3)
 
-# 多线程embedding配置常量
-DEFAULT_MAX_WORKERS = 10  # 默认最大线程数
-DEFAULT_CHUNK_SIZE = 10   # 默认每个线程处理的数据块大小
-MIN_CHUNK_SIZE = 1        # 最小分块大小
-MAX_CHUNK_SIZE = 50       # 最大分块大小
-MIN_WORKERS = 1           # 最小线程数
-MAX_WORKERS = 20          # 最大线程数
+# 批量embedding配置常量
+DEFAULT_MAX_WORKERS = 10  # 默认最大并发请求数
+DEFAULT_CHUNK_SIZE = 16  # 默认每个嵌入请求的初始批大小（运行中会自适应调整）
+MIN_CHUNK_SIZE = 1  # 最小批大小
+MAX_CHUNK_SIZE = 64  # 最大批大小
+MIN_WORKERS = 1  # 最小并发请求数
+MAX_WORKERS = 20  # 最大并发请求数
+EMBEDDING_CHECKPOINT_INTERVAL = 512  # 每新增多少条嵌入落盘一次，中断后重新导入时从此处继续
 
 ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 EMBEDDING_DATA_DIR = os.path.join(ROOT_PATH, "data", "embedding")
 EMBEDDING_DATA_DIR_STR = str(EMBEDDING_DATA_DIR).replace("\\", "/")
 TOTAL_EMBEDDING_TIMES = 3  # 统计嵌入次数
 
+# 向量索引配置常量
+ANN_MIN_TRAIN_SIZE = 1000  # IVF类索引训练所需的最少向量数，不足时退回精确索引
+IVF_TRAIN_POINTS_PER_LIST = 256  # IVF训练时每个聚类中心采样的向量数上限
+INDEX_ADD_BATCH_SIZE = 65536  # 向索引添加向量时每批从磁盘读取的行数
+EXACT_SEARCH_BLOCK_SIZE = 16384  # 精确索引批量检索时每次参与矩阵乘法的索引行数
+EMBEDDING_TABLE_VERSION = 1  # 二进制嵌入库格式版本
+
 # 嵌入模型测试字符串，测试模型一致性，来自开发群的聊天记录
 # 这些字符串的嵌入结果应该是固定的，不能随时间变化
 EMBEDDING_TEST_STRINGS = [
@@ -93,15 +100,252 @@ class EmbeddingStoreItem:
         }
 
 
+class EmbeddingTable:
+    """嵌入库的二进制列式存储
+
+    每个命名空间由以下文件组成（行号即Faiss索引中的id）：
+    - <ns>_vectors.bin：连续的 float32/float16 矩阵，通过 np.memmap 只读映射
+    - <ns>_hashes.txt：每行一个hash
+    - <ns>_strs.bin / <ns>_offsets.bin：UTF-8拼接的原文与 int64 偏移表（count+1项）
+    - <ns>_meta.json：维度、数据类型与行数，最后写入，以它记录的行数为准
+
+    新增的项先缓存在内存中，flush时追加到文件末尾，已有数据不会被重写。
+    按hash读取时才临时构造 EmbeddingStoreItem，热路径应直接使用 get_str / get_embedding。
+    """
+
+    def __init__(self, namespace: str, dir_path: str):
+        self.namespace = namespace
+        self.dir = dir_path
+        self.vectors_path = f"{dir_path}/{namespace}_vectors.bin"
+        self.hashes_path = f"{dir_path}/{namespace}_hashes.txt"
+        self.strs_path = f"{dir_path}/{namespace}_strs.bin"
+        self.offsets_path = f"{dir_path}/{namespace}_offsets.bin"
+        self.meta_path = f"{dir_path}/{namespace}_meta.json"
+
+        self.dim = global_config.lpmm_knowledge.embedding_dimension
+        self.dtype = np.dtype(global_config.lpmm_knowledge.embedding_storage_dtype)
+
+        self.hashes: List[str] = []
+        self.hash2row: Dict[str, int] = {}
+        # 已落盘的行数与对应的内存映射
+        self.disk_count = 0
+        self.on_disk = False
+        """文件是否已由本实例加载或创建（未加载时不能写入，以免覆盖磁盘上已有的数据）"""
+        self._vectors: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._strs: Optional[np.ndarray] = None
+        # 尚未落盘的新增项
+        self._pending_vectors: List[np.ndarray] = []
+        self._pending_strs: List[bytes] = []
+        self._open()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.meta_path)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, item_hash: str) -> bool:
+        return item_hash in self.hash2row
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.hashes)
+
+    def keys(self) -> List[str]:
+        return self.hashes
+
+    def __getitem__(self, item_hash: str) -> EmbeddingStoreItem:
+        row = self.hash2row[item_hash]
+        return EmbeddingStoreItem(item_hash, self._row_vector(row), self._row_str(row))
+
+    def get(self, item_hash: str) -> Optional[EmbeddingStoreItem]:
+        return self[item_hash] if item_hash in self.hash2row else None
+
+    def values(self) -> Iterator[EmbeddingStoreItem]:
+        return (self[item_hash] for item_hash in self.hashes)
+
+    def hash_at(self, row: int) -> Optional[str]:
+        return self.hashes[row] if 0 <= row < len(self.hashes) else None
+
+    def get_str(self, item_hash: str) -> Optional[str]:
+        """按hash读取原文，不存在时返回None"""
+        row = self.hash2row.get(item_hash)
+        return None if row is None else self._row_str(row)
+
+    def get_embedding(self, item_hash: str) -> Optional[np.ndarray]:
+        """按hash读取float32嵌入向量，不存在时返回None"""
+        row = self.hash2row.get(item_hash)
+        return None if row is None else self._row_vector(row)
+
+    def _row_vector(self, row: int) -> np.ndarray:
+        if row < self.disk_count:
+            return np.array(self._vectors[row], dtype=np.float32)
+        return self._pending_vectors[row - self.disk_count].astype(np.float32)
+
+    def _row_str(self, row: int) -> str:
+        if row < self.disk_count:
+            return self._strs[self._offsets[row] : self._offsets[row + 1]].tobytes().decode("utf-8")
+        return self._pending_strs[row - self.disk_count].decode("utf-8")
+
+    def vectors(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """读取[start, end)行的嵌入矩阵（float32副本）"""
+        end = len(self.hashes) if end is None else min(end, len(self.hashes))
+        parts = []
+        if start < self.disk_count:
+            parts.append(np.array(self._vectors[start : min(end, self.disk_count)], dtype=np.float32))
+        if end > self.disk_count:
+            pending = self._pending_vectors[max(start - self.disk_count, 0) : end - self.disk_count]
+            parts.extend(vector.astype(np.float32).reshape(1, self.dim) for vector in pending)
+        if not parts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """按行号批量读取嵌入矩阵（float32副本），rows需升序"""
+        on_disk = rows[rows < self.disk_count]
+        parts = [np.array(self._vectors[on_disk], dtype=np.float32)]
+        parts.extend(self._row_vector(int(row)).reshape(1, self.dim) for row in rows[rows >= self.disk_count])
+        return np.concatenate(parts)
+
+    def append(self, item_hash: str, embedding, content: str) -> bool:
+        """追加一项，hash已存在或维度不符时返回False"""
+        if item_hash in self.hash2row:
+            return False
+        vector = np.asarray(embedding, dtype=self.dtype)
+        if vector.shape != (self.dim,):
+            logger.warning(
+                f"{self.namespace}嵌入维度为{vector.size}，与嵌入库维度{self.dim}不一致，跳过: {content[:50]}"
+            )
+            return False
+        self.hash2row[item_hash] = len(self.hashes)
+        self.hashes.append(item_hash)
+        self._pending_vectors.append(vector)
+        self._pending_strs.append(content.encode("utf-8"))
+        return True
+
+    def _close(self) -> None:
+        """释放内存映射（Windows下映射中的文件无法追加）"""
+        self._vectors = None
+        self._offsets = None
+        self._strs = None
+
+    def _open(self) -> None:
+        if self.disk_count == 0:
+            self._vectors = np.empty((0, self.dim), dtype=self.dtype)
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._strs = np.empty(0, dtype=np.uint8)
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self.disk_count, self.dim))
+        self._offsets = np.memmap(self.offsets_path, dtype=np.int64, mode="r", shape=(self.disk_count + 1,))
+        self._strs = (
+            np.memmap(self.strs_path, dtype=np.uint8, mode="r") if self._offsets[-1] > 0 else np.empty(0, np.uint8)
+        )
+
+    def load(self) -> None:
+        """打开已有的二进制嵌入库"""
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = int(meta["dim"])
+        self.dtype = np.dtype(meta["dtype"])
+        self.disk_count = int(meta["count"])
+        with open(self.hashes_path, "r", encoding="utf-8") as f:
+            self.hashes = f.read().split("\n")[: self.disk_count]
+        if len(self.hashes) != self.disk_count:
+            raise Exception(f"{self.namespace}嵌入库hash表行数{len(self.hashes)}与元数据{self.disk_count}不一致")
+        self.hash2row = {item_hash: row for row, item_hash in enumerate(self.hashes)}
+        self._pending_vectors = []
+        self._pending_strs = []
+        self._truncate_to_meta()
+        self.on_disk = True
+        self._open()
+
+    def _truncate_to_meta(self) -> None:
+        """截掉上次写入中断时残留在文件末尾、未记入元数据的数据"""
+        expected = {
+            self.vectors_path: self.disk_count * self.dim * self.dtype.itemsize,
+            self.offsets_path: (self.disk_count + 1) * 8,
+            self.hashes_path: sum(len(h) + 1 for h in self.hashes),
+        }
+        for path, size in expected.items():
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+        if os.path.exists(self.offsets_path) and os.path.getsize(self.offsets_path) >= 8:
+            offsets = np.fromfile(self.offsets_path, dtype=np.int64, count=self.disk_count + 1)
+            if os.path.exists(self.strs_path) and os.path.getsize(self.strs_path) > offsets[-1]:
+                os.truncate(self.strs_path, int(offsets[-1]))
+
+    def flush(self) -> None:
+        """把新增项追加到文件，最后更新元数据"""
+        if not os.path.exists(self.dir):
+            os.makedirs(self.dir, exist_ok=True)
+        if not self.on_disk:
+            if self.exists():
+                # 磁盘上已有数据却未加载，写入会覆盖它们
+                raise Exception(f"{self.namespace}嵌入库已存在但尚未加载，拒绝覆盖")
+            # 新库：写入偏移表的起始项
+            with open(self.offsets_path, "wb") as f:
+                np.zeros(1, dtype=np.int64).tofile(f)
+            for path in (self.vectors_path, self.strs_path, self.hashes_path):
+                open(path, "wb").close()
+            self.on_disk = True
+
+        if self._pending_vectors:
+            last_offset = int(self._offsets[-1])
+            new_hashes = self.hashes[self.disk_count :]
+            pending_vectors, pending_strs = self._pending_vectors, self._pending_strs
+            self._close()
+
+            with open(self.vectors_path, "ab") as f:
+                np.stack(pending_vectors).astype(self.dtype).tofile(f)
+            with open(self.strs_path, "ab") as f:
+                for content in pending_strs:
+                    f.write(content)
+            with open(self.offsets_path, "ab") as f:
+                lengths = np.fromiter((len(content) for content in pending_strs), dtype=np.int64)
+                (last_offset + np.cumsum(lengths)).tofile(f)
+            with open(self.hashes_path, "a", encoding="utf-8", newline="\n") as f:
+                f.write("".join(item_hash + "\n" for item_hash in new_hashes))
+
+            self.disk_count = len(self.hashes)
+            self._pending_vectors = []
+            self._pending_strs = []
+
+        meta = {"version": EMBEDDING_TABLE_VERSION, "dim": self.dim, "dtype": self.dtype.name, "count": self.disk_count}
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._open()
+
+    def migrate_from_parquet(self, parquet_path: str, batch_size: int = 4096) -> None:
+        """从旧版parquet嵌入库一次性迁移，按批读取，不构造逐行对象"""
+        parquet_file = pq.ParquetFile(parquet_path)
+        total = parquet_file.metadata.num_rows
+        logger.info(f"正在将{self.namespace}嵌入库从{parquet_path}迁移为二进制格式，共{total}条")
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=["hash", "embedding", "str"]):
+            embeddings = batch.column("embedding").flatten().to_numpy().reshape(len(batch), -1)
+            if self.disk_count == 0 and not self.hashes:
+                # 以实际数据的维度为准
+                self.dim = embeddings.shape[1]
+            for item_hash, embedding, content in zip(
+                batch.column("hash").to_pylist(), embeddings, batch.column("str").to_pylist(), strict=True
+            ):
+                self.append(item_hash, embedding, content)
+            self.flush()
+        if total == 0:
+            self.flush()
+        logger.info(f"{self.namespace}嵌入库迁移完成，共{len(self)}条")
+
+
 class EmbeddingStore:
     def __init__(self, namespace: str, dir_path: str, max_workers: int = DEFAULT_MAX_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.namespace = namespace
         self.dir = dir_path
+        # 旧版parquet嵌入库，仅用于迁移
         self.embedding_file_path = f"{dir_path}/{namespace}.parquet"
         self.index_file_path = f"{dir_path}/{namespace}.index"
-        self.idx2hash_file_path = dir_path + "/" + namespace + "_i2h.json"
 
-        # 多线程配置参数验证和设置
+        # 并发与批大小配置参数验证和设置
         self.max_workers = max(MIN_WORKERS, min(MAX_WORKERS, max_workers))
         self.chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, chunk_size))
         
@@ -111,148 +355,35 @@ class EmbeddingStore:
         if self.chunk_size != chunk_size:
             logger.warning(f"chunk_size 已从 {chunk_size} 调整为 {self.chunk_size} (范围: {MIN_CHUNK_SIZE}-{MAX_CHUNK_SIZE})")
 
-        self.store = {}
+        self.store = EmbeddingTable(namespace, dir_path)
 
+        # 索引中的id即EmbeddingTable的行号
         self.faiss_index = None
-        self.idx2hash = None
 
-    def _get_embedding(self, s: str) -> List[float]:
-        """获取字符串的嵌入向量，使用完全同步的方式避免事件循环问题"""
-        # 创建新的事件循环并在完成后立即关闭
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # 创建新的LLMRequest实例
-            from src.llm_models.utils_model import LLMRequest
-            from src.config.config import model_config
-            
-            llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type="embedding")
-            
-            # 使用新的事件循环运行异步方法
-            embedding, _ = loop.run_until_complete(llm.get_embedding(s))
-            
-            if embedding and len(embedding) > 0:
-                return embedding
-            else:
-                logger.error(f"获取嵌入失败: {s}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"获取嵌入时发生异常: {s}, 错误: {e}")
-            return []
-        finally:
-            # 确保事件循环被正确关闭
-            try:
-                loop.close()
-            except Exception:
-                pass
+    def _get_embeddings(
+        self,
+        strs: List[str],
+        on_batch: Optional[Callable[[List[Tuple[str, List[float]]]], None]] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> List[Tuple[str, List[float]]]:
+        """通过批量异步流水线获取嵌入向量
 
-    def _get_embeddings_batch_threaded(self, strs: List[str], chunk_size: int = 10, max_workers: int = 10, progress_callback=None) -> List[Tuple[str, List[float]]]:
-        """使用多线程批量获取嵌入向量
-        
         Args:
             strs: 要获取嵌入的字符串列表
-            chunk_size: 每个线程处理的数据块大小
-            max_workers: 最大线程数
+            on_batch: 每完成一批时的回调
             progress_callback: 进度回调函数，接收一个参数表示完成的数量
-            
+
         Returns:
-            包含(原始字符串, 嵌入向量)的元组列表，保持与输入顺序一致
+            包含(原始字符串, 嵌入向量)的元组列表，保持与输入顺序一致，失败项的嵌入为空列表
         """
         if not strs:
             return []
-            
-        # 分块
-        chunks = []
-        for i in range(0, len(strs), chunk_size):
-            chunk = strs[i:i + chunk_size]
-            chunks.append((i, chunk))  # 保存起始索引以维持顺序
-        
-        # 结果存储，使用字典按索引存储以保证顺序
-        results = {}
-        
-        def process_chunk(chunk_data):
-            """处理单个数据块的函数"""
-            start_idx, chunk_strs = chunk_data
-            chunk_results = []
-            
-            # 为每个线程创建独立的LLMRequest实例
-            from src.llm_models.utils_model import LLMRequest
-            from src.config.config import model_config
-            
-            try:
-                # 创建线程专用的LLM实例
-                llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type="embedding")
-                
-                for i, s in enumerate(chunk_strs):
-                    try:
-                        # 在线程中创建独立的事件循环
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            embedding = loop.run_until_complete(llm.get_embedding(s))
-                        finally:
-                            loop.close()
-                            
-                        if embedding and len(embedding) > 0:
-                            chunk_results.append((start_idx + i, s, embedding[0]))  # embedding[0] 是实际的向量
-                        else:
-                            logger.error(f"获取嵌入失败: {s}")
-                            chunk_results.append((start_idx + i, s, []))
-                        
-                        # 每完成一个嵌入立即更新进度
-                        if progress_callback:
-                            progress_callback(1)
-                            
-                    except Exception as e:
-                        logger.error(f"获取嵌入时发生异常: {s}, 错误: {e}")
-                        chunk_results.append((start_idx + i, s, []))
-                        
-                        # 即使失败也要更新进度
-                        if progress_callback:
-                            progress_callback(1)
-                        
-            except Exception as e:
-                logger.error(f"创建LLM实例失败: {e}")
-                # 如果创建LLM实例失败，返回空结果
-                for i, s in enumerate(chunk_strs):
-                    chunk_results.append((start_idx + i, s, []))
-                    # 即使失败也要更新进度
-                    if progress_callback:
-                        progress_callback(1)
-                    
-            return chunk_results
-        
-        # 使用线程池处理
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_chunk = {executor.submit(process_chunk, chunk): chunk for chunk in chunks}
-            
-            # 收集结果（进度已在process_chunk中实时更新）
-            for future in as_completed(future_to_chunk):
-                try:
-                    chunk_results = future.result()
-                    for idx, s, embedding in chunk_results:
-                        results[idx] = (s, embedding)
-                except Exception as e:
-                    chunk = future_to_chunk[future]
-                    logger.error(f"处理数据块时发生异常: {chunk}, 错误: {e}")
-                    # 为失败的块添加空结果
-                    start_idx, chunk_strs = chunk
-                    for i, s in enumerate(chunk_strs):
-                        results[start_idx + i] = (s, [])
-        
-        # 按原始顺序返回结果
-        ordered_results = []
-        for i in range(len(strs)):
-            if i in results:
-                ordered_results.append(results[i])
-            else:
-                # 防止遗漏
-                ordered_results.append((strs[i], []))
-                
-        return ordered_results
+        pipeline = EmbeddingPipeline(
+            batch_size=self.chunk_size,
+            max_batch_size=MAX_CHUNK_SIZE,
+            max_concurrency=min(self.max_workers, math.ceil(len(strs) / self.chunk_size)),
+        )
+        return run_coroutine_sync(lambda: pipeline.embed(strs, on_batch, progress_callback))
 
     def get_test_file_path(self):
         return EMBEDDING_TEST_FILE
@@ -261,22 +392,15 @@ class EmbeddingStore:
         """保存测试字符串的嵌入到本地（使用多线程优化）"""
         logger.info("开始保存测试字符串的嵌入向量...")
         
-        # 使用多线程批量获取测试字符串的嵌入
-        embedding_results = self._get_embeddings_batch_threaded(
-            EMBEDDING_TEST_STRINGS,
-            chunk_size=min(self.chunk_size, len(EMBEDDING_TEST_STRINGS)),
-            max_workers=min(self.max_workers, len(EMBEDDING_TEST_STRINGS))
-        )
-        
+        # 批量获取测试字符串的嵌入
+        embedding_results = self._get_embeddings(EMBEDDING_TEST_STRINGS)
+
         # 构建测试向量字典
         test_vectors = {}
         for idx, (s, embedding) in enumerate(embedding_results):
-            if embedding:
-                test_vectors[str(idx)] = embedding
-            else:
+            if not embedding:
                 logger.error(f"获取测试字符串嵌入失败: {s}")
-                # 使用原始单线程方法作为后备
-                test_vectors[str(idx)] = self._get_embedding(s)
+            test_vectors[str(idx)] = embedding
         
         with open(self.get_test_file_path(), "w", encoding="utf-8") as f:
             json.dump(test_vectors, f, ensure_ascii=False, indent=2)
@@ -308,12 +432,8 @@ class EmbeddingStore:
         
         logger.info("开始检验嵌入模型一致性...")
         
-        # 使用多线程批量获取当前模型的嵌入
-        embedding_results = self._get_embeddings_batch_threaded(
-            EMBEDDING_TEST_STRINGS,
-            chunk_size=min(self.chunk_size, len(EMBEDDING_TEST_STRINGS)),
-            max_workers=min(self.max_workers, len(EMBEDDING_TEST_STRINGS))
-        )
+        # 批量获取当前模型的嵌入
+        embedding_results = self._get_embeddings(EMBEDDING_TEST_STRINGS)
         
         # 检查一致性
         for idx, (s, new_emb) in enumerate(embedding_results):
@@ -331,7 +451,7 @@ class EmbeddingStore:
         return True
 
     def batch_insert_strs(self, strs: List[str], times: int) -> None:
-        """向库中存入字符串（使用多线程优化）"""
+        """向库中存入字符串（批量异步获取嵌入，定期落盘以支持断点续传）"""
         if not strs:
             return
             
@@ -369,83 +489,57 @@ class EmbeddingStore:
             if already_processed > 0:
                 progress.update(task, advance=already_processed)
             
-            if new_strs:
-                # 使用实例配置的参数，智能调整分块和线程数
-                optimal_chunk_size = max(MIN_CHUNK_SIZE, min(self.chunk_size, len(new_strs) // self.max_workers if self.max_workers > 0 else self.chunk_size))
-                optimal_max_workers = min(self.max_workers, max(MIN_WORKERS, len(new_strs) // optimal_chunk_size if optimal_chunk_size > 0 else 1))
-                
-                logger.debug(f"使用多线程处理: chunk_size={optimal_chunk_size}, max_workers={optimal_max_workers}")
-                
-                # 定义进度更新回调函数
-                def update_progress(count):
-                    progress.update(task, advance=count)
-                
-                # 批量获取嵌入，并实时更新进度
-                embedding_results = self._get_embeddings_batch_threaded(
-                    new_strs, 
-                    chunk_size=optimal_chunk_size, 
-                    max_workers=optimal_max_workers,
-                    progress_callback=update_progress
-                )
-                
-                # 存入结果（不再需要在这里更新进度，因为已经在回调中更新了）
-                for s, embedding in embedding_results:
-                    item_hash = self.namespace + "-" + get_sha256(s)
-                    if embedding:  # 只有成功获取到嵌入才存入
-                        self.store[item_hash] = EmbeddingStoreItem(item_hash, embedding, s)
-                    else:
-                        logger.warning(f"跳过存储失败的嵌入: {s[:50]}...")
+            # 定义进度更新回调函数
+            def update_progress(count):
+                progress.update(task, advance=count)
 
-    def save_to_file(self) -> None:
-        """保存到文件"""
-        data = []
-        logger.info(f"正在保存{self.namespace}嵌入库到文件{self.embedding_file_path}")
-        for item in self.store.values():
-            data.append(item.to_dict())
-        data_frame = pd.DataFrame(data)
+            unflushed = 0
 
-        if not os.path.exists(self.dir):
-            os.makedirs(self.dir, exist_ok=True)
-        if not os.path.exists(self.embedding_file_path):
-            open(self.embedding_file_path, "w").close()
+            def store_batch(batch_results: List[Tuple[str, List[float]]]):
+                """每完成一批立即存入，并定期落盘作为断点"""
+                nonlocal unflushed
+                for s, embedding in batch_results:
+                    if self.store.append(self.namespace + "-" + get_sha256(s), embedding, s):
+                        unflushed += 1
+                if unflushed >= EMBEDDING_CHECKPOINT_INTERVAL:
+                    self.store.flush()
+                    unflushed = 0
 
-        data_frame.to_parquet(self.embedding_file_path, engine="pyarrow", index=False)
+            # 批量获取嵌入，并实时更新进度与落盘
+            embedding_results = self._get_embeddings(new_strs, on_batch=store_batch, progress_callback=update_progress)
+
+        failed_count = sum(1 for _, embedding in embedding_results if not embedding)
+        if failed_count:
+            logger.warning(f"{self.namespace}嵌入库有{failed_count}条字符串获取嵌入失败，已跳过")
+
+    def save_to_file(self) -> None:
+        """保存到文件"""
+        logger.info(f"正在保存{self.namespace}嵌入库到目录{self.dir}")
+        self.store.flush()
         logger.info(f"{self.namespace}嵌入库保存成功")
 
-        if self.faiss_index is not None and self.idx2hash is not None:
+        if self.faiss_index is not None:
             logger.info(f"正在保存{self.namespace}嵌入库的FaissIndex到文件{self.index_file_path}")
             faiss.write_index(self.faiss_index, self.index_file_path)
             logger.info(f"{self.namespace}嵌入库的FaissIndex保存成功")
-            logger.info(f"正在保存{self.namespace}嵌入库的idx2hash映射到文件{self.idx2hash_file_path}")
-            with open(self.idx2hash_file_path, "w", encoding="utf-8") as f:
-                f.write(json.dumps(self.idx2hash, ensure_ascii=False, indent=4))
-            logger.info(f"{self.namespace}嵌入库的idx2hash映射保存成功")
 
     def load_from_file(self) -> None:
         """从文件中加载"""
-        if not os.path.exists(self.embedding_file_path):
-            raise Exception(f"文件{self.embedding_file_path}不存在")
+        if not self.store.exists():
+            if not os.path.exists(self.embedding_file_path):
+                raise Exception(f"文件{self.store.meta_path}不存在")
+            # 旧版parquet嵌入库：迁移后旧索引的id与行号不一定对应，需要重建
+            self.store.migrate_from_parquet(self.embedding_file_path)
+            logger.info(f"迁移完成后可删除旧文件{self.embedding_file_path}")
+            logger.warning("正在重建Faiss索引")
+            self.build_faiss_index()
+            self.save_to_file()
+            return
+
         logger.info("正在加载嵌入库...")
-        logger.debug(f"正在从文件{self.embedding_file_path}中加载{self.namespace}嵌入库")
-        data_frame = pd.read_parquet(self.embedding_file_path, engine="pyarrow")
-        total = len(data_frame)
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            MofNCompleteColumn(),
-            "•",
-            TimeElapsedColumn(),
-            "<",
-            TimeRemainingColumn(),
-            transient=False,
-        ) as progress:
-            task = progress.add_task("加载嵌入库", total=total)
-            for _, row in data_frame.iterrows():
-                self.store[row["hash"]] = EmbeddingStoreItem(row["hash"], row["embedding"], row["str"])
-                progress.update(task, advance=1)
-        logger.info(f"{self.namespace}嵌入库加载成功")
+        logger.debug(f"正在从目录{self.dir}中加载{self.namespace}嵌入库")
+        self.store.load()
+        logger.info(f"{self.namespace}嵌入库加载成功，共{len(self.store)}条")
 
         try:
             if os.path.exists(self.index_file_path):
@@ -455,35 +549,130 @@ class EmbeddingStore:
                 logger.info(f"{self.namespace}嵌入库的FaissIndex加载成功")
             else:
                 raise Exception(f"文件{self.index_file_path}不存在")
-            if os.path.exists(self.idx2hash_file_path):
-                logger.info(f"正在加载{self.namespace}嵌入库的idx2hash映射...")
-                logger.debug(f"正在从文件{self.idx2hash_file_path}中加载{self.namespace}嵌入库的idx2hash映射")
-                with open(self.idx2hash_file_path, "r") as f:
-                    self.idx2hash = json.load(f)
-                logger.info(f"{self.namespace}嵌入库的idx2hash映射加载成功")
-            else:
-                raise Exception(f"文件{self.idx2hash_file_path}不存在")
+            if self._index_type_of(self.faiss_index) != self._target_index_type(len(self.store)):
+                raise Exception("索引类型与配置不一致")
+            if self.faiss_index.ntotal > len(self.store):
+                raise Exception("索引条数多于嵌入库")
+            self._apply_search_params()
         except Exception as e:
             logger.error(f"加载{self.namespace}嵌入库的FaissIndex时发生错误：{e}")
             logger.warning("正在重建Faiss索引")
             self.build_faiss_index()
             logger.info(f"{self.namespace}嵌入库的FaissIndex重建成功")
             self.save_to_file()
+            return
+
+        # 上次导入中断时嵌入库可能多于索引，补齐即可
+        if self.faiss_index.ntotal < len(self.store):
+            self.update_faiss_index()
+
+    def _target_index_type(self, item_count: int) -> str:
+        """根据配置与数据量确定应使用的索引类型"""
+        index_type = global_config.lpmm_knowledge.embedding_index_type
+        if index_type in ("ivf_flat", "ivf_pq") and item_count < ANN_MIN_TRAIN_SIZE:
+            # 数据量太少时IVF无法有效训练，精确检索也足够快
+            return "flat"
+        return index_type
+
+    @staticmethod
+    def _index_type_of(index) -> str:
+        """识别已有索引的类型，旧版无id映射的IndexFlatIP返回legacy"""
+        index = faiss.downcast_index(index)
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            inner = faiss.downcast_index(index.index)
+            if isinstance(inner, faiss.IndexHNSWFlat):
+                return "hnsw"
+            if isinstance(inner, faiss.IndexFlat):
+                return "flat"
+            return "unknown"
+        if isinstance(index, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(index, faiss.IndexIVFFlat):
+            return "ivf_flat"
+        if isinstance(index, faiss.IndexFlat):
+            return "legacy"
+        return "unknown"
+
+    def _create_index(self, index_type: str):
+        """创建空索引，IVF类索引会在从嵌入库中采样的向量上完成训练"""
+        config = global_config.lpmm_knowledge
+        dim = self.store.dim
+        if index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, config.index_hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efConstruction = config.index_hnsw_ef_construction
+            return faiss.IndexIDMap2(base)
+        if index_type not in ("ivf_flat", "ivf_pq"):
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+        item_count = len(self.store)
+        # nlist未配置时取 4*sqrt(N)，并保证每个聚类中心至少有39个训练点
+        nlist = config.index_ivf_nlist or int(4 * math.sqrt(item_count))
+        nlist = max(1, min(nlist, item_count // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_pq":
+            # 子向量数必须整除维度
+            pq_m = max(m for m in range(1, min(config.index_pq_m, dim) + 1) if dim % m == 0)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+
+        train_size = min(item_count, nlist * IVF_TRAIN_POINTS_PER_LIST)
+        if train_size < item_count:
+            rows = np.sort(np.random.default_rng(0).choice(item_count, train_size, replace=False))
+            train_set = self.store.take(rows)
+        else:
+            train_set = self.store.vectors()
+        faiss.normalize_L2(train_set)
+        logger.info(f"正在训练{self.namespace}嵌入库的{index_type}索引（nlist={nlist}，训练向量{train_size}条）")
+        index.train(train_set)
+        return index
+
+    def _apply_search_params(self) -> None:
+        """把nprobe/efSearch等检索参数应用到当前索引"""
+        index_type = self._index_type_of(self.faiss_index)
+        params = faiss.ParameterSpace()
+        if index_type in ("ivf_flat", "ivf_pq"):
+            params.set_index_parameter(self.faiss_index, "nprobe", global_config.lpmm_knowledge.index_ivf_nprobe)
+        elif index_type == "hnsw":
+            params.set_index_parameter(self.faiss_index, "efSearch", global_config.lpmm_knowledge.index_hnsw_ef_search)
+
+    def _add_rows_to_index(self, start: int) -> None:
+        """把嵌入库中第start行之后的向量分批归一化后加入索引，id为行号"""
+        for batch_start in range(start, len(self.store), INDEX_ADD_BATCH_SIZE):
+            embeddings = self.store.vectors(batch_start, batch_start + INDEX_ADD_BATCH_SIZE)
+            faiss.normalize_L2(embeddings)
+            ids = np.arange(batch_start, batch_start + len(embeddings), dtype=np.int64)
+            self.faiss_index.add_with_ids(embeddings, ids)
 
     def build_faiss_index(self) -> None:
         """重新构建Faiss索引，以余弦相似度为度量"""
-        # 获取所有的embedding
-        array = []
-        self.idx2hash = dict()
-        for key in self.store:
-            array.append(self.store[key].embedding)
-            self.idx2hash[str(len(array) - 1)] = key
-        embeddings = np.array(array, dtype=np.float32)
-        # L2归一化
-        faiss.normalize_L2(embeddings)
+        index_type = self._target_index_type(len(self.store))
         # 构建索引
-        self.faiss_index = faiss.IndexFlatIP(global_config.lpmm_knowledge.embedding_dimension)
-        self.faiss_index.add(embeddings)
+        self.faiss_index = self._create_index(index_type)
+        self._add_rows_to_index(0)
+        self._apply_search_params()
+        logger.info(f"{self.namespace}嵌入库的{index_type}索引构建完成，共{len(self.store)}条")
+
+    def update_faiss_index(self) -> None:
+        """增量更新Faiss索引：仅把尚未入索引的行通过add_with_ids追加
+
+        索引不存在、类型与配置不符（含旧版无id映射的索引），或数据量跨过IVF训练门槛时，退回全量重建
+        """
+        if (
+            self.faiss_index is None
+            or self._index_type_of(self.faiss_index) != self._target_index_type(len(self.store))
+            or self.faiss_index.ntotal > len(self.store)
+        ):
+            self.build_faiss_index()
+            return
+
+        indexed_count = self.faiss_index.ntotal
+        if indexed_count == len(self.store):
+            return
+        self._add_rows_to_index(indexed_count)
+        logger.info(
+            f"{self.namespace}嵌入库索引增量追加{len(self.store) - indexed_count}条，当前共{self.faiss_index.ntotal}条"
+        )
 
     def search_top_k(self, query: List[float], k: int) -> List[Tuple[str, float]]:
         """搜索最相似的k个项，以余弦相似度为度量
@@ -496,25 +685,82 @@ class EmbeddingStore:
         if self.faiss_index is None:
             logger.debug("FaissIndex尚未构建,返回None")
             return []
-        if self.idx2hash is None:
-            logger.warning("idx2hash尚未构建,返回None")
-            return []
 
         # L2归一化
-        faiss.normalize_L2(np.array([query], dtype=np.float32))
+        query_array = np.array([query], dtype=np.float32)
+        faiss.normalize_L2(query_array)
         # 搜索
-        distances, indices = self.faiss_index.search(np.array([query]), k)
-        # 整理结果
-        indices = list(indices.flatten())
-        distances = list(distances.flatten())
-        result = [
-            (self.idx2hash[str(int(idx))], float(sim))
-            for (idx, sim) in zip(indices, distances, strict=False)
-            if idx in range(len(self.idx2hash))
-        ]
+        distances, indices = self.faiss_index.search(query_array, k)
+        # 整理结果，近似索引候选不足时会返回-1
+        result = []
+        for idx, sim in zip(indices[0].tolist(), distances[0].tolist(), strict=True):
+            item_hash = self.store.hash_at(idx)
+            if item_hash is not None:
+                result.append((item_hash, float(sim)))
 
         return result
 
+    def search_top_k_batch(
+        self, queries: np.ndarray, k: int, min_similarity: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """批量搜索最相似的k个项，以余弦相似度为度量
+        Args:
+            queries: 查询的embedding矩阵（n×dim）
+            k: 每个查询返回的最相似的k个项
+            min_similarity: 相似度下限，低于该值的结果视为无结果（可大幅减少精确索引取top-k的开销）
+        Returns:
+            (similarities, rows): 均为n×k矩阵，按相似度降序，rows为嵌入库中的行号（可通过 store.hash_at 转为hash），
+            无结果的位置行号为-1
+        """
+        n = len(queries)
+        if self.faiss_index is None:
+            logger.debug("FaissIndex尚未构建,返回空结果")
+            return np.empty((n, 0), dtype=np.float32), np.empty((n, 0), dtype=np.int64)
+
+        # L2归一化（在副本上进行，不修改调用方的矩阵）
+        query_array = np.array(queries, dtype=np.float32).reshape(-1, self.store.dim)
+        faiss.normalize_L2(query_array)
+
+        index = faiss.downcast_index(self.faiss_index)
+        id_map = None
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            id_map = faiss.vector_to_array(index.id_map)
+            index = faiss.downcast_index(index.index)
+        if not isinstance(index, faiss.IndexFlat) or index.ntotal == 0:
+            similarities, rows = self.faiss_index.search(query_array, k)
+            if min_similarity is not None:
+                rows[similarities < min_similarity] = -1
+            return similarities, rows
+
+        # 精确索引：直接在索引持有的归一化矩阵上分块做矩阵乘法（比Faiss的暴力检索快得多），结果与其一致
+        base = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+        cand_queries, cand_positions, cand_sims = [], [], []
+        for start in range(0, index.ntotal, EXACT_SEARCH_BLOCK_SIZE):
+            block_sims = query_array @ base[start : start + EXACT_SEARCH_BLOCK_SIZE].T
+            if min_similarity is not None:
+                query_idx, positions = np.nonzero(block_sims >= min_similarity)
+            else:
+                block_k = min(k, block_sims.shape[1])
+                positions = np.argpartition(block_sims, -block_k, axis=1)[:, -block_k:].ravel()
+                query_idx = np.repeat(np.arange(n), block_k)
+            cand_queries.append(query_idx)
+            cand_positions.append(positions + start)
+            cand_sims.append(block_sims[query_idx, positions])
+        query_idx = np.concatenate(cand_queries)
+        positions = np.concatenate(cand_positions)
+        sims = np.concatenate(cand_sims)
+
+        # 按(查询, 相似度降序)排序后，每个查询取前k个候选
+        order = np.lexsort((-sims, query_idx))
+        query_idx, positions, sims = query_idx[order], positions[order], sims[order]
+        rank = np.arange(len(query_idx)) - np.searchsorted(query_idx, query_idx, side="left")
+        keep = rank < k
+        similarities = np.full((n, k), -np.inf, dtype=np.float32)
+        rows = np.full((n, k), -1, dtype=np.int64)
+        similarities[query_idx[keep], rank[keep]] = sims[keep]
+        rows[query_idx[keep], rank[keep]] = positions[keep] if id_map is None else id_map[positions[keep]]
+        return similarities, rows
+
 
 class EmbeddingManager:
     def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE):
@@ -571,12 +817,20 @@ class EmbeddingManager:
         self.relation_embedding_store.batch_insert_strs([str(triple) for triple in graph_triples], times=3)
 
     def load_from_file(self):
-        """从文件加载"""
-        self.paragraphs_embedding_store.load_from_file()
-        self.entities_embedding_store.load_from_file()
-        self.relation_embedding_store.load_from_file()
+        """从文件加载
+
+        各嵌入库分别加载：导入中断时可能只有部分嵌入库已落盘，已存在的仍需加载以便续传
+        """
+        errors = []
+        for store in (self.paragraphs_embedding_store, self.entities_embedding_store, self.relation_embedding_store):
+            try:
+                store.load_from_file()
+            except Exception as e:
+                errors.append(str(e))
         # 从段落库中获取已存储的hash
         self.stored_pg_hashes = set(self.paragraphs_embedding_store.store.keys())
+        if errors:
+            raise Exception("；".join(errors))
 
     def store_new_data_set(
         self,
@@ -598,7 +852,13 @@ class EmbeddingManager:
         self.relation_embedding_store.save_to_file()
 
     def rebuild_faiss_index(self):
-        """重建Faiss索引（请在添加新数据后调用）"""
+        """全量重建Faiss索引"""
         self.paragraphs_embedding_store.build_faiss_index()
         self.entities_embedding_store.build_faiss_index()
         self.relation_embedding_store.build_faiss_index()
+
+    def update_faiss_index(self):
+        """增量更新Faiss索引（请在添加新数据后调用）"""
+        self.paragraphs_embedding_store.update_faiss_index()
+        self.entities_embedding_store.update_faiss_index()
+        self.relation_embedding_store.update_faiss_index()
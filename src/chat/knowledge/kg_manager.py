@@ -1,7 +1,7 @@
 import json
 import os
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import pandas as pd
@@ -15,15 +15,18 @@ from rich.progress import (
     SpinnerColumn,
     TextColumn,
 )
-from quick_algo import di_graph, pagerank
+from quick_algo import di_graph
 
 
 from .utils.hash import get_sha256
-from .embedding_store import EmbeddingManager, EmbeddingStoreItem
+from .embedding_store import EmbeddingManager
+from .ppr_engine import PPREngine
 from src.config.config import global_config
 
 from .global_logger import logger
 
+SYNONYM_SEARCH_BATCH_SIZE = 1024  # 同义词连接时每次批量检索的实体数
+
 
 def _get_kg_dir():
     """
@@ -51,6 +54,11 @@ class KGManager:
         self.ent_appear_cnt = {}
         # KG
         self.graph = di_graph.DiGraph()
+        # 图中节点与边的哈希索引（不保存，加载图时重建），避免每次判断是否存在时都获取并遍历全部节点/边列表
+        self.node_index: Set[str] = set()
+        self.edge_index: Set[Tuple[str, str]] = set()
+        # 个性化PageRank引擎（含稀疏转移矩阵与结果缓存），首次检索时构建，图更新后丢弃
+        self._ppr_engine: Optional[PPREngine] = None
 
         # 持久化相关 - 使用延迟初始化的路径
         self.dir_path = get_kg_dir_str()
@@ -97,6 +105,13 @@ class KGManager:
 
         # 加载KG
         self.graph = di_graph.load_from_file(self.graph_data_path)
+        self._rebuild_index()
+        self._ppr_engine = None
+
+    def _rebuild_index(self):
+        """根据当前图重建节点与边的索引"""
+        self.node_index = set(self.graph.get_node_list())
+        self.edge_index = set(self.graph.get_edge_list())
 
     def _build_edges_between_ent(
         self,
@@ -140,21 +155,29 @@ class KGManager:
         triple_list_data: Dict[str, List[List[str]]],
         embedding_manager: EmbeddingManager,
     ) -> int:
-        """同义词连接"""
-        new_edge_cnt = 0
-        # 获取所有实体节点的hash值
-        ent_hash_list = set()
+        """同义词连接
+
+        实体按嵌入库行号分块，每块的嵌入矩阵通过一次Faiss检索得到各自最相似的实体，阈值筛选在NumPy中完成。
+        已被连接为其它实体同义词的实体不再发起连接。
+        """
+        entity_store = embedding_manager.entities_embedding_store
+        threshold = global_config.lpmm_knowledge.rag_synonym_threshold
+        top_k = global_config.lpmm_knowledge.rag_synonym_search_top_k
+
+        # 获取所有实体节点在嵌入库中的行号（没有嵌入的实体跳过）
+        ent_rows = set()
         for triple_list in triple_list_data.values():
             for triple in triple_list:
-                ent_hash_list.add("entity" + "-" + get_sha256(triple[0]))
-                ent_hash_list.add("entity" + "-" + get_sha256(triple[2]))
-        ent_hash_list = list(ent_hash_list)
+                for ent in (triple[0], triple[2]):
+                    row = entity_store.store.hash2row.get("entity" + "-" + get_sha256(ent))
+                    if row is not None:
+                        ent_rows.add(row)
+        ent_rows = np.array(sorted(ent_rows), dtype=np.int64)
 
+        new_edge_cnt = 0
         synonym_hash_set = set()
-        synonym_result = {}
 
         # rich 进度条
-        total = len(ent_hash_list)
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -167,45 +190,73 @@ class KGManager:
             TimeRemainingColumn(),
             transient=False,
         ) as progress:
-            task = progress.add_task("同义词连接", total=total)
-            for ent_hash in ent_hash_list:
-                if ent_hash in synonym_hash_set:
-                    progress.update(task, advance=1)
+            task = progress.add_task("同义词连接", total=len(ent_rows))
+            for start in range(0, len(ent_rows), SYNONYM_SEARCH_BATCH_SIZE):
+                rows = ent_rows[start : start + SYNONYM_SEARCH_BATCH_SIZE]
+                progress.update(task, advance=len(rows))
+                # 已被前面的实体连接为同义词的实体无需再查询
+                rows = rows[[entity_store.store.hash_at(row) not in synonym_hash_set for row in rows.tolist()]]
+                if len(rows) == 0:
                     continue
-                ent = embedding_manager.entities_embedding_store.store.get(ent_hash)
-                if ent is None:
-                    progress.update(task, advance=1)
-                    continue
-                assert isinstance(ent, EmbeddingStoreItem)
                 # 查询相似实体
-                similar_ents = embedding_manager.entities_embedding_store.search_top_k(
-                    ent.embedding, global_config.lpmm_knowledge.rag_synonym_search_top_k
+                similarities, neighbors = entity_store.search_top_k_batch(
+                    entity_store.store.take(rows), top_k, min_similarity=threshold
                 )
-                res_ent = []  # Debug
-                for res_ent_hash, similarity in similar_ents:
-                    if res_ent_hash == ent_hash:
-                        # 避免自连接
-                        continue
-                    if similarity < global_config.lpmm_knowledge.rag_synonym_threshold:
-                        # 相似度阈值
+                # 排除自身（避免自连接）、低于相似度阈值或候选不足的结果（-1）
+                mask = (neighbors >= 0) & (neighbors != rows[:, None])
+                for i in np.flatnonzero(mask.any(axis=1)).tolist():
+                    ent_hash = entity_store.store.hash_at(int(rows[i]))
+                    if ent_hash in synonym_hash_set:
                         continue
-                    node_to_node[(res_ent_hash, ent_hash)] = similarity
-                    node_to_node[(ent_hash, res_ent_hash)] = similarity
-                    synonym_hash_set.add(res_ent_hash)
-                    new_edge_cnt += 1
-                    res_ent.append(
-                        (
-                            embedding_manager.entities_embedding_store.store[res_ent_hash].str,
-                            similarity,
-                        )
-                    )  # Debug
-                    synonym_result[ent.str] = res_ent
-                progress.update(task, advance=1)
-
-        for k, v in synonym_result.items():
-            print(f'"{k}"的相似实体为：{v}')
+                    res_ent_hashes = [entity_store.store.hash_at(row) for row in neighbors[i][mask[i]].tolist()]
+                    res_similarities = similarities[i][mask[i]].tolist()
+                    for res_ent_hash, similarity in zip(res_ent_hashes, res_similarities, strict=True):
+                        node_to_node[(res_ent_hash, ent_hash)] = similarity
+                        node_to_node[(ent_hash, res_ent_hash)] = similarity
+                    synonym_hash_set.update(res_ent_hashes)
+                    new_edge_cnt += len(res_ent_hashes)
+                    logger.debug(
+                        f'"{entity_store.store.get_str(ent_hash)}"的相似实体为：'
+                        f"{[(entity_store.store.get_str(h), s) for h, s in zip(res_ent_hashes, res_similarities, strict=True)]}"
+                    )
+
+        logger.info(f"同义词连接完成，共建立{new_edge_cnt}组同义关系")
         return new_edge_cnt
 
+    def _upsert_edges(self, node_to_node: Dict[Tuple[str, str], float], now_time: float) -> List[str]:
+        """批量写入边：新边添加到图中，已存在的边累加权重
+
+        Returns:
+            List[str]: 本次新增的节点（按首次出现的顺序）
+        """
+        new_nodes: Dict[str, None] = {}
+        for src_tgt, weight in node_to_node.items():
+            if src_tgt in self.edge_index:
+                # 已存在的边
+                edge_item = self.graph[src_tgt[0], src_tgt[1]]
+                edge_item["weight"] += weight
+                edge_item["update_time"] = now_time
+                self.graph.update_edge(edge_item)
+                continue
+            # 新边
+            for node_hash in src_tgt:
+                if node_hash not in self.node_index:
+                    new_nodes[node_hash] = None
+                    self.node_index.add(node_hash)
+            self.graph.add_edge(
+                di_graph.DiEdge(
+                    src_tgt[0],
+                    src_tgt[1],
+                    {
+                        "weight": weight,
+                        "create_time": now_time,
+                        "update_time": now_time,
+                    },
+                )
+            )
+            self.edge_index.add(src_tgt)
+        return list(new_nodes)
+
     def _update_graph(
         self,
         node_to_node: Dict[Tuple[str, str], float],
@@ -219,64 +270,37 @@ class KGManager:
             - 若是已存在的边，则更新边的权重
         2. 更新新节点的属性
         """
-        existed_nodes = self.graph.get_node_list()
-        existed_edges = [str((edge[0], edge[1])) for edge in self.graph.get_edge_list()]
-
         now_time = time.time()
 
         # 更新图结构
-        for src_tgt, weight in node_to_node.items():
-            key = str(src_tgt)
-            # 检查边是否已存在
-            if key not in existed_edges:
-                # 新边
-                self.graph.add_edge(
-                    di_graph.DiEdge(
-                        src_tgt[0],
-                        src_tgt[1],
-                        {
-                            "weight": weight,
-                            "create_time": now_time,
-                            "update_time": now_time,
-                        },
-                    )
-                )
-            else:
-                # 已存在的边
-                edge_item = self.graph[src_tgt[0], src_tgt[1]]
-                edge_item["weight"] += weight
-                edge_item["update_time"] = now_time
-                self.graph.update_edge(edge_item)
+        new_nodes = self._upsert_edges(node_to_node, now_time)
+        self._ppr_engine = None
 
         # 更新新节点属性
-        for src_tgt in node_to_node.keys():
-            for node_hash in src_tgt:
-                if node_hash not in existed_nodes:
-                    if node_hash.startswith("entity"):
-                        # 新增实体节点
-                        node = embedding_manager.entities_embedding_store.store.get(node_hash)
-                        if node is None:
-                            logger.warning(f"实体节点 {node_hash} 在嵌入库中不存在，跳过")
-                            continue
-                        assert isinstance(node, EmbeddingStoreItem)
-                        node_item = self.graph[node_hash]
-                        node_item["content"] = node.str
-                        node_item["type"] = "ent"
-                        node_item["create_time"] = now_time
-                        self.graph.update_node(node_item)
-                    elif node_hash.startswith("paragraph"):
-                        # 新增文段节点
-                        node = embedding_manager.paragraphs_embedding_store.store.get(node_hash)
-                        if node is None:
-                            logger.warning(f"段落节点 {node_hash} 在嵌入库中不存在，跳过")
-                            continue
-                        assert isinstance(node, EmbeddingStoreItem)
-                        content = node.str.replace("\n", " ")
-                        node_item = self.graph[node_hash]
-                        node_item["content"] = content if len(content) < 8 else content[:8] + "..."
-                        node_item["type"] = "pg"
-                        node_item["create_time"] = now_time
-                        self.graph.update_node(node_item)
+        for node_hash in new_nodes:
+            if node_hash.startswith("entity"):
+                # 新增实体节点
+                node_str = embedding_manager.entities_embedding_store.store.get_str(node_hash)
+                if node_str is None:
+                    logger.warning(f"实体节点 {node_hash} 在嵌入库中不存在，跳过")
+                    continue
+                node_item = self.graph[node_hash]
+                node_item["content"] = node_str
+                node_item["type"] = "ent"
+                node_item["create_time"] = now_time
+                self.graph.update_node(node_item)
+            elif node_hash.startswith("paragraph"):
+                # 新增文段节点
+                node_str = embedding_manager.paragraphs_embedding_store.store.get_str(node_hash)
+                if node_str is None:
+                    logger.warning(f"段落节点 {node_hash} 在嵌入库中不存在，跳过")
+                    continue
+                content = node_str.replace("\n", " ")
+                node_item = self.graph[node_hash]
+                node_item["content"] = content if len(content) < 8 else content[:8] + "..."
+                node_item["type"] = "pg"
+                node_item["create_time"] = now_time
+                self.graph.update_node(node_item)
 
     def build_kg(
         self,
@@ -328,9 +352,6 @@ class KGManager:
             paragraph_search_result: ParagraphEmbedding的搜索结果（paragraph_hash, similarity）
             embed_manager: EmbeddingManager对象
         """
-        # 图中存在的节点总集
-        existed_nodes = self.graph.get_node_list()
-
         # 准备PPR使用的数据
         # 节点权重：实体
         ent_weights = {}
@@ -343,13 +364,13 @@ class KGManager:
         ent_sim_scores = {}
         for relation_hash, similarity, _ in relation_search_result:
             # 提取主宾短语
-            relation = embed_manager.relation_embedding_store.store.get(relation_hash).str
+            relation = embed_manager.relation_embedding_store.store.get_str(relation_hash)
             assert relation is not None  # 断言：relation不为空
             # 关系三元组
             triple = relation[2:-2].split("', '")
             for ent in [(triple[0]), (triple[2])]:
                 ent_hash = "entity" + "-" + get_sha256(ent)
-                if ent_hash in existed_nodes:  # 该实体需在KG中存在
+                if ent_hash in self.node_index:  # 该实体需在KG中存在
                     if ent_hash not in ent_sim_scores:  # 尚未记录的实体
                         ent_sim_scores[ent_hash] = []
                     ent_sim_scores[ent_hash].append(similarity)
@@ -416,23 +437,11 @@ class KGManager:
         del ent_weights, pg_weights
 
         # PersonalizedPageRank
-        ppr_res = pagerank.run_pagerank(
-            self.graph,
-            personalization=ppr_node_weights,
-            max_iter=100,
-            alpha=global_config.lpmm_knowledge.qa_ppr_damping,
+        if self._ppr_engine is None:
+            self._ppr_engine = PPREngine(self.graph)
+        # 结果只包含文段节点，按照分数从大到小排序
+        passage_node_res = self._ppr_engine.rank_paragraphs(
+            ppr_node_weights, alpha=global_config.lpmm_knowledge.qa_ppr_damping
         )
 
-        # 获取最终结果
-        # 从搜索结果中提取文段节点的结果
-        passage_node_res = [
-            (node_key, score)
-            for node_key, score in ppr_res.items()
-            if node_key.startswith("paragraph")
-        ]
-        del ppr_res
-
-        # 排序：按照分数从大到小
-        passage_node_res = sorted(passage_node_res, key=lambda item: item[1], reverse=True)
-
         return passage_node_res, ppr_node_weights
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from quick_algo import di_graph
+
+from .global_logger import logger
+
+PPR_MAX_ITER = 100  # 最大迭代次数
+PPR_TOL = 1e-6  # 收敛阈值：两次迭代结果的L1差小于该值时提前结束（quick_algo 按 节点数*tol 判断，大图上会过早停止）
+PPR_CACHE_SIZE = 256  # 结果缓存的最大条数
+PPR_WEIGHT_PRECISION = 6  # 个性化向量量化保留的小数位数（归一化后），量化后相同的查询共用缓存结果
+
+
+class PPREngine:
+    """KG上的个性化PageRank引擎
+
+    - 在构建时把图转换为稀疏转移矩阵（CSR，按边的weight归一化），查询时只做稀疏矩阵乘向量
+    - 以全局PageRank向量作为迭代初值（热启动），残差低于阈值时提前结束
+    - 个性化向量量化后作为缓存键，相同的查询直接返回缓存结果
+    - 段落节点在构建时预先索引，结果筛选无需逐个比较节点名前缀
+
+    引擎不感知图的变化，由 KGManager 在图更新后丢弃重建。
+    迭代公式与 quick_algo.pagerank.run_pagerank 相同（悬挂节点的出度按个性化向量分配），但收敛阈值不随节点数放大。
+    """
+
+    def __init__(self, graph: di_graph.DiGraph):
+        self.nodes: List[str] = graph.get_node_list()
+        self.node_index: Dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        node_count = len(self.nodes)
+
+        edges = graph.get_edge_list()
+        src = np.fromiter((self.node_index[edge[0]] for edge in edges), dtype=np.int64, count=len(edges))
+        dst = np.fromiter((self.node_index[edge[1]] for edge in edges), dtype=np.int64, count=len(edges))
+        weight = np.fromiter((graph[edge]["weight"] for edge in edges), dtype=np.float64, count=len(edges))
+
+        out_weight = np.bincount(src, weights=weight, minlength=node_count)
+        dangling = out_weight == 0
+        self.dangling_indices = np.flatnonzero(dangling)
+        """没有出边的节点（如段落节点）"""
+        inv_out_weight = np.divide(1.0, out_weight, out=np.zeros(node_count), where=~dangling)
+        # 转移矩阵的转置：transition_t[dst, src] = weight / src的出边权重和
+        self.transition_t = sp.csr_matrix((weight * inv_out_weight[src], (dst, src)), shape=(node_count, node_count))
+
+        # 段落节点的下标
+        self.paragraph_indices = np.array(
+            [i for i, node in enumerate(self.nodes) if node.startswith("paragraph")], dtype=np.int64
+        )
+
+        self._global_rank: Dict[float, np.ndarray] = {}
+        """阻尼系数 -> 全局PageRank向量（热启动初值）"""
+        self._cache: OrderedDict[tuple, List[Tuple[str, float]]] = OrderedDict()
+        self.hits = 0
+        """缓存命中次数"""
+        self.misses = 0
+        """缓存未命中（实际计算）次数"""
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    def _power_iterate(self, personalization: np.ndarray, init: np.ndarray, alpha: float) -> Tuple[np.ndarray, int]:
+        """幂迭代：x = alpha * (P^T x + 悬挂节点得分 * p) + (1 - alpha) * p"""
+        x = init
+        for iteration in range(1, PPR_MAX_ITER + 1):
+            x_last = x
+            x = alpha * (self.transition_t @ x_last + x_last[self.dangling_indices].sum() * personalization)
+            x += (1 - alpha) * personalization
+            if np.abs(x - x_last).sum() < PPR_TOL:
+                return x, iteration
+        logger.warning(f"PageRank迭代{PPR_MAX_ITER}次后仍未收敛")
+        return x, PPR_MAX_ITER
+
+    def _get_global_rank(self, alpha: float) -> np.ndarray:
+        if alpha not in self._global_rank:
+            uniform = np.full(self.node_count, 1.0 / self.node_count)
+            self._global_rank[alpha], _ = self._power_iterate(uniform, uniform, alpha)
+        return self._global_rank[alpha]
+
+    def _quantize(self, personalization: Dict[str, float]) -> Optional[Tuple[Tuple[int, float], ...]]:
+        """把个性化向量归一化并量化为缓存键 ((节点下标, 权重), ...)，图中不存在的节点被忽略"""
+        items = [(self.node_index[node], weight) for node, weight in personalization.items() if node in self.node_index]
+        total = sum(weight for _, weight in items)
+        if total <= 0:
+            return None
+        quantized = tuple(
+            sorted((idx, q) for idx, weight in items if (q := round(weight / total, PPR_WEIGHT_PRECISION)) > 0)
+        )
+        return quantized or None
+
+    def rank_paragraphs(self, personalization: Dict[str, float], alpha: float) -> List[Tuple[str, float]]:
+        """
+        运行个性化PageRank，返回段落节点的得分
+        Args:
+            personalization: 节点 -> 个性化权重
+            alpha: 阻尼系数
+        Returns:
+            List[Tuple[段落节点, 得分]]: 按得分降序排列
+        """
+        key = self._quantize(personalization)
+        if key is None or self.node_count == 0:
+            logger.warning("个性化PageRank的节点均不在KG中，返回空结果")
+            return []
+        cache_key = (alpha, key)
+        if (cached := self._cache.get(cache_key)) is not None:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+            return list(cached)
+
+        self.misses += 1
+        p = np.zeros(self.node_count)
+        indices, weights = zip(*key, strict=True)
+        p[list(indices)] = weights
+        p /= p.sum()
+        scores, iterations = self._power_iterate(p, self._get_global_rank(alpha), alpha)
+        logger.debug(f"个性化PageRank迭代{iterations}次收敛")
+
+        paragraph_scores = scores[self.paragraph_indices]
+        order = np.argsort(-paragraph_scores, kind="stable")
+        result = [
+            (self.nodes[idx], score)
+            for idx, score in zip(self.paragraph_indices[order].tolist(), paragraph_scores[order].tolist(), strict=True)
+        ]
+
+        self._cache[cache_key] = result
+        while len(self._cache) > PPR_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return list(result)
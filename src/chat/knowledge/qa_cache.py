@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+QUESTION_EMBEDDING_CACHE_SIZE = 1024  # 问题嵌入向量缓存条数（嵌入结果不会过期，仅按LRU淘汰）
+
+
+class _ResultEntry:
+    __slots__ = ("vector", "result", "created_at")
+
+    def __init__(self, vector: np.ndarray, result: Any, created_at: float):
+        self.vector = vector
+        self.result = result
+        self.created_at = created_at
+
+
+class QACache:
+    """
+    知识库问答的两级缓存
+
+    - 问题嵌入缓存：以问题原文为键的LRU，相同的问题不再请求嵌入模型
+    - 检索结果缓存：以问题嵌入为键的语义缓存，与已缓存问题的余弦相似度不低于阈值时直接复用其检索结果，
+      条目超过存活时间或数量上限时淘汰
+
+    回复时同一聊天中往往在短时间内多次查询相同或相近的问题，两级缓存可以跳过嵌入请求、向量检索与PageRank。
+    知识库只在启动时加载一次（导入知识在单独的进程中进行，重启后才生效），进程内不会变化，缓存无需失效。
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 600.0, similarity_threshold: float = 0.95):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._embeddings: OrderedDict[str, List[float]] = OrderedDict()
+        self._results: List[_ResultEntry] = []
+        """按最近使用时间排序，最旧的在前"""
+        self._lock = threading.Lock()
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_embedding(self, question: str) -> Optional[List[float]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if (embedding := self._embeddings.get(question)) is not None:
+                self._embeddings.move_to_end(question)
+                self.embedding_hits += 1
+                return embedding
+            self.embedding_misses += 1
+            return None
+
+    def put_embedding(self, question: str, embedding: List[float]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._embeddings[question] = embedding
+            self._embeddings.move_to_end(question)
+            while len(self._embeddings) > QUESTION_EMBEDDING_CACHE_SIZE:
+                self._embeddings.popitem(last=False)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _evict_expired(self, now: float) -> None:
+        if self.ttl > 0:
+            self._results = [entry for entry in self._results if now - entry.created_at < self.ttl]
+
+    def get_result(self, embedding: List[float]) -> Optional[Any]:
+        """查找与给定问题嵌入足够相似的已缓存检索结果，未命中时返回None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._evict_expired(time.time())
+            if self._results:
+                similarities = np.stack([entry.vector for entry in self._results]) @ self._normalize(embedding)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry = self._results.pop(best)
+                    self._results.append(entry)
+                    self.result_hits += 1
+                    return entry.result
+            self.result_misses += 1
+            return None
+
+    def put_result(self, embedding: List[float], result: Any) -> None:
+        """缓存检索结果（调用方不应再修改result）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._results.append(_ResultEntry(self._normalize(embedding), result, time.time()))
+            if len(self._results) > self.max_size:
+                del self._results[: len(self._results) - self.max_size]
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取缓存命中统计
+        Returns:
+            dict: 两级缓存各自的命中数、未命中数、命中率与当前条数
+        """
+        with self._lock:
+            embedding_total = self.embedding_hits + self.embedding_misses
+            result_total = self.result_hits + self.result_misses
+            return {
+                "embedding_hits": self.embedding_hits,
+                "embedding_misses": self.embedding_misses,
+                "embedding_hit_rate": self.embedding_hits / embedding_total if embedding_total else 0.0,
+                "embedding_size": len(self._embeddings),
+                "result_hits": self.result_hits,
+                "result_misses": self.result_misses,
+                "result_hit_rate": self.result_hits / result_total if result_total else 0.0,
+                "result_size": len(self._results),
+            }
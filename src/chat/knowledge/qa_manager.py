@@ -4,6 +4,7 @@ from typing import Tuple, List, Dict, Optional
 from .global_logger import logger
 from .embedding_store import EmbeddingManager
 from .kg_manager import KGManager
+from .qa_cache import QACache
 
 # from .lpmmconfig import global_config
 from .utils.dyn_topk import dyn_select_top_k
@@ -23,6 +24,11 @@ class QAManager:
         self.embed_manager = embed_manager
         self.kg_manager = kg_manager
         self.qa_model = LLMRequest(model_set=model_config.model_task_config.lpmm_qa, request_type="lpmm.qa")
+        self.cache = QACache(
+            max_size=global_config.lpmm_knowledge.qa_cache_size,
+            ttl=global_config.lpmm_knowledge.qa_cache_ttl,
+            similarity_threshold=global_config.lpmm_knowledge.qa_cache_similarity_threshold,
+        )
 
     async def process_query(
         self, question: str
@@ -31,13 +37,22 @@ class QAManager:
 
         # 生成问题的Embedding
         part_start_time = time.perf_counter()
-        question_embedding = await get_embedding(question)
+        question_embedding = self.cache.get_embedding(question)
         if question_embedding is None:
-            logger.error("生成问题Embedding失败")
-            return None
+            question_embedding = await get_embedding(question)
+            if question_embedding is None:
+                logger.error("生成问题Embedding失败")
+                return None
+            self.cache.put_embedding(question, question_embedding)
         part_end_time = time.perf_counter()
         logger.debug(f"Embedding用时：{part_end_time - part_start_time:.5f}s")
 
+        # 相同或相近的问题直接复用近期的检索结果
+        if (cached := self.cache.get_result(question_embedding)) is not None:
+            result, ppr_node_weights = cached
+            logger.debug(f"命中知识库检索结果缓存，缓存统计：{self.cache.get_stats()}")
+            return list(result), (dict(ppr_node_weights) if ppr_node_weights is not None else None)
+
         # 根据问题Embedding查询Relation Embedding库
         part_start_time = time.perf_counter()
         relation_search_res = self.embed_manager.relation_embedding_store.search_top_k(
@@ -58,8 +73,7 @@ class QAManager:
         logger.debug(f"关系检索用时：{part_end_time - part_start_time:.5f}s")
 
         for res in relation_search_res:
-            if store_item := self.embed_manager.relation_embedding_store.store.get(res[0]):
-                rel_str = store_item.str
+            rel_str = self.embed_manager.relation_embedding_store.store.get_str(res[0])
             logger.info(f"找到相关关系，相似度：{(res[1] * 100):.2f}%  -  {rel_str}")
 
         # TODO: 使用LLM过滤三元组结果
@@ -93,9 +107,10 @@ class QAManager:
         result = dyn_select_top_k(result, 0.5, 1.0)
 
         for res in result:
-            raw_paragraph = self.embed_manager.paragraphs_embedding_store.store[res[0]].str
+            raw_paragraph = self.embed_manager.paragraphs_embedding_store.store.get_str(res[0])
             logger.info(f"找到相关文段，相关系数：{res[1]:.8f}\n{raw_paragraph}\n\n")
 
+        self.cache.put_result(question_embedding, (list(result), ppr_node_weights))
         return result, ppr_node_weights
 
     async def get_knowledge(self, question: str) -> Optional[str]:
@@ -111,7 +126,7 @@ class QAManager:
 
             knowledge = [
                 (
-                    self.embed_manager.paragraphs_embedding_store.store[res[0]].str,
+                    self.embed_manager.paragraphs_embedding_store.store.get_str(res[0]),
                     res[1],
                 )
                 for res in query_res
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import datetime
 import math
 import random
@@ -7,7 +8,7 @@ import re
 import jieba
 import networkx as nx
 import numpy as np
-from typing import List, Tuple, Set, Coroutine, Any, Dict
+from typing import List, Tuple, Set, Dict, Optional
 from collections import Counter
 import traceback
 
@@ -18,6 +19,9 @@ from src.config.config import global_config, model_config
 from src.common.data_models.database_data_model import DatabaseMessages
 from src.common.database.database_model import GraphNodes, GraphEdges  # Peewee Models导入
 from src.common.logger import get_logger
+from src.chat.memory_system.graph_snapshot import GraphSnapshot
+from src.chat.memory_system.topic_index import TopicTokenIndex
+from src.chat.memory_system.keyword_extractor import KeywordCache, LocalKeywordExtractor
 from src.chat.utils.chat_message_builder import (
     build_readable_messages,
     get_raw_msg_by_timestamp_with_chat_inclusive,
@@ -52,10 +56,121 @@ def calculate_information_content(text):
 
 logger = get_logger("memory")
 
+SNAPSHOT_OVERLAY_MIN_REBUILD = 1024  # 快照覆盖层中的边数超过该值且超过图中边数的1/10时整体重建快照
+
 
 class MemoryGraph:
     def __init__(self):
         self.G = nx.Graph()  # 使用 networkx 的图结构
+        self._snapshot: Optional[GraphSnapshot] = None  # 扩散激活用的CSR快照，随图的变化增量修改
+        self.topic_index = TopicTokenIndex()  # 主题分词倒排索引，用于查找相似主题，增删节点时同步维护
+        # 自上次同步数据库以来发生变化的节点和边，边以排序后的端点元组为键
+        self.dirty_nodes: Set[str] = set()
+        self.dirty_edges: Set[Tuple[str, str]] = set()
+
+    @staticmethod
+    def edge_key(concept1, concept2) -> Tuple[str, str]:
+        """无向边的规范键"""
+        return (concept1, concept2) if concept1 <= concept2 else (concept2, concept1)
+
+    def mark_node_dirty(self, concept):
+        self.dirty_nodes.add(concept)
+
+    def mark_edge_dirty(self, concept1, concept2):
+        self.dirty_edges.add(self.edge_key(concept1, concept2))
+
+    def take_dirty(self) -> Tuple[Set[str], Set[Tuple[str, str]]]:
+        """取出并清空脏节点和脏边集合"""
+        dirty_nodes, dirty_edges = self.dirty_nodes, self.dirty_edges
+        self.dirty_nodes, self.dirty_edges = set(), set()
+        return dirty_nodes, dirty_edges
+
+    def clear_dirty(self):
+        self.dirty_nodes.clear()
+        self.dirty_edges.clear()
+
+    @property
+    def snapshot(self) -> GraphSnapshot:
+        """获取当前图的CSR快照，必要时重建"""
+        if self._snapshot is None:
+            self._snapshot = GraphSnapshot.from_graph(self.G)
+        return self._snapshot
+
+    def invalidate_snapshot(self):
+        """绕过 MemoryGraph 的方法直接修改 self.G 后调用（如批量加载），下次扩散激活时重建快照"""
+        self._snapshot = None
+
+    def _patch_snapshot(self, method: str, *args):
+        """把图的变化同步到快照；覆盖层过大时丢弃快照，下次扩散激活时整体重建"""
+        if self._snapshot is None:
+            return
+        getattr(self._snapshot, method)(*args)
+        if self._snapshot.overlay_size > max(SNAPSHOT_OVERLAY_MIN_REBUILD, self.G.number_of_edges() // 10):
+            self._snapshot = None
+
+    def _on_strength_changed(self, concept1, concept2, strength):
+        if self._snapshot is not None and not self._snapshot.update_strength(concept1, concept2, strength):
+            self._snapshot = None
+
+    def spread_activation(
+        self, seeds: List[str], max_depth: int, seed_activation: float = 1.0, initial_activation: float = 1.0
+    ) -> Dict[str, float]:
+        """从多个关键词出发做扩散激活，返回 节点 -> 累计激活值"""
+        return self.snapshot.spread_activation(seeds, max_depth, seed_activation, initial_activation)
+
+    def find_similar_topics(self, topic, threshold: float = 0.7, top_k: Optional[int] = 3) -> List[Tuple[str, float]]:
+        """查找与给定主题分词后余弦相似度不低于阈值的已有主题，按相似度降序"""
+        if not self.topic_index.built:
+            self.topic_index.build(self.G.nodes())
+        return self.topic_index.find_similar(topic, threshold, top_k)
+
+    def add_node(self, concept, **attrs):
+        """添加或更新一个节点（不标记脏数据，由调用方决定）"""
+        self.G.add_node(concept, **attrs)
+        self.topic_index.add(concept)
+        self._patch_snapshot("add_node", concept)
+
+    def add_edge(self, concept1, concept2, **attrs):
+        """添加或覆盖一条边"""
+        existed = self.G.has_edge(concept1, concept2)
+        self.G.add_edge(concept1, concept2, **attrs)
+        if not existed:
+            # networkx 会自动创建不存在的端点
+            self.topic_index.add(concept1)
+            self.topic_index.add(concept2)
+        self.mark_edge_dirty(concept1, concept2)
+        if existed:
+            self._on_strength_changed(concept1, concept2, self.G[concept1][concept2].get("strength", 1))
+        else:
+            self._patch_snapshot("add_edge", concept1, concept2, self.G[concept1][concept2].get("strength", 1))
+
+    def set_edge_strength(self, concept1, concept2, strength, last_modified):
+        """修改已存在边的强度"""
+        edge_data = self.G[concept1][concept2]
+        edge_data["strength"] = strength
+        edge_data["last_modified"] = last_modified
+        self.mark_edge_dirty(concept1, concept2)
+        self._on_strength_changed(concept1, concept2, strength)
+
+    def remove_edge(self, concept1, concept2):
+        self.G.remove_edge(concept1, concept2)
+        self.mark_edge_dirty(concept1, concept2)
+        self._patch_snapshot("remove_edge", concept1, concept2)
+
+    def remove_node(self, concept):
+        # 节点删除会连带删除所有相连的边
+        for neighbor in self.G.neighbors(concept):
+            self.mark_edge_dirty(concept, neighbor)
+        self.G.remove_node(concept)
+        self.topic_index.remove(concept)
+        self.mark_node_dirty(concept)
+        self._patch_snapshot("remove_node", concept)
+
+    def clear(self):
+        self.G.clear()
+        self.topic_index.clear()
+        self.clear_dirty()
+        self.invalidate_snapshot()
 
     def connect_dot(self, concept1, concept2):
         # 避免自连接
@@ -66,12 +181,11 @@ class MemoryGraph:
 
         # 如果边已存在,增加 strength
         if self.G.has_edge(concept1, concept2):
-            self.G[concept1][concept2]["strength"] = self.G[concept1][concept2].get("strength", 1) + 1
-            # 更新最后修改时间
-            self.G[concept1][concept2]["last_modified"] = current_time
+            # 同时更新最后修改时间
+            self.set_edge_strength(concept1, concept2, self.G[concept1][concept2].get("strength", 1) + 1, current_time)
         else:
             # 如果是新边,初始化 strength 为 1
-            self.G.add_edge(
+            self.add_edge(
                 concept1,
                 concept2,
                 strength=1,
@@ -90,8 +204,12 @@ class MemoryGraph:
                 # 如果现有记忆不为空，则使用LLM整合新旧记忆
                 if existing_memory and hippocampus_instance and hippocampus_instance.model_small:
                     try:
-                        integrated_memory = await self._integrate_memories_with_llm(
-                            existing_memory, str(memory), hippocampus_instance.model_small
+                        # 超时抛出的 TimeoutError 同样降级到简单连接
+                        integrated_memory = await asyncio.wait_for(
+                            self._integrate_memories_with_llm(
+                                existing_memory, str(memory), hippocampus_instance.model_small
+                            ),
+                            timeout=global_config.memory.memory_build_timeout or None,
                         )
                         self.G.nodes[concept]["memory_items"] = integrated_memory
                         # 整合成功，增加权重
@@ -113,15 +231,17 @@ class MemoryGraph:
                     self.G.nodes[concept]["created_time"] = current_time
             # 更新最后修改时间
             self.G.nodes[concept]["last_modified"] = current_time
+            self.mark_node_dirty(concept)
         else:
             # 如果是新节点,创建新的记忆字符串
-            self.G.add_node(
+            self.add_node(
                 concept,
                 memory_items=str(memory),
                 weight=1.0,  # 新节点初始权重为1.0
                 created_time=current_time,  # 添加创建时间
                 last_modified=current_time,
             )  # 添加最后修改时间
+            self.mark_node_dirty(concept)
 
     def get_dot(self, concept):
         # 检查节点是否存在于图中
@@ -221,7 +341,7 @@ class MemoryGraph:
         node_data = self.G.nodes[topic]
 
         # 删除整个节点
-        self.G.remove_node(topic)
+        self.remove_node(topic)
         # 如果节点存在memory_items
         if "memory_items" in node_data:
             if memory_items := node_data["memory_items"]:
@@ -240,6 +360,8 @@ class Hippocampus:
         self.model_small: LLMRequest = None  # type: ignore
         self.entorhinal_cortex: EntorhinalCortex = None  # type: ignore
         self.parahippocampal_gyrus: ParahippocampalGyrus = None  # type: ignore
+        self.keyword_extractor = LocalKeywordExtractor(global_config.memory.keyword_extraction_algorithm)
+        self.keyword_cache = KeywordCache(global_config.memory.keyword_cache_size)
 
     def initialize(self):
         # 初始化子组件
@@ -360,47 +482,36 @@ class Hippocampus:
         if not keyword:
             return []
 
-        # 获取所有节点
-        all_nodes = list(self.memory_graph.G.nodes())
         memories = []
 
-        # 计算关键词的词集合
-        keyword_words = set(jieba.cut(keyword))
-
-        # 遍历所有节点，计算相似度
-        for node in all_nodes:
-            node_words = set(jieba.cut(node))
-            all_words = keyword_words | node_words
-            v1 = [1 if word in keyword_words else 0 for word in all_words]
-            v2 = [1 if word in node_words else 0 for word in all_words]
-            similarity = cosine_similarity(v1, v2)
-
-            # 如果相似度超过阈值，获取该节点的记忆
-            if similarity >= 0.3:  # 可以调整这个阈值
-                node_data = self.memory_graph.G.nodes[node]
-                # 直接使用完整的记忆内容
-                if memory_items := node_data.get("memory_items", ""):
-                    memories.append((node, memory_items, similarity))
+        # 通过倒排索引找出与关键词分词后相似度超过阈值的节点（可以调整这个阈值）
+        for node, similarity in self.memory_graph.find_similar_topics(keyword, threshold=0.3, top_k=None):
+            node_data = self.memory_graph.G.nodes[node]
+            # 直接使用完整的记忆内容
+            if memory_items := node_data.get("memory_items", ""):
+                memories.append((node, memory_items, similarity))
 
         # 按相似度降序排序
         memories.sort(key=lambda x: x[2], reverse=True)
         return memories
 
-    async def get_keywords_from_text(self, text: str) -> Tuple[List[str], List]:
+    async def get_keywords_from_text(self, text: str, fast_retrieval: bool = False) -> Tuple[List[str], List]:
         """从文本中提取关键词。
 
         Args:
             text (str): 输入文本
             fast_retrieval (bool, optional): 是否使用快速检索。默认为False。
-                如果为True，使用jieba分词提取关键词，速度更快但可能不够准确。
+                如果为True，使用jieba的TF-IDF/TextRank结合记忆图词表在本地提取关键词，
+                置信度低于 memory.keyword_fallback_confidence 时回退到LLM。
                 如果为False，使用LLM提取关键词，速度较慢但更准确。
         """
         if not text:
             return [], []
 
-        # 使用LLM提取关键词 - 根据详细文本长度分布优化topic_num计算
-        text_length = len(text)
-        topic_num: int | list[int] = 0
+        # 快速模式与LLM模式的结果分开缓存
+        cache_key = f"{'fast' if fast_retrieval else 'llm'}:{text}"
+        if cached := self.keyword_cache.get(cache_key):
+            return cached
 
         words = jieba.cut(text)
         keywords_lite = [word for word in words if len(word) > 1]
@@ -408,6 +519,27 @@ class Hippocampus:
         if keywords_lite:
             logger.debug(f"提取关键词极简版: {keywords_lite}")
 
+        keywords: List[str] = []
+        if fast_retrieval:
+            keywords, confidence = self.keyword_extractor.extract(text, self.memory_graph.G)
+            if confidence < global_config.memory.keyword_fallback_confidence:
+                logger.debug(f"本地关键词提取置信度过低({confidence:.2f})，回退到LLM: {keywords}")
+                keywords = []
+            else:
+                logger.debug(f"本地提取关键词: {keywords} (置信度: {confidence:.2f})")
+
+        if not keywords:
+            keywords = await self._get_keywords_with_llm(text)
+
+        self.keyword_cache.put(cache_key, keywords, keywords_lite)
+        return keywords, keywords_lite
+
+    async def _get_keywords_with_llm(self, text: str) -> List[str]:
+        """使用LLM提取关键词"""
+        # 使用LLM提取关键词 - 根据详细文本长度分布优化topic_num计算
+        text_length = len(text)
+        topic_num: int | list[int] = 0
+
         if text_length <= 12:
             topic_num = [1, 3]  # 6-10字符: 1个关键词 (27.18%的文本)
         elif text_length <= 20:
@@ -435,7 +567,7 @@ class Hippocampus:
         if keywords:
             logger.debug(f"提取关键词: {keywords}")
 
-        return keywords, keywords_lite
+        return keywords
 
     async def get_memory_from_topic(
         self,
@@ -470,55 +602,9 @@ class Hippocampus:
 
         logger.debug(f"有效的关键词: {', '.join(valid_keywords)}")
 
-        # 从每个关键词获取记忆
-        activate_map = {}  # 存储每个词的累计激活值
-
-        # 对每个关键词进行扩散式检索
-        for keyword in valid_keywords:
-            logger.debug(f"开始以关键词 '{keyword}' 为中心进行扩散检索 (最大深度: {max_depth}):")
-            # 初始化激活值
-            activation_values = {keyword: 1.0}
-            # 记录已访问的节点
-            visited_nodes = {keyword}
-            # 待处理的节点队列，每个元素是(节点, 激活值, 当前深度)
-            nodes_to_process = [(keyword, 1.0, 0)]
-
-            while nodes_to_process:
-                current_node, current_activation, current_depth = nodes_to_process.pop(0)
-
-                # 如果激活值小于0或超过最大深度，停止扩散
-                if current_activation <= 0 or current_depth >= max_depth:
-                    continue
-
-                # 获取当前节点的所有邻居
-                neighbors = list(self.memory_graph.G.neighbors(current_node))
-
-                for neighbor in neighbors:
-                    if neighbor in visited_nodes:
-                        continue
-
-                    # 获取连接强度
-                    edge_data = self.memory_graph.G[current_node][neighbor]
-                    strength = edge_data.get("strength", 1)
-
-                    # 计算新的激活值
-                    new_activation = current_activation - (1 / strength)
-
-                    if new_activation > 0:
-                        activation_values[neighbor] = new_activation
-                        visited_nodes.add(neighbor)
-                        nodes_to_process.append((neighbor, new_activation, current_depth + 1))
-                        # logger.debug(
-                        # f"节点 '{neighbor}' 被激活，激活值: {new_activation:.2f} (通过 '{current_node}' 连接，强度: {strength}, 深度: {current_depth + 1})"
-                        # )  # noqa: E501
-
-            # 更新激活映射
-            for node, activation_value in activation_values.items():
-                if activation_value > 0:
-                    if node in activate_map:
-                        activate_map[node] += activation_value
-                    else:
-                        activate_map[node] = activation_value
+        # 对每个关键词进行扩散式检索，得到每个节点的累计激活值
+        logger.debug(f"开始以关键词 {valid_keywords} 为中心进行扩散检索 (最大深度: {max_depth})")
+        activate_map = self.memory_graph.spread_activation(valid_keywords, max_depth)
 
         # 基于激活值平方的独立概率选择
         remember_map = {}
@@ -606,7 +692,7 @@ class Hippocampus:
             float: 激活节点数与总节点数的比值
             list[str]: 有效的关键词
         """
-        keywords, keywords_lite = await self.get_keywords_from_text(text)
+        keywords, keywords_lite = await self.get_keywords_from_text(text, fast_retrieval)
 
         # 过滤掉不存在于记忆图中的关键词
         valid_keywords = [keyword for keyword in keywords if keyword in self.memory_graph.G]
@@ -616,54 +702,11 @@ class Hippocampus:
 
         logger.debug(f"有效的关键词: {', '.join(valid_keywords)}")
 
-        # 从每个关键词获取记忆
-        activate_map = {}  # 存储每个词的累计激活值
-
-        # 对每个关键词进行扩散式检索
-        for keyword in valid_keywords:
-            logger.debug(f"开始以关键词 '{keyword}' 为中心进行扩散检索 (最大深度: {max_depth}):")
-            # 初始化激活值
-            activation_values = {keyword: 1.5}
-            # 记录已访问的节点
-            visited_nodes = {keyword}
-            # 待处理的节点队列，每个元素是(节点, 激活值, 当前深度)
-            nodes_to_process = [(keyword, 1.0, 0)]
-
-            while nodes_to_process:
-                current_node, current_activation, current_depth = nodes_to_process.pop(0)
-
-                # 如果激活值小于0或超过最大深度，停止扩散
-                if current_activation <= 0 or current_depth >= max_depth:
-                    continue
-
-                # 获取当前节点的所有邻居
-                neighbors = list(self.memory_graph.G.neighbors(current_node))
-
-                for neighbor in neighbors:
-                    if neighbor in visited_nodes:
-                        continue
-
-                    # 获取连接强度
-                    edge_data = self.memory_graph.G[current_node][neighbor]
-                    strength = edge_data.get("strength", 1)
-
-                    # 计算新的激活值
-                    new_activation = current_activation - (1 / strength)
-
-                    if new_activation > 0:
-                        activation_values[neighbor] = new_activation
-                        visited_nodes.add(neighbor)
-                        nodes_to_process.append((neighbor, new_activation, current_depth + 1))
-                        # logger.debug(
-                        # f"节点 '{neighbor}' 被激活，激活值: {new_activation:.2f} (通过 '{current_node}' 连接，强度: {strength}, 深度: {current_depth + 1})")  # noqa: E501
-
-            # 更新激活映射
-            for node, activation_value in activation_values.items():
-                if activation_value > 0:
-                    if node in activate_map:
-                        activate_map[node] += activation_value
-                    else:
-                        activate_map[node] = activation_value
+        # 对每个关键词进行扩散式检索，种子节点自身计1.5，向外扩散时从1.0开始衰减
+        logger.debug(f"开始以关键词 {valid_keywords} 为中心进行扩散检索 (最大深度: {max_depth})")
+        activate_map = self.memory_graph.spread_activation(
+            valid_keywords, max_depth, seed_activation=1.5, initial_activation=1.0
+        )
 
         # 输出激活映射
         # logger.info("激活映射统计:")
@@ -689,163 +732,107 @@ class EntorhinalCortex:
         self.memory_graph = hippocampus.memory_graph
 
     async def sync_memory_to_db(self):
-        """将记忆图同步到数据库"""
+        """将记忆图同步到数据库
+
+        只处理自上次同步以来被修改过的节点和边（由 MemoryGraph 记录），
+        所有写入在一个事务内以批量 upsert / executemany 完成，耗时与变化量成正比而与图的规模无关。
+        """
         start_time = time.time()
         current_time = datetime.datetime.now().timestamp()
 
-        # 获取数据库中所有节点和内存中所有节点
-        db_nodes = {node.concept: node for node in GraphNodes.select()}
-        memory_nodes = list(self.memory_graph.G.nodes(data=True))
-
-        # 批量准备节点数据
-        nodes_to_create = []
-        nodes_to_update = []
-        nodes_to_delete = set()
-
-        # 处理节点
-        for concept, data in memory_nodes:
-            if not concept or not isinstance(concept, str):
-                self.memory_graph.G.remove_node(concept)
+        # 空节点不入库，直接从图中移除（会连带标记其相连的边）
+        for concept in list(self.memory_graph.dirty_nodes):
+            if concept not in self.memory_graph.G:
                 continue
+            memory_items = self.memory_graph.G.nodes[concept].get("memory_items", "")
+            if not concept or not isinstance(concept, str) or not memory_items or memory_items.strip() == "":
+                self.memory_graph.remove_node(concept)
 
-            memory_items = data.get("memory_items", "")
+        dirty_nodes, dirty_edges = self.memory_graph.take_dirty()
+        if not dirty_nodes and not dirty_edges:
+            logger.debug("[数据库] 记忆图没有变化，跳过同步")
+            return
 
-            # 直接检查字符串是否为空，不需要分割成列表
-            if not memory_items or memory_items.strip() == "":
-                self.memory_graph.G.remove_node(concept)
+        # 批量准备节点数据
+        nodes_to_upsert = []
+        nodes_to_delete = []
+        for concept in dirty_nodes:
+            if concept not in self.memory_graph.G:
+                nodes_to_delete.append(concept)
                 continue
 
-            # 计算内存中节点的特征值
-            memory_hash = self.hippocampus.calculate_node_hash(concept, memory_items)
-            created_time = data.get("created_time", current_time)
-            last_modified = data.get("last_modified", current_time)
+            data = self.memory_graph.G.nodes[concept]
+            memory_items = data["memory_items"]
+            nodes_to_upsert.append(
+                {
+                    "concept": concept,
+                    "memory_items": memory_items,
+                    "weight": data.get("weight", 1.0),
+                    "hash": self.hippocampus.calculate_node_hash(concept, memory_items),
+                    "created_time": data.get("created_time", current_time),
+                    "last_modified": data.get("last_modified", current_time),
+                }
+            )
 
-            # memory_items直接作为字符串存储，不需要JSON序列化
-            if not memory_items:
+        # 批量准备边数据：脏边先按两个方向删除，仍存在于图中的再重新插入
+        edges_to_insert = []
+        for source, target in dirty_edges:
+            if not self.memory_graph.G.has_edge(source, target):
                 continue
+            data = self.memory_graph.G[source][target]
+            edges_to_insert.append(
+                {
+                    "source": source,
+                    "target": target,
+                    "strength": data.get("strength", 1),
+                    "hash": self.hippocampus.calculate_edge_hash(source, target),
+                    "created_time": data.get("created_time", current_time),
+                    "last_modified": data.get("last_modified", current_time),
+                }
+            )
+        edge_delete_params = [(source, target, target, source) for source, target in dirty_edges]
 
-            # 获取权重属性
-            weight = data.get("weight", 1.0)
-
-            if concept not in db_nodes:
-                nodes_to_create.append(
-                    {
-                        "concept": concept,
-                        "memory_items": memory_items,
-                        "weight": weight,
-                        "hash": memory_hash,
-                        "created_time": created_time,
-                        "last_modified": last_modified,
-                    }
-                )
-            else:
-                db_node = db_nodes[concept]
-                if db_node.hash != memory_hash:
-                    nodes_to_update.append(
-                        {
-                            "concept": concept,
-                            "memory_items": memory_items,
-                            "weight": weight,
-                            "hash": memory_hash,
-                            "last_modified": last_modified,
-                        }
-                    )
-
-        # 计算需要删除的节点
-        memory_concepts = {concept for concept, _ in memory_nodes}
-        nodes_to_delete = set(db_nodes.keys()) - memory_concepts
-
-        # 批量处理节点
-        if nodes_to_create:
-            batch_size = 100
-            for i in range(0, len(nodes_to_create), batch_size):
-                batch = nodes_to_create[i : i + batch_size]
-                GraphNodes.insert_many(batch).execute()
-
-        if nodes_to_update:
-            batch_size = 100
-            for i in range(0, len(nodes_to_update), batch_size):
-                batch = nodes_to_update[i : i + batch_size]
-                for node_data in batch:
-                    GraphNodes.update(**{k: v for k, v in node_data.items() if k != "concept"}).where(
-                        GraphNodes.concept == node_data["concept"]
+        batch_size = 100
+        database = GraphNodes._meta.database  # type: ignore
+        try:
+            with database.atomic():
+                for i in range(0, len(nodes_to_upsert), batch_size):
+                    GraphNodes.insert_many(nodes_to_upsert[i : i + batch_size]).on_conflict(
+                        conflict_target=[GraphNodes.concept],
+                        preserve=[
+                            GraphNodes.memory_items,
+                            GraphNodes.weight,
+                            GraphNodes.hash,
+                            GraphNodes.last_modified,
+                        ],
                     ).execute()
 
-        if nodes_to_delete:
-            GraphNodes.delete().where(GraphNodes.concept.in_(nodes_to_delete)).execute()  # type: ignore
-
-        # 处理边的信息
-        db_edges = list(GraphEdges.select())
-        memory_edges = list(self.memory_graph.G.edges(data=True))
-
-        # 创建边的哈希值字典
-        db_edge_dict = {}
-        for edge in db_edges:
-            edge_hash = self.hippocampus.calculate_edge_hash(edge.source, edge.target)
-            db_edge_dict[(edge.source, edge.target)] = {"hash": edge_hash, "strength": edge.strength}
-
-        # 批量准备边数据
-        edges_to_create = []
-        edges_to_update = []
-
-        # 处理边
-        for source, target, data in memory_edges:
-            edge_hash = self.hippocampus.calculate_edge_hash(source, target)
-            edge_key = (source, target)
-            strength = data.get("strength", 1)
-            created_time = data.get("created_time", current_time)
-            last_modified = data.get("last_modified", current_time)
-
-            if edge_key not in db_edge_dict:
-                edges_to_create.append(
-                    {
-                        "source": source,
-                        "target": target,
-                        "strength": strength,
-                        "hash": edge_hash,
-                        "created_time": created_time,
-                        "last_modified": last_modified,
-                    }
-                )
-            elif db_edge_dict[edge_key]["hash"] != edge_hash:
-                edges_to_update.append(
-                    {
-                        "source": source,
-                        "target": target,
-                        "strength": strength,
-                        "hash": edge_hash,
-                        "last_modified": last_modified,
-                    }
-                )
-
-        # 计算需要删除的边
-        memory_edge_keys = {(source, target) for source, target, _ in memory_edges}
-        edges_to_delete = set(db_edge_dict.keys()) - memory_edge_keys
-
-        # 批量处理边
-        if edges_to_create:
-            batch_size = 100
-            for i in range(0, len(edges_to_create), batch_size):
-                batch = edges_to_create[i : i + batch_size]
-                GraphEdges.insert_many(batch).execute()
-
-        if edges_to_update:
-            batch_size = 100
-            for i in range(0, len(edges_to_update), batch_size):
-                batch = edges_to_update[i : i + batch_size]
-                for edge_data in batch:
-                    GraphEdges.update(**{k: v for k, v in edge_data.items() if k not in ["source", "target"]}).where(
-                        (GraphEdges.source == edge_data["source"]) & (GraphEdges.target == edge_data["target"])
+                for i in range(0, len(nodes_to_delete), batch_size):
+                    GraphNodes.delete().where(
+                        GraphNodes.concept.in_(nodes_to_delete[i : i + batch_size])  # type: ignore
                     ).execute()
 
-        if edges_to_delete:
-            for source, target in edges_to_delete:
-                GraphEdges.delete().where((GraphEdges.source == source) & (GraphEdges.target == target)).execute()
+                if edge_delete_params:
+                    database.cursor().executemany(
+                        f"DELETE FROM {GraphEdges._meta.table_name} "  # type: ignore
+                        "WHERE (source = ? AND target = ?) OR (source = ? AND target = ?)",
+                        edge_delete_params,
+                    )
+
+                for i in range(0, len(edges_to_insert), batch_size):
+                    GraphEdges.insert_many(edges_to_insert[i : i + batch_size]).execute()
+        except Exception as e:
+            # 写入失败时把变化放回脏集合，下次同步重试
+            self.memory_graph.dirty_nodes |= dirty_nodes
+            self.memory_graph.dirty_edges |= dirty_edges
+            logger.error(f"[数据库] 记忆同步失败: {e}")
+            raise
 
         end_time = time.time()
         logger.info(f"[数据库] 同步完成，总耗时: {end_time - start_time:.2f}秒")
         logger.info(
-            f"[数据库] 同步了 {len(nodes_to_create) + len(nodes_to_update)} 个节点和 {len(edges_to_create) + len(edges_to_update)} 条边"
+            f"[数据库] 同步了 {len(nodes_to_upsert)} 个节点和 {len(edges_to_insert)} 条边，"
+            f"删除了 {len(nodes_to_delete)} 个节点和 {len(dirty_edges) - len(edges_to_insert)} 条边"
         )
 
     async def resync_memory_to_db(self):
@@ -872,7 +859,7 @@ class EntorhinalCortex:
 
             # 直接检查字符串是否为空，不需要分割成列表
             if not memory_items or memory_items.strip() == "":
-                self.memory_graph.G.remove_node(concept)
+                self.memory_graph.remove_node(concept)
                 continue
 
             # 计算内存中节点的特征值
@@ -930,6 +917,9 @@ class EntorhinalCortex:
                 batch = edges_data[i : i + batch_size]
                 GraphEdges.insert_many(batch).execute()
 
+        # 数据库已与内存完全一致
+        self.memory_graph.clear_dirty()
+
         end_time = time.time()
         logger.info(f"[数据库] 重新同步完成，总耗时: {end_time - start_time:.2f}秒")
         logger.info(f"[数据库] 同步了 {len(nodes_data)} 个节点和 {len(edges_data)} 条边")
@@ -940,7 +930,7 @@ class EntorhinalCortex:
         need_update = False
 
         # 清空当前图
-        self.memory_graph.G.clear()
+        self.memory_graph.clear()
 
         # 统计加载情况
         total_nodes = 0
@@ -958,6 +948,8 @@ class EntorhinalCortex:
                 if not node.memory_items or node.memory_items.strip() == "":
                     logger.warning(f"节点 {concept} 的memory_items为空，跳过")
                     skipped_nodes += 1
+                    # 标记为脏节点，下次同步时从数据库中删除
+                    self.memory_graph.mark_node_dirty(concept)
                     continue
 
                 # 直接使用memory_items
@@ -983,7 +975,7 @@ class EntorhinalCortex:
                 weight = node.weight if hasattr(node, "weight") and node.weight is not None else 1.0
 
                 # 添加节点到图中
-                self.memory_graph.G.add_node(
+                self.memory_graph.add_node(
                     concept,
                     memory_items=memory_items,
                     weight=weight,
@@ -1026,6 +1018,11 @@ class EntorhinalCortex:
                 self.memory_graph.G.add_edge(
                     source, target, strength=strength, created_time=created_time, last_modified=last_modified
                 )
+            else:
+                # 端点已不存在的边，下次同步时从数据库中删除
+                self.memory_graph.mark_edge_dirty(source, target)
+
+        self.memory_graph.invalidate_snapshot()
 
         if need_update:
             logger.info("[数据库] 已为缺失的时间字段进行补充")
@@ -1087,6 +1084,7 @@ class ParahippocampalGyrus:
         logger.debug(f"记忆来源:\n{input_text}")
 
         # 2. 使用LLM提取关键主题
+        start_time = time.time()
         topic_num = self.hippocampus.calculate_topic_num(input_text, compress_rate)
         topics_response, _ = await self.memory_modify_model.generate_response_async(
             self.hippocampus.find_topic_llm(input_text, topic_num)
@@ -1104,56 +1102,55 @@ class ParahippocampalGyrus:
                 if topic.strip()
             ]
 
-        # 3. 过滤掉包含禁用关键词的topic
-        filtered_topics = [
-            topic for topic in topics if all(keyword not in topic for keyword in global_config.memory.memory_ban_words)
-        ]
+        # 3. 过滤掉包含禁用关键词的topic（同时去重，避免同一话题被并发写入）
+        filtered_topics = list(
+            dict.fromkeys(
+                topic
+                for topic in topics
+                if all(keyword not in topic for keyword in global_config.memory.memory_ban_words)
+            )
+        )
+        topic_time = time.time() - start_time
 
         logger.debug(f"过滤后话题: {filtered_topics}")
 
-        # 4. 创建所有话题的摘要生成任务
-        tasks: List[Tuple[str, Coroutine[Any, Any, Tuple[str, Tuple[str, str, List | None]]]]] = []
-        for topic in filtered_topics:
-            # 调用修改后的 topic_what，不再需要 time_info
+        # 4. 并发生成所有话题的摘要，单个话题失败或超时不影响其它话题
+        semaphore = asyncio.Semaphore(max(1, global_config.memory.memory_build_concurrency))
+        timeout = global_config.memory.memory_build_timeout or None
+
+        async def summarize(topic: str) -> Optional[str]:
             topic_what_prompt = self.hippocampus.topic_what(input_text, topic)
-            try:
-                task = self.memory_modify_model.generate_response_async(topic_what_prompt)
-                tasks.append((topic.strip(), task))
-            except Exception as e:
-                logger.error(f"生成话题 '{topic}' 的摘要时发生错误: {e}")
-                continue
+            if global_config.debug.show_prompt:
+                logger.info(f"prompt: {topic_what_prompt}")
+            async with semaphore:
+                try:
+                    response, _ = await asyncio.wait_for(
+                        self.memory_modify_model.generate_response_async(topic_what_prompt), timeout=timeout
+                    )
+                    return response
+                except asyncio.TimeoutError:
+                    logger.warning(f"生成话题 '{topic}' 的摘要超时（{timeout}秒），跳过该话题")
+                except Exception as e:
+                    logger.error(f"生成话题 '{topic}' 的摘要时发生错误: {e}")
+                return None
+
+        start_time = time.time()
+        summaries = await asyncio.gather(*(summarize(topic) for topic in filtered_topics))
+        summary_time = time.time() - start_time
 
-        # 等待所有任务完成
         compressed_memory: Set[Tuple[str, str]] = set()
         similar_topics_dict = {}
+        for topic, summary in zip(filtered_topics, summaries, strict=True):
+            if summary:
+                compressed_memory.add((topic, summary))
+                # 通过倒排索引只比较与新主题有共同词的已有主题
+                similar_topics_dict[topic] = self.memory_graph.find_similar_topics(topic, threshold=0.7, top_k=3)
 
-        for topic, task in tasks:
-            response = await task
-            if response:
-                compressed_memory.add((topic, response[0]))
-
-                existing_topics = list(self.memory_graph.G.nodes())
-                similar_topics = []
-
-                for existing_topic in existing_topics:
-                    topic_words = set(jieba.cut(topic))
-                    existing_words = set(jieba.cut(existing_topic))
-
-                    all_words = topic_words | existing_words
-                    v1 = [1 if word in topic_words else 0 for word in all_words]
-                    v2 = [1 if word in existing_words else 0 for word in all_words]
-
-                    similarity = cosine_similarity(v1, v2)
-
-                    if similarity >= 0.7:
-                        similar_topics.append((existing_topic, similarity))
-
-                similar_topics.sort(key=lambda x: x[1], reverse=True)
-                similar_topics = similar_topics[:3]
-                similar_topics_dict[topic] = similar_topics
-
+        logger.info(
+            f"记忆压缩完成：提取话题耗时 {topic_time:.2f}秒，{len(filtered_topics)}个话题摘要耗时 {summary_time:.2f}秒，"
+            f"成功 {len(compressed_memory)} 个"
+        )
         if global_config.debug.show_prompt:
-            logger.info(f"prompt: {topic_what_prompt}")
             logger.info(f"压缩后的记忆: {compressed_memory}")
             logger.info(f"相似主题: {similar_topics_dict}")
 
@@ -1214,11 +1211,10 @@ class ParahippocampalGyrus:
                 new_strength = current_strength - 1
 
                 if new_strength <= 0:
-                    self.memory_graph.G.remove_edge(source, target)
+                    self.memory_graph.remove_edge(source, target)
                     edge_changes["removed"].append(f"{source} -> {target}")
                 else:
-                    edge_data["strength"] = new_strength
-                    edge_data["last_modified"] = current_time
+                    self.memory_graph.set_edge_strength(source, target, new_strength, current_time)
                     edge_changes["weakened"].append(f"{source}-{target} (强度: {current_strength} -> {new_strength})")
         edge_check_end = time.time()
         logger.info(f"[遗忘] 连接检查耗时: {edge_check_end - edge_check_start:.2f}秒")
@@ -1237,7 +1233,7 @@ class ParahippocampalGyrus:
             # 直接检查记忆内容是否为空
             if not memory_items or memory_items.strip() == "":
                 try:
-                    self.memory_graph.G.remove_node(node)
+                    self.memory_graph.remove_node(node)
                     node_changes["removed"].append(f"{node}(空节点)")  # 标记为空节点移除
                     logger.debug(f"[遗忘] 移除了空的节点: {node}")
                 except nx.NetworkXError as e:
@@ -1258,7 +1254,7 @@ class ParahippocampalGyrus:
             if current_time - last_modified > adjusted_threshold and memory_items:
                 # 既然每个节点现在是完整记忆，直接删除整个节点
                 try:
-                    self.memory_graph.G.remove_node(node)
+                    self.memory_graph.remove_node(node)
                     node_changes["removed"].append(f"{node}(长时间未修改,权重{node_weight:.1f})")
                     logger.debug(f"[遗忘] 移除了长时间未修改的节点: {node} (权重: {node_weight:.1f})")
                 except nx.NetworkXError as e:
@@ -1270,7 +1266,7 @@ class ParahippocampalGyrus:
         if any(edge_changes.values()) or any(node_changes.values()):
             sync_start = time.time()
 
-            await self.hippocampus.entorhinal_cortex.resync_memory_to_db()
+            await self.hippocampus.entorhinal_cortex.sync_memory_to_db()
 
             sync_end = time.time()
             logger.info(f"[遗忘] 数据库同步耗时: {sync_end - sync_start:.2f}秒")
@@ -1368,18 +1364,31 @@ class HippocampusManager:
                         messages, global_config.memory.memory_compress_rate
                     )
 
-                    # 添加记忆节点
-                    current_time = time.time()
-                    for topic, memory in compressed_memory:
-                        await self._hippocampus.memory_graph.add_dot(topic, memory, self._hippocampus)
+                    # 并发添加记忆节点（已有节点需要LLM整合新旧记忆），话题已去重，不会并发写入同一节点
+                    start_time = time.time()
+                    semaphore = asyncio.Semaphore(max(1, global_config.memory.memory_build_concurrency))
+
+                    async def add_dot(topic: str, memory: str):
+                        async with semaphore:
+                            await self._hippocampus.memory_graph.add_dot(topic, memory, self._hippocampus)
 
-                        # 连接相似主题
+                    results = await asyncio.gather(
+                        *(add_dot(topic, memory) for topic, memory in compressed_memory), return_exceptions=True
+                    )
+                    for (topic, _), result in zip(compressed_memory, results, strict=True):
+                        if isinstance(result, BaseException):
+                            logger.error(f"添加记忆节点 {topic} 失败: {result}")
+                    integrate_time = time.time() - start_time
+
+                    # 连接相似主题
+                    current_time = time.time()
+                    for topic, _ in compressed_memory:
                         if topic in similar_topics_dict:
                             similar_topics = similar_topics_dict[topic]
                             for similar_topic, similarity in similar_topics:
                                 if topic != similar_topic:
                                     strength = int(similarity * 10)
-                                    self._hippocampus.memory_graph.G.add_edge(
+                                    self._hippocampus.memory_graph.add_edge(
                                         topic,
                                         similar_topic,
                                         strength=strength,
@@ -1388,8 +1397,12 @@ class HippocampusManager:
                                     )
 
                     # 同步到数据库
+                    start_time = time.time()
                     await self._hippocampus.entorhinal_cortex.sync_memory_to_db()
-                    logger.info(f"为 {chat_id} 构建记忆完成")
+                    logger.info(
+                        f"为 {chat_id} 构建记忆完成：写入{len(compressed_memory)}个节点耗时 {integrate_time:.2f}秒，"
+                        f"同步数据库耗时 {time.time() - start_time:.2f}秒"
+                    )
                     return True
 
         except Exception as e:
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+import networkx as nx
+import numpy as np
+
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+
+class GraphSnapshot:
+    """记忆图的紧凑只读快照，用于向量化的扩散激活
+
+    - 节点名被驻留为连续的整数id
+    - 邻接关系以CSR格式保存（indptr / indices），每行内的邻居顺序与 networkx 的邻接顺序一致
+    - 边权预先转换为 1/strength 数组，扩散时只需做一次减法。这里保留 float64：
+      float32 下 1/3 之类的舍入会改变激活值是否恰好大于0，导致与原BFS结果不一致
+
+    快照本身不感知图的变化，由 MemoryGraph 在图变化时同步调用 add_node / add_edge / remove_edge /
+    remove_node / update_strength 增量修改：
+    - 删除的边在CSR中原地置为 1/strength = inf（扩散时激活值变为 -inf，永远不会被选中）
+    - 新增的边（包括新节点的边、删除后重新添加的边）放入按行的覆盖层，扩散时排在该行CSR邻居之后合并读取，
+      与 networkx 把新邻居追加到邻接字典末尾的顺序一致
+    - 删除的节点只从 node_index 中移除，id 不复用
+    覆盖层增长到一定规模（overlay_size）后由 MemoryGraph 丢弃快照整体重建。
+    """
+
+    def __init__(self, nodes: List[Hashable], indptr: np.ndarray, indices: np.ndarray, inv_strength: np.ndarray):
+        self.nodes = nodes
+        self.node_index: Dict[Hashable, int] = {node: i for i, node in enumerate(nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.inv_strength = inv_strength
+        self._base_rows = len(nodes)
+        """CSR中的行数，之后新增的节点只有覆盖层中的邻居"""
+        self._overlay: Dict[int, Dict[int, float]] = {}
+        """行 -> {邻居: 1/strength}，按添加顺序排列"""
+        self.overlay_size = 0
+        """覆盖层中的（有向）边数"""
+        # 扩散时复用的访问标记，用完按触达的节点复位，避免每次查询分配O(N)内存
+        self._visited = np.zeros(len(nodes), dtype=bool)
+        self._has_overlay = np.zeros(len(nodes), dtype=bool)
+
+    @classmethod
+    def from_graph(cls, graph: nx.Graph) -> "GraphSnapshot":
+        """从 networkx 图构建快照"""
+        nodes = list(graph.nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+        adjacency = [nbrs for _, nbrs in graph.adjacency()]
+
+        degrees = np.fromiter((len(nbrs) for nbrs in adjacency), dtype=np.int64, count=len(nodes))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        total = int(indptr[-1])
+
+        # 无向图：每条边在两个端点的行里各存一份
+        indices = np.fromiter(
+            (node_index[neighbor] for nbrs in adjacency for neighbor in nbrs), dtype=np.int32, count=total
+        )
+        strength = np.fromiter(
+            (data.get("strength", 1) for nbrs in adjacency for data in nbrs.values()), dtype=np.float64, count=total
+        )
+        inv_strength = 1.0 / np.maximum(strength, 1e-6)
+        return cls(nodes, indptr, indices, inv_strength)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    def _edge_position(self, row: int, col: int) -> int:
+        """CSR中未被删除的边 row->col 的位置，不存在时返回-1"""
+        if row >= self._base_rows:
+            return -1
+        start, end = self.indptr[row], self.indptr[row + 1]
+        positions = np.flatnonzero(self.indices[start:end] == col)
+        if not positions.size:
+            return -1
+        position = int(start + positions[0])
+        return -1 if np.isinf(self.inv_strength[position]) else position
+
+    def _set_directed(self, row: int, col: int, inv: float) -> bool:
+        """更新已存在的有向边 row->col 的 1/strength，边不存在时返回False"""
+        overlay_row = self._overlay.get(row)
+        if overlay_row is not None and col in overlay_row:
+            overlay_row[col] = inv
+            return True
+        position = self._edge_position(row, col)
+        if position < 0:
+            return False
+        self.inv_strength[position] = inv
+        return True
+
+    def _remove_directed(self, row: int, col: int) -> None:
+        overlay_row = self._overlay.get(row)
+        if overlay_row is not None and col in overlay_row:
+            del overlay_row[col]
+            self.overlay_size -= 1
+            return
+        position = self._edge_position(row, col)
+        if position >= 0:
+            self.inv_strength[position] = np.inf
+
+    def _neighbor_ids(self, row: int) -> List[int]:
+        neighbors = []
+        if row < self._base_rows:
+            start, end = self.indptr[row], self.indptr[row + 1]
+            live = ~np.isinf(self.inv_strength[start:end])
+            neighbors.extend(self.indices[start:end][live].tolist())
+        neighbors.extend(self._overlay.get(row, {}))
+        return neighbors
+
+    def add_node(self, node: Hashable) -> int:
+        """添加节点（已存在时直接返回其id）"""
+        node_id = self.node_index.get(node)
+        if node_id is not None:
+            return node_id
+        node_id = len(self.nodes)
+        self.nodes.append(node)
+        self.node_index[node] = node_id
+        if node_id >= len(self._visited):
+            capacity = max(2 * len(self._visited), node_id + 1)
+            self._visited = np.concatenate([self._visited, np.zeros(capacity - len(self._visited), dtype=bool)])
+            self._has_overlay = np.concatenate(
+                [self._has_overlay, np.zeros(capacity - len(self._has_overlay), dtype=bool)]
+            )
+        return node_id
+
+    def add_edge(self, source: Hashable, target: Hashable, strength: float) -> None:
+        """添加一条新边（端点不存在时一并添加），边已存在时只更新强度"""
+        if self.update_strength(source, target, strength):
+            return
+        u = self.add_node(source)
+        v = self.add_node(target)
+        inv = 1.0 / max(strength, 1e-6)
+        for row, col in ((u, v), (v, u)):
+            self._overlay.setdefault(row, {})[col] = inv
+            self._has_overlay[row] = True
+            self.overlay_size += 1
+
+    def remove_edge(self, source: Hashable, target: Hashable) -> None:
+        u = self.node_index.get(source)
+        v = self.node_index.get(target)
+        if u is None or v is None:
+            return
+        self._remove_directed(u, v)
+        self._remove_directed(v, u)
+
+    def remove_node(self, node: Hashable) -> None:
+        """删除节点及其所有边"""
+        node_id = self.node_index.pop(node, None)
+        if node_id is None:
+            return
+        for neighbor in self._neighbor_ids(node_id):
+            self._remove_directed(neighbor, node_id)
+            self._remove_directed(node_id, neighbor)
+
+    def update_strength(self, source: Hashable, target: Hashable, strength: float) -> bool:
+        """原地更新一条已存在边的强度，边不在快照中时返回False"""
+        u = self.node_index.get(source)
+        v = self.node_index.get(target)
+        if u is None or v is None:
+            return False
+        inv = 1.0 / max(strength, 1e-6)
+        return self._set_directed(u, v, inv) and self._set_directed(v, u, inv)
+
+    def _merge_overlay(
+        self,
+        frontier: np.ndarray,
+        activations: np.ndarray,
+        counts: np.ndarray,
+        neighbors: np.ndarray,
+        new_activations: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """把前沿节点在覆盖层中的邻居接在各自的CSR邻居之后，保持 前沿顺序 -> 邻接顺序 的整体顺序"""
+        positions = np.flatnonzero(self._has_overlay[frontier])
+        overlay_owner: List[int] = []
+        overlay_neighbors: List[int] = []
+        overlay_activations: List[float] = []
+        for position in positions.tolist():
+            activation = float(activations[position])
+            for neighbor, inv in self._overlay.get(int(frontier[position]), {}).items():
+                overlay_owner.append(position)
+                overlay_neighbors.append(neighbor)
+                overlay_activations.append(activation - inv)
+        if not overlay_owner:
+            return neighbors, new_activations
+
+        base_owner = np.repeat(np.arange(len(frontier)), counts)
+        # 稳定排序：同一前沿节点的CSR邻居（在前）与覆盖层邻居（在后）各自保持原有顺序
+        order = np.argsort(np.concatenate([base_owner, np.array(overlay_owner, dtype=np.int64)]), kind="stable")
+        merged_neighbors = np.concatenate([neighbors, np.array(overlay_neighbors, dtype=np.int64)])[order]
+        merged_activations = np.concatenate([new_activations, np.array(overlay_activations, dtype=np.float64)])[order]
+        return merged_neighbors, merged_activations
+
+    def spread_activation(
+        self,
+        seeds: Iterable[Hashable],
+        max_depth: int,
+        seed_activation: float = 1.0,
+        initial_activation: float = 1.0,
+    ) -> Dict[Hashable, float]:
+        """多源、限深的扩散激活
+
+        对每个种子独立做逐层扩散：邻居的激活值为 当前激活值 - 1/strength，
+        只保留大于0且未被访问过的节点。同一层多条路径到达同一节点时，
+        与原先的队列式BFS一样以先到达的为准（前沿保持发现顺序，邻居保持邻接顺序）。
+        各种子的结果按节点求和。
+
+        Args:
+            seeds: 种子节点名，不在图中的会被忽略
+            max_depth: 最大扩散深度
+            seed_activation: 种子节点自身计入结果的激活值
+            initial_activation: 种子向外扩散时使用的初始激活值
+
+        Returns:
+            Dict[Hashable, float]: 节点名 -> 累计激活值
+        """
+        indptr, indices, inv_strength, visited = self.indptr, self.indices, self.inv_strength, self._visited
+        base_rows = self._base_rows
+        result_ids: List[np.ndarray] = []
+        result_values: List[np.ndarray] = []
+
+        for seed in seeds:
+            seed_id = self.node_index.get(seed)
+            if seed_id is None:
+                continue
+
+            frontier = np.array([seed_id], dtype=np.int64)
+            activations = np.array([initial_activation], dtype=np.float64)
+            visited[seed_id] = True
+            touched = [frontier]
+            result_ids.append(frontier)
+            result_values.append(np.array([seed_activation], dtype=np.float64))
+
+            for _ in range(max_depth):
+                # 快照建立后新增的节点在CSR中没有行，邻居数按0处理
+                starts = indptr[np.minimum(frontier, base_rows)]
+                counts = indptr[np.minimum(frontier + 1, base_rows)] - starts
+                total = int(counts.sum())
+
+                # 把所有前沿节点的邻接区间拼接成一个边下标数组
+                edge_ids = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+                neighbors = indices[edge_ids].astype(np.int64)
+                new_activations = np.repeat(activations, counts) - inv_strength[edge_ids]
+                if self.overlay_size:
+                    neighbors, new_activations = self._merge_overlay(
+                        frontier, activations, counts, neighbors, new_activations
+                    )
+                if neighbors.size == 0:
+                    break
+
+                mask = (new_activations > 0) & ~visited[neighbors]
+                if not mask.any():
+                    break
+                neighbors = neighbors[mask]
+                new_activations = new_activations[mask]
+
+                # 同一节点只保留第一次到达时的激活值，并按发现顺序排列新的前沿
+                unique_neighbors, first_seen = np.unique(neighbors, return_index=True)
+                order = np.argsort(first_seen)
+                frontier = unique_neighbors[order]
+                activations = new_activations[first_seen[order]]
+                visited[frontier] = True
+                touched.append(frontier)
+                result_ids.append(frontier)
+                result_values.append(activations)
+
+            for ids in touched:
+                visited[ids] = False
+
+        if not result_ids:
+            return {}
+
+        all_ids = np.concatenate(result_ids)
+        unique_ids, inverse = np.unique(all_ids, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(result_values))
+        return {self.nodes[i]: float(v) for i, v in zip(unique_ids.tolist(), totals.tolist(), strict=True)}
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import re
+import jieba
+import jieba.analyse
+
+from collections import OrderedDict
+from typing import Container, List, Literal, Optional, Tuple
+
+from src.common.logger import get_logger
+
+logger = get_logger("memory")
+
+# 记忆图中的话题名一般很短，超过该长度的子串不做词表匹配
+MAX_TOPIC_LENGTH = 8
+
+
+def normalize_text(text: str) -> str:
+    """归一化文本，作为缓存键使用"""
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def expected_topic_num(text_length: int) -> int:
+    """按文本长度估计期望的关键词数量，与LLM提取时的topic_num上限保持一致"""
+    if text_length <= 12:
+        return 3
+    elif text_length <= 20:
+        return 4
+    else:
+        return 5
+
+
+class KeywordCache:
+    """以归一化文本为键的LRU缓存"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: OrderedDict[str, Tuple[List[str], List[str]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[Tuple[List[str], List[str]]]:
+        key = normalize_text(text)
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            keywords, keywords_lite = self._data[key]
+            return list(keywords), list(keywords_lite)
+        self.misses += 1
+        return None
+
+    def put(self, text: str, keywords: List[str], keywords_lite: List[str]) -> None:
+        if self.max_size <= 0:
+            return
+        key = normalize_text(text)
+        self._data[key] = (list(keywords), list(keywords_lite))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class LocalKeywordExtractor:
+    """本地关键词提取器
+
+    使用jieba的TF-IDF或TextRank给候选词打分，并用记忆图的节点词表加权：
+    文本中出现的记忆话题会被优先选中。置信度由命中记忆图的比例和关键词数量共同决定，
+    调用方可以在置信度过低时回退到LLM提取。
+    """
+
+    def __init__(self, algorithm: Literal["tfidf", "textrank"] = "tfidf", vocab_bonus: float = 1.0):
+        self.algorithm = algorithm
+        self.vocab_bonus = vocab_bonus
+
+    def _score_candidates(self, text: str, top_k: int) -> dict[str, float]:
+        """返回候选词及其归一化到[0, 1]的分数"""
+        if self.algorithm == "textrank":
+            tags = jieba.analyse.textrank(text, topK=top_k * 2, withWeight=True)
+        else:
+            tags = jieba.analyse.extract_tags(text, topK=top_k * 2, withWeight=True)
+
+        if not tags:
+            return {}
+        max_weight = max(weight for _, weight in tags) or 1.0
+        return {word: weight / max_weight for word, weight in tags if len(word) > 1}
+
+    @staticmethod
+    def _find_vocab_hits(text: str, vocabulary: Container[str]) -> List[str]:
+        """在文本中查找记忆图中已有的话题（包括跨越分词边界的多字话题）"""
+        hits = []
+        seen = set()
+        text_length = len(text)
+        for start in range(text_length):
+            for end in range(start + 2, min(start + MAX_TOPIC_LENGTH, text_length) + 1):
+                candidate = text[start:end]
+                if candidate not in seen and candidate in vocabulary:
+                    seen.add(candidate)
+                    hits.append(candidate)
+        return hits
+
+    def extract(self, text: str, vocabulary: Container[str]) -> Tuple[List[str], float]:
+        """提取关键词
+
+        Args:
+            text: 输入文本
+            vocabulary: 记忆图的节点词表，支持 `in` 判断即可（例如 networkx 图本身）
+
+        Returns:
+            Tuple[List[str], float]: (关键词列表, 置信度)
+        """
+        if not text:
+            return [], 0.0
+
+        top_k = expected_topic_num(len(text))
+        scores = self._score_candidates(text, top_k)
+        for hit in self._find_vocab_hits(text, vocabulary):
+            scores[hit] = scores.get(hit, 0.0) + self.vocab_bonus
+        # 分数相同时较长的话题优先，避免"原神启动"被"原神"挤掉
+        ranked = sorted(scores.items(), key=lambda x: (x[1], len(x[0])), reverse=True)
+        keywords = [word for word, _ in ranked[:top_k]]
+        if not keywords:
+            return [], 0.0
+
+        hit_ratio = sum(1 for word in keywords if word in vocabulary) / len(keywords)
+        coverage = min(1.0, len(keywords) / top_k)
+        confidence = 0.5 * hit_ratio + 0.5 * coverage
+        return keywords, confidence
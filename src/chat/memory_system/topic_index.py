@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import math
+import jieba
+
+from collections import Counter
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+class TopicTokenIndex:
+    """记忆主题的分词倒排索引，用于查找与新主题相似的已有主题
+
+    - 每个主题只分词一次，缓存其词集合
+    - 倒排表 词 -> 包含该词的主题集合，相似主题只需在共享词的主题中查找
+    - 相似度为两个词集合的余弦相似度 |A∩B| / sqrt(|A|·|B|)，与按全部主题构建0/1向量计算的结果一致
+
+    索引在第一次查询时才构建（加载大图时不必立即为所有节点分词），构建后由 MemoryGraph
+    在增删节点时同步维护。
+    """
+
+    def __init__(self):
+        self.topic_tokens: Dict[Hashable, FrozenSet[str]] = {}
+        """主题 -> 词集合"""
+        self.postings: Dict[str, Set[Hashable]] = {}
+        """词 -> 包含该词的主题集合"""
+        self.topic_order: Dict[Hashable, int] = {}
+        """主题 -> 加入顺序，相似度相同时按加入顺序排列（与遍历图节点的顺序一致）"""
+        self._next_order = 0
+        self.built = False
+
+    @staticmethod
+    def tokenize(topic) -> FrozenSet[str]:
+        return frozenset(jieba.cut(str(topic)))
+
+    def build(self, topics: Iterable[Hashable]):
+        self.clear()
+        self.built = True
+        for topic in topics:
+            self.add(topic)
+
+    def clear(self):
+        self.topic_tokens.clear()
+        self.postings.clear()
+        self.topic_order.clear()
+        self._next_order = 0
+        self.built = False
+
+    def add(self, topic: Hashable):
+        if not self.built or topic in self.topic_tokens:
+            return
+        tokens = self.tokenize(topic)
+        self.topic_tokens[topic] = tokens
+        self.topic_order[topic] = self._next_order
+        self._next_order += 1
+        for token in tokens:
+            self.postings.setdefault(token, set()).add(topic)
+
+    def remove(self, topic: Hashable):
+        if not self.built:
+            return
+        tokens = self.topic_tokens.pop(topic, None)
+        if tokens is None:
+            return
+        del self.topic_order[topic]
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.discard(topic)
+                if not posting:
+                    del self.postings[token]
+
+    def find_similar(self, topic, threshold: float = 0.7, top_k: Optional[int] = 3) -> List[Tuple[Hashable, float]]:
+        """
+        查找与给定主题相似的已有主题
+        Args:
+            topic: 主题（可以不在索引中）
+            threshold: 余弦相似度阈值
+            top_k: 最多返回的数量，None为不限制
+        Returns:
+            List[Tuple[主题, 相似度]]: 按相似度降序排列
+        """
+        tokens = self.tokenize(topic)
+        if not tokens:
+            return []
+        # 合并倒排表，统计每个候选主题与查询共享的词数
+        overlap: Counter = Counter()
+        for token in tokens:
+            if posting := self.postings.get(token):
+                overlap.update(posting)
+
+        similar = []
+        for candidate, shared in overlap.items():
+            similarity = shared / math.sqrt(len(tokens) * len(self.topic_tokens[candidate]))
+            if similarity >= threshold:
+                similar.append((candidate, similarity))
+        similar.sort(key=lambda x: (-x[1], self.topic_order[x[0]]))
+        return similar if top_k is None else similar[:top_k]
@@ -0,0 +1,122 @@
+import re
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from src.common.logger import get_logger
+from src.config.config import global_config
+
+logger = get_logger("chat")
+
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class AhoCorasick:
+    """多模式字符串匹配自动机：一次扫描文本即可判断是否包含任意一个词"""
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]
+        """节点 -> 以该节点结尾的词（包括沿失配链可达的词），没有时为None"""
+
+        for word in words:
+            node = 0
+            for char in word:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            if self._output[node] is None:
+                self._output[node] = word
+
+        # 按层序计算失配指针
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+
+    def search(self, text: str) -> Optional[str]:
+        """返回文本中出现的第一个词，不包含任何词时返回None"""
+        goto, fail, output = self._goto, self._fail, self._output
+        if output[0] is not None:  # 空字符串
+            return output[0]
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node] is not None:
+                return output[node]
+        return None
+
+
+class BanFilter:
+    """
+    消息过滤器
+
+    - 过滤词：构建 Aho-Corasick 自动机，每条消息只扫描一遍
+    - 过滤正则：预先编译；没有反向引用时还会合并为一个交替表达式，未命中（绝大多数消息）只需一次搜索，
+      命中后再逐个匹配找出具体规则。无法编译的正则会被记录并跳过
+
+    构建时保存配置中过滤词/正则集合的快照，集合被替换（配置重新加载）或原地修改后与快照不再相等，自动重建。
+    """
+
+    def __init__(self):
+        self._words_snapshot: Optional[FrozenSet[str]] = None
+        self._automaton: Optional[AhoCorasick] = None
+        self._regex_snapshot: Optional[FrozenSet[str]] = None
+        self._patterns: List[Tuple[str, Pattern[str]]] = []
+        self._combined: Optional[Pattern[str]] = None
+
+    def _get_automaton(self) -> AhoCorasick:
+        ban_words = global_config.message_receive.ban_words
+        if self._automaton is None or ban_words != self._words_snapshot:
+            self._words_snapshot = frozenset(ban_words)
+            self._automaton = AhoCorasick(self._words_snapshot)
+            logger.debug(f"已构建过滤词自动机，共 {len(ban_words)} 个过滤词")
+        return self._automaton
+
+    def _ensure_regex(self) -> None:
+        ban_msgs_regex = global_config.message_receive.ban_msgs_regex
+        if ban_msgs_regex == self._regex_snapshot:
+            return
+        self._regex_snapshot = frozenset(ban_msgs_regex)
+        self._patterns = []
+        for pattern in self._regex_snapshot:
+            try:
+                self._patterns.append((pattern, re.compile(pattern)))
+            except re.error as e:
+                logger.error(f"过滤正则表达式 {pattern} 无效，已跳过: {e}")
+        self._combined = None
+        if len(self._patterns) > 1 and not any(_BACKREFERENCE.search(pattern) for pattern, _ in self._patterns):
+            try:
+                self._combined = re.compile("|".join(f"(?:{pattern})" for pattern, _ in self._patterns))
+            except re.error:
+                # 例如含有只能出现在开头的全局标志 (?i)，逐个匹配
+                self._combined = None
+
+    def match_word(self, text: str) -> Optional[str]:
+        """返回消息中包含的过滤词，没有时返回None"""
+        return self._get_automaton().search(text)
+
+    def match_regex(self, text: str) -> Optional[str]:
+        """返回消息匹配到的过滤正则，没有时返回None"""
+        self._ensure_regex()
+        if self._combined is not None and not self._combined.search(text):
+            return None
+        for pattern, compiled in self._patterns:
+            if compiled.search(text):
+                return pattern
+        return None
+
+
+ban_filter = BanFilter()
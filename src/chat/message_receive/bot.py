@@ -1,16 +1,16 @@
 import traceback
 import os
-import re
 
 from typing import Dict, Any, Optional
 from maim_message import UserInfo
 
 from src.common.logger import get_logger
-from src.config.config import global_config
 from src.mood.mood_manager import mood_manager  # 导入情绪管理器
 from src.chat.message_receive.chat_stream import get_chat_manager, ChatStream
 from src.chat.message_receive.message import MessageRecv, MessageRecvS4U
 from src.chat.message_receive.storage import MessageStorage
+from src.chat.message_receive.ban_filter import ban_filter
+from src.chat.message_receive.message_dispatcher import create_message_dispatcher
 from src.chat.heart_flow.heartflow_message_processor import HeartFCMessageReceiver
 from src.chat.utils.prompt_builder import Prompt, global_prompt_manager
 from src.plugin_system.core import component_registry, events_manager, global_announcement_manager
@@ -38,12 +38,11 @@ def _check_ban_words(text: str, chat: ChatStream, userinfo: UserInfo) -> bool:
     Returns:
         bool: 是否包含过滤词
     """
-    for word in global_config.message_receive.ban_words:
-        if word in text:
-            chat_name = chat.group_info.group_name if chat.group_info else "私聊"
-            logger.info(f"[{chat_name}]{userinfo.user_nickname}:{text}")
-            logger.info(f"[过滤词识别]消息中含有{word}，filtered")
-            return True
+    if (word := ban_filter.match_word(text)) is not None:
+        chat_name = chat.group_info.group_name if chat.group_info else "私聊"
+        logger.info(f"[{chat_name}]{userinfo.user_nickname}:{text}")
+        logger.info(f"[过滤词识别]消息中含有{word}，filtered")
+        return True
     return False
 
 
@@ -58,12 +57,11 @@ def _check_ban_regex(text: str, chat: ChatStream, userinfo: UserInfo) -> bool:
     Returns:
         bool: 是否匹配过滤正则
     """
-    for pattern in global_config.message_receive.ban_msgs_regex:
-        if re.search(pattern, text):
-            chat_name = chat.group_info.group_name if chat.group_info else "私聊"
-            logger.info(f"[{chat_name}]{userinfo.user_nickname}:{text}")
-            logger.info(f"[正则表达式过滤]消息匹配到{pattern}，filtered")
-            return True
+    if (pattern := ban_filter.match_regex(text)) is not None:
+        chat_name = chat.group_info.group_name if chat.group_info else "私聊"
+        logger.info(f"[{chat_name}]{userinfo.user_nickname}:{text}")
+        logger.info(f"[正则表达式过滤]消息匹配到{pattern}，filtered")
+        return True
     return False
 
 
@@ -75,6 +73,7 @@ class ChatBot:
         self.heartflow_message_receiver = HeartFCMessageReceiver()  # 新增
 
         self.s4u_message_processor = S4UMessageProcessor()
+        self.message_dispatcher = create_message_dispatcher(self._process_message)  # 按聊天流排队处理消息
 
     async def _ensure_started(self):
         """确保所有任务已启动"""
@@ -177,6 +176,10 @@ class ChatBot:
         return
 
     async def message_process(self, message_data: Dict[str, Any]) -> None:
+        """接收转化后的统一格式消息，按聊天流放入消息分发器排队，由分发器调用 _process_message 处理"""
+        await self.message_dispatcher.dispatch(message_data)
+
+    async def _process_message(self, message_data: Dict[str, Any]) -> None:
         """处理转化后的统一格式消息
         这个函数本质是预处理一些数据，根据配置信息和消息内容，预处理消息，并分发到合适的消息处理器中
         heart_flow模式：使用思维流系统进行回复
@@ -2,7 +2,7 @@ import asyncio
 import hashlib
 import time
 import copy
-from typing import Dict, Optional, TYPE_CHECKING
+from typing import Any, Dict, Optional, TYPE_CHECKING
 from rich.traceback import install
 from maim_message import GroupInfo, UserInfo
 
@@ -21,6 +21,14 @@ install(extra_lines=3)
 logger = get_logger("chat_stream")
 
 
+def build_stream_id(platform: str, chat_id: Any, is_group: bool) -> str:
+    """根据平台与群号（群聊）或用户ID（私聊）生成聊天流唯一ID"""
+    components = [platform, str(chat_id)] if is_group else [platform, str(chat_id), "private"]
+    # 使用MD5生成唯一ID
+    key = "_".join(components)
+    return hashlib.md5(key.encode()).hexdigest()
+
+
 class ChatMessageContext:
     """聊天消息上下文，存储消息的上下文信息"""
 
@@ -178,20 +186,12 @@ class ChatManager:
             raise ValueError("用户信息或群组信息必须提供")
 
         if group_info:
-            # 组合关键信息
-            components = [platform, str(group_info.group_id)]
-        else:
-            components = [platform, str(user_info.user_id), "private"]  # type: ignore
-
-        # 使用MD5生成唯一ID
-        key = "_".join(components)
-        return hashlib.md5(key.encode()).hexdigest()
+            return build_stream_id(platform, group_info.group_id, is_group=True)
+        return build_stream_id(platform, user_info.user_id, is_group=False)  # type: ignore
 
     def get_stream_id(self, platform: str, id: str, is_group: bool = True) -> str:
         """获取聊天流ID"""
-        components = [platform, id] if is_group else [platform, id, "private"]
-        key = "_".join(components)
-        return hashlib.md5(key.encode()).hexdigest()
+        return build_stream_id(platform, id, is_group)
 
     async def get_or_create_stream(
         self, platform: str, user_info: UserInfo, group_info: Optional[GroupInfo] = None
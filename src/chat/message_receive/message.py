@@ -115,6 +115,8 @@ class MessageRecv(Message):
         self.priority_mode = "interest"
         self.priority_info = None
         self.interest_value: float = None  # type: ignore
+        self.deferred_image_ids: List[str] = []
+        """以普通优先级提交识别的图片ID，整条消息处理完后若提及了麦麦再提升优先级"""
 
         self.key_words = []
         self.key_words_lite = []
@@ -128,6 +130,23 @@ class MessageRecv(Message):
         这个方法必须在创建实例后显式调用，因为它包含异步操作。
         """
         self.processed_plain_text = await self._process_message_segments(self.message_segment)
+        self._promote_images_if_mentioned()
+
+    def _promote_images_if_mentioned(self) -> None:
+        """
+        群聊图片在处理到图片段时还不知道消息是否提及麦麦（mention_bot 段可能在后面，@与回复要从完整文本判断），
+        处理完整条消息后再判断，提及时把排队中的图片提升为优先识别
+        """
+        if not self.deferred_image_ids:
+            return
+        # 避免循环导入（utils 依赖本模块）
+        from src.chat.utils.utils import is_mentioned_bot_in_message
+
+        is_mentioned, _ = is_mentioned_bot_in_message(self)
+        if is_mentioned:
+            vlm_queue = get_image_manager().vlm_queue
+            for image_id in self.deferred_image_ids:
+                vlm_queue.promote(image_id)
 
     async def _process_single_segment(self, segment: Seg) -> str:
         """处理单个消息段
@@ -151,7 +170,10 @@ class MessageRecv(Message):
                     self.is_emoji = False
                     image_manager = get_image_manager()
                     # print(f"segment.data: {segment.data}")
-                    _, processed_text = await image_manager.process_image(segment.data)
+                    priority = self.message_info.group_info is None or bool(self.is_mentioned)
+                    image_id, processed_text = await image_manager.process_image(segment.data, priority=priority)
+                    if not priority and image_id:
+                        self.deferred_image_ids.append(image_id)
                     return processed_text
                 return "[发了一张图片，网卡了加载不出来]"
             elif segment.type == "emoji":
@@ -218,6 +240,7 @@ class MessageRecvS4U(MessageRecv):
 
     async def process(self) -> None:
         self.processed_plain_text = await self._process_message_segments(self.message_segment)
+        self._promote_images_if_mentioned()
 
     async def _process_single_segment(self, segment: Seg) -> str:
         """处理单个消息段
@@ -243,7 +266,10 @@ class MessageRecvS4U(MessageRecv):
                     self.is_emoji = False
                     image_manager = get_image_manager()
                     # print(f"segment.data: {segment.data}")
-                    _, processed_text = await image_manager.process_image(segment.data)
+                    priority = self.message_info.group_info is None or bool(self.is_mentioned)
+                    image_id, processed_text = await image_manager.process_image(segment.data, priority=priority)
+                    if not priority and image_id:
+                        self.deferred_image_ids.append(image_id)
                     return processed_text
                 return "[发了一张图片，网卡了加载不出来]"
             elif segment.type == "emoji":
@@ -0,0 +1,214 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from src.chat.message_receive.chat_stream import build_stream_id
+from src.common.logger import get_logger
+from src.config.config import global_config
+
+logger = get_logger("chat")
+
+OVERFLOW_LOG_INTERVAL = 100  # 同一聊天流每丢弃/合并多少条消息输出一次警告
+
+
+def get_chat_key(message_data: Dict[str, Any]) -> str:
+    """
+    根据原始消息计算聊天流的排队键，即该消息所属聊天流的ID（与 ChatManager 使用同一个 build_stream_id）
+    """
+    message_info = message_data.get("message_info") or {}
+    platform = str(message_info.get("platform"))
+    if group_info := message_info.get("group_info"):
+        return build_stream_id(platform, group_info.get("group_id"), is_group=True)
+    if user_info := message_info.get("user_info"):
+        return build_stream_id(platform, user_info.get("user_id"), is_group=False)
+    return platform
+
+
+def merge_message_data(queued: Dict[str, Any], incoming: Dict[str, Any]) -> None:
+    """把新消息的内容合并到排队中的消息（保留排队消息的 message_info）"""
+    segments = []
+    for message_data in (queued, incoming):
+        segment = message_data.get("message_segment")
+        if not segment:
+            continue
+        if segment.get("type") == "seglist":
+            segments.extend(segment.get("data") or [])
+        else:
+            segments.append(segment)
+    queued["message_segment"] = {"type": "seglist", "data": segments}
+    if queued.get("raw_message") and incoming.get("raw_message"):
+        queued["raw_message"] = f"{queued['raw_message']}\n{incoming['raw_message']}"
+
+
+@dataclass
+class _QueuedMessage:
+    message_data: Dict[str, Any]
+    user_id: Optional[str]
+    enqueue_time: float
+
+
+class MessageDispatcher:
+    """
+    入站消息分发器
+
+    按聊天流排队处理消息：每个有排队消息的聊天流有且只有一个处理协程，按到达顺序逐条处理该聊天流的消息；
+    所有聊天流共享一个并发上限（worker_count），同时处理的消息数不会超过该值。
+    聊天流之间互不等待，一个聊天流处理缓慢（如兴趣度计算、命令执行）只会占用一个并发名额，不会拖慢其他聊天流。
+    每处理完一条消息就重新排队获取名额，刷屏的聊天流也不会独占并发名额。
+
+    每个聊天流的排队消息数有上限，超出时按 overflow_policy 处理：
+    - drop_oldest：丢弃该聊天流最早排队的消息
+    - drop_newest：丢弃新到达的消息
+    - merge：把新消息合并到同一用户排队中的最后一条消息，没有可合并的消息时丢弃最早的消息
+
+    get_stats() 提供排队深度、正在处理的消息数、排队等待时间、丢弃与合并数量。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        worker_count: int,
+        max_pending_per_chat: int,
+        overflow_policy: str = "drop_oldest",
+    ):
+        self.handler = handler
+        self.worker_count = worker_count
+        self.max_pending_per_chat = max_pending_per_chat
+        self.overflow_policy = overflow_policy
+
+        self._chat_queues: Dict[str, Deque[_QueuedMessage]] = {}
+        """聊天流键 -> 排队中的消息"""
+        self._drain_tasks: Dict[str, asyncio.Task] = {}
+        """聊天流键 -> 该聊天流的处理协程，排队消息处理完后退出"""
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        """限制同时处理的消息数，在首次分发时创建以绑定当前事件循环"""
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.merged = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    async def dispatch(self, message_data: Dict[str, Any]) -> None:
+        """把消息放入对应聊天流的队列；未启用排队时直接处理"""
+        if self.worker_count <= 0:
+            await self.handler(message_data)
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.worker_count)
+            logger.info(f"消息分发器已启动，最多同时处理 {self.worker_count} 条消息")
+
+        chat_key = get_chat_key(message_data)
+        user_info = (message_data.get("message_info") or {}).get("user_info") or {}
+        queued = _QueuedMessage(message_data, user_info.get("user_id"), time.time())
+
+        chat_queue = self._chat_queues.get(chat_key)
+        if chat_queue is None:
+            chat_queue = self._chat_queues[chat_key] = deque()
+
+        if len(chat_queue) >= self.max_pending_per_chat > 0 and not self._handle_overflow(chat_key, chat_queue, queued):
+            return
+
+        chat_queue.append(queued)
+        self.queue_depth += 1
+        self.enqueued += 1
+        if chat_key not in self._drain_tasks:
+            self._drain_tasks[chat_key] = asyncio.create_task(self._drain(chat_key, chat_queue))
+
+    def _handle_overflow(self, chat_key: str, chat_queue: Deque[_QueuedMessage], queued: _QueuedMessage) -> bool:
+        """聊天流排队已满时按策略处理，返回新消息是否还需要入队"""
+        if self.overflow_policy == "merge" and queued.user_id is not None:
+            for previous in reversed(chat_queue):
+                if previous.user_id == queued.user_id:
+                    merge_message_data(previous.message_data, queued.message_data)
+                    self.merged += 1
+                    self._log_overflow(chat_key, "合并")
+                    return False
+
+        self.dropped += 1
+        self._log_overflow(chat_key, "丢弃")
+        if self.overflow_policy == "drop_newest":
+            return False
+        chat_queue.popleft()
+        self.queue_depth -= 1
+        return True
+
+    def _log_overflow(self, chat_key: str, action: str) -> None:
+        if (self.dropped + self.merged) % OVERFLOW_LOG_INTERVAL == 1:
+            logger.warning(
+                f"聊天流 {chat_key} 排队消息超过 {self.max_pending_per_chat} 条，按 {self.overflow_policy} 策略{action}消息"
+                f"（累计丢弃 {self.dropped} 条，合并 {self.merged} 条）"
+            )
+
+    async def _drain(self, chat_key: str, chat_queue: Deque[_QueuedMessage]) -> None:
+        """按顺序处理一个聊天流的排队消息，队列为空时退出"""
+        assert self._semaphore is not None
+        try:
+            while chat_queue:
+                # 先取得并发名额再出队，等待名额期间到达的消息仍可按溢出策略合并或丢弃
+                async with self._semaphore:
+                    if not chat_queue:
+                        break
+                    queued = chat_queue.popleft()
+                    self.queue_depth -= 1
+
+                    wait_time = time.time() - queued.enqueue_time
+                    self.total_wait_time += wait_time
+                    self.max_wait_time = max(self.max_wait_time, wait_time)
+                    self.in_flight += 1
+                    try:
+                        await self.handler(queued.message_data)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"消息处理失败: {e}")
+                        traceback.print_exc()
+                    finally:
+                        self.in_flight -= 1
+                    self.processed += 1
+        finally:
+            # 队列为空到这里之间没有 await，dispatch 看到的要么是仍在运行的处理协程，要么是已清理的聊天流
+            self._drain_tasks.pop(chat_key, None)
+            if not chat_queue:
+                del self._chat_queues[chat_key]
+
+    async def stop(self) -> None:
+        """取消所有处理协程（被取消的聊天流中剩余的排队消息会在该聊天流下次收到消息时继续处理）"""
+        tasks = list(self._drain_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # 尚未开始运行就被取消的协程不会执行自身的清理
+        self._drain_tasks.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.worker_count,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "pending_chats": len(self._chat_queues),
+            "max_chat_depth": max((len(queue) for queue in self._chat_queues.values()), default=0),
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "avg_wait_time": self.total_wait_time / self.processed if self.processed else 0.0,
+            "max_wait_time": self.max_wait_time,
+        }
+
+
+def create_message_dispatcher(handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> MessageDispatcher:
+    """按配置创建消息分发器"""
+    config = global_config.message_receive
+    return MessageDispatcher(
+        handler,
+        worker_count=config.worker_count,
+        max_pending_per_chat=config.max_pending_per_chat,
+        overflow_policy=config.overflow_policy,
+    )
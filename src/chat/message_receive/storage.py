@@ -5,6 +5,7 @@ from typing import Union
 
 from src.common.database.database_model import Messages, Images
 from src.common.logger import get_logger
+from src.common.message_cache import recent_message_cache
 from .chat_stream import ChatStream
 from .message import MessageSending, MessageRecv
 
@@ -93,7 +94,7 @@ class MessageStorage:
             # 安全地获取 user_info, 如果为 None 则视为空字典 (以防万一)
             user_info_from_chat = chat_info_dict.get("user_info") or {}
 
-            Messages.create(
+            row = Messages.create(
                 message_id=msg_id,
                 time=float(message.message_info.time),  # type: ignore
                 chat_id=chat_stream.stream_id,
@@ -130,6 +131,8 @@ class MessageStorage:
                 key_words_lite=key_words_lite,
                 selected_expressions=selected_expressions,
             )
+            # 同步到最近消息缓存，供规划器与回复器读取
+            recent_message_cache.add_message(row)
         except Exception:
             logger.exception("存储消息失败")
             logger.error(f"消息：{message}")
@@ -156,6 +159,7 @@ class MessageStorage:
             ):
                 # 更新找到的消息记录
                 Messages.update(message_id=qq_message_id).where(Messages.id == matched_message.id).execute()  # type: ignore
+                recent_message_cache.update_message_id(matched_message.chat_id, mmc_message_id, qq_message_id)
                 logger.debug(f"更新消息ID成功: {matched_message.message_id} -> {qq_message_id}")
             else:
                 logger.debug("未找到匹配的消息")
@@ -8,6 +8,7 @@ from rich.traceback import install
 from src.config.config import global_config
 from src.common.logger import get_logger
 from src.common.message_repository import find_messages, count_messages
+from src.common.message_cache import recent_message_cache
 from src.common.data_models.database_data_model import DatabaseMessages, DatabaseActionRecords
 from src.common.data_models.message_data_model import MessageAndActionModel
 from src.common.database.database_model import ActionRecords
@@ -120,6 +121,12 @@ def get_raw_msg_by_timestamp_with_chat(
     limit: 限制返回的消息数量，0为不限制
     limit_mode: 当 limit > 0 时生效。 'earliest' 表示获取最早的记录， 'latest' 表示获取最新的记录。默认为 'latest'。
     """
+    # 优先从最近消息缓存中获取，超出缓存范围时查询数据库
+    cached = recent_message_cache.get_messages(
+        chat_id, timestamp_start, timestamp_end, limit, limit_mode, filter_bot=filter_bot, filter_command=filter_command
+    )
+    if cached is not None:
+        return cached
     filter_query = {"chat_id": chat_id, "time": {"$gt": timestamp_start, "$lt": timestamp_end}}
     # 只有当 limit 为 0 时才应用外部 sort
     sort_order = [("time", 1)] if limit == 0 else None
@@ -146,6 +153,11 @@ def get_raw_msg_by_timestamp_with_chat_inclusive(
     limit: 限制返回的消息数量，0为不限制
     limit_mode: 当 limit > 0 时生效。 'earliest' 表示获取最早的记录， 'latest' 表示获取最新的记录。默认为 'latest'。
     """
+    cached = recent_message_cache.get_messages(
+        chat_id, timestamp_start, timestamp_end, limit, limit_mode, filter_bot=filter_bot, inclusive=True
+    )
+    if cached is not None:
+        return cached
     filter_query = {"chat_id": chat_id, "time": {"$gte": timestamp_start, "$lte": timestamp_end}}
     # 只有当 limit 为 0 时才应用外部 sort
     sort_order = [("time", 1)] if limit == 0 else None
@@ -286,6 +298,10 @@ def get_raw_msg_before_timestamp_with_chat(chat_id: str, timestamp: float, limit
     """获取指定时间戳之前的消息，按时间升序排序，返回消息列表
     limit: 限制返回的消息数量，0为不限制
     """
+    # 最近N条消息通常都在缓存中，缓存中不足N条时查询数据库
+    cached = recent_message_cache.get_messages(chat_id, float("-inf"), timestamp, limit)
+    if cached is not None:
+        return cached
     filter_query = {"chat_id": chat_id, "time": {"$lt": timestamp}}
     sort_order = [("time", 1)]
     return find_messages(message_filter=filter_query, sort=sort_order, limit=limit)
@@ -315,6 +331,9 @@ def num_new_messages_since(chat_id: str, timestamp_start: float = 0.0, timestamp
         # logger.warning(f"timestamp_start ({timestamp_start}) must be less than _timestamp_end ({_timestamp_end}). Returning 0.")
         return 0  # 起始时间大于等于结束时间，没有新消息
 
+    cached = recent_message_cache.get_messages(chat_id, timestamp_start, _timestamp_end)
+    if cached is not None:
+        return len(cached)
     filter_query = {"chat_id": chat_id, "time": {"$gt": timestamp_start, "$lt": _timestamp_end}}
     return count_messages(message_filter=filter_query)
 
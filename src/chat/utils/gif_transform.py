@@ -0,0 +1,75 @@
+"""
+GIF转静态拼接图的纯计算部分
+
+只依赖 PIL 与 numpy，不引用项目的日志、配置与数据库，出错时直接抛出异常，由调用方记录日志。
+"""
+
+import base64
+import io
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+
+def transform_gif(
+    gif_base64: str,
+    similarity_threshold: float,
+    max_frames: int,
+    frame_height: int,
+    compare_size: int,
+) -> Optional[str]:
+    """将GIF转换为水平拼接的静态图像, 跳过相似的帧
+
+    逐帧解码，只在小尺寸缩略图上与上一张选中帧比较（差异以 int64 向量化计算，避免 uint8 相减溢出），
+    只有选中的帧才缩放到目标尺寸，选够 max_frames 帧后不再解码剩余的帧
+
+    Args:
+        gif_base64: GIF的base64编码字符串
+        similarity_threshold: 判定帧相似的阈值 (MSE)，帧与上一张选中帧的差异超过该值才会被选中
+        max_frames: 最大抽取的帧数
+        frame_height: 拼接图中每帧的高度
+        compare_size: 比较帧差异时使用的缩略图长边像素数
+
+    Returns:
+        Optional[str]: 拼接后的JPG图像的base64编码字符串, GIF中没有帧时返回None
+    """
+    # 确保base64字符串只包含ASCII字符
+    if isinstance(gif_base64, str):
+        gif_base64 = gif_base64.encode("ascii", errors="ignore").decode("ascii")
+    gif = Image.open(io.BytesIO(base64.b64decode(gif_base64)))
+
+    # 获取第一帧的尺寸（假设所有帧尺寸一致），计算目标尺寸，保持宽高比
+    frame_width, original_height = gif.size
+    if original_height == 0:
+        raise ValueError("帧高度为0，无法计算缩放尺寸")
+    # 宽度不能是0
+    target_width = max(1, int((frame_height / original_height) * frame_width))
+
+    longest = max(frame_width, original_height)
+    thumb_size = (max(1, compare_size * frame_width // longest), max(1, compare_size * original_height // longest))
+    selected_frames = []
+    last_selected_thumb = None
+    for frame in ImageSequence.Iterator(gif):
+        thumb = np.asarray(frame.resize(thumb_size, Image.Resampling.NEAREST).convert("RGB"), dtype=np.int64)
+        if last_selected_thumb is not None:
+            diff = (thumb - last_selected_thumb).ravel()
+            # 差异（均方误差 MSE）不大就跳过这一帧
+            if np.dot(diff, diff) / diff.size <= similarity_threshold:
+                continue
+        selected_frames.append(frame.convert("RGB").resize((target_width, frame_height), Image.Resampling.LANCZOS))
+        last_selected_thumb = thumb
+        if len(selected_frames) >= max_frames:
+            break
+
+    if not selected_frames:
+        return None
+
+    # 水平拼接选中帧：(帧数, 高, 宽, 3) -> (高, 帧数*宽, 3)
+    stack = np.stack([np.asarray(frame) for frame in selected_frames])
+    combined = stack.transpose(1, 0, 2, 3).reshape(frame_height, len(selected_frames) * target_width, 3)
+    combined_image = Image.fromarray(np.ascontiguousarray(combined))
+
+    buffer = io.BytesIO()
+    combined_image.save(buffer, format="JPEG", quality=85)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
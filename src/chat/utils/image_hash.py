@@ -0,0 +1,160 @@
+import io
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.common.logger import get_logger
+
+logger = get_logger("chat_image")
+
+DHASH_SIZE = 8  # dHash边长，哈希为 DHASH_SIZE*DHASH_SIZE=64 位
+HASH_BANDS = 8  # 多索引分段数：64位哈希切成8段，每段8位，汉明距离小于8的两个哈希至少有一段完全相同
+NEAR_DUPLICATE_MAX_DISTANCE = 3  # 汉明距离不超过该值的图片才作为近似重复的候选（重新压缩、缩放后通常不超过2）
+MIN_HASH_BITS = 8  # 置位数过少/过多的哈希来自纯色等平坦图片，彼此之间容易误判，只做精确匹配
+THUMBNAIL_SIZE = 32  # 二次校验用的灰度缩略图边长
+THUMBNAIL_MAX_DIFF = 16  # 缩略图逐像素灰度差的最大值不超过该值才视为同一张图
+DRAFT_SIZE = 256  # JPEG 解码时缩小到不低于该尺寸；缩得太小会使缩略图的区域平均失准，同一张图的差异变大
+# 同一模板换了配字的表情包在64位dHash上往往只差几位，仅靠汉明距离会把旧配字的描述复用到新图上；
+# 配字改动集中在局部，缩略图上对应区域的灰度差明显大于重新压缩/缩放带来的差异
+
+
+class ImageFingerprint(NamedTuple):
+    """图片的感知指纹：dHash用于分段索引查找候选，灰度缩略图用于二次校验"""
+
+    dhash: int
+    thumbnail: np.ndarray
+
+
+def compute_fingerprint(image_bytes: bytes) -> Optional[ImageFingerprint]:
+    """
+    计算图片的感知指纹（CPU密集，调用方应在线程中执行）
+
+    dHash：缩放为灰度 9x8 后比较水平相邻像素的明暗；缩略图：按区域平均缩放为 THUMBNAIL_SIZE 见方的灰度图。
+    JPEG 通过 draft 在解码时直接按比例缩小，不必解码整张大图
+    Returns:
+        Optional[ImageFingerprint]: 动图或无法解码时返回None（动图只做精确匹配，避免与其首帧的静态图混淆）
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            if getattr(image, "n_frames", 1) > 1:
+                return None
+            image.draft("L", (DRAFT_SIZE, DRAFT_SIZE))
+            gray = image.convert("L")
+            pixels = gray.resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS).tobytes()
+            thumbnail = np.asarray(gray.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BOX), dtype=np.int16)
+    except Exception as e:
+        logger.debug(f"计算图片感知哈希失败: {e}")
+        return None
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col + 1] > pixels[offset + col])
+    return ImageFingerprint(value, thumbnail)
+
+
+class ImageHashIndex:
+    """
+    图片描述的内存缓存
+
+    以MD5为键保存最近的图片描述（LRU），并按dHash分段建立多索引：
+    MD5未命中时，在与其dHash至少有一段相同的图片中按汉明距离从小到大查找不超过阈值的候选，
+    候选还需通过缩略图的二次校验才视为近似重复，
+    使同一张图的不同压缩版本也能复用已有描述，不必再查询数据库或请求VLM。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+        max_thumbnail_diff: int = THUMBNAIL_MAX_DIFF,
+    ):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.max_thumbnail_diff = max_thumbnail_diff
+        self._entries: OrderedDict[str, Tuple[Optional[ImageFingerprint], str]] = OrderedDict()
+        """MD5 -> (感知指纹, 描述)"""
+        self._bands: Dict[Tuple[int, int], Set[str]] = {}
+        """(段序号, 段的值) -> MD5集合"""
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.rejected_candidates = 0
+        """dHash接近但缩略图校验未通过的候选数"""
+        self.misses = 0
+
+    @staticmethod
+    def _band_keys(dhash: int):
+        band_bits = 64 // HASH_BANDS
+        mask = (1 << band_bits) - 1
+        return [(band, (dhash >> (band * band_bits)) & mask) for band in range(HASH_BANDS)]
+
+    @staticmethod
+    def _indexable(fingerprint: Optional[ImageFingerprint]) -> bool:
+        return fingerprint is not None and MIN_HASH_BITS <= fingerprint.dhash.bit_count() <= 64 - MIN_HASH_BITS
+
+    def get(self, md5: str, fingerprint: Optional[ImageFingerprint]) -> Tuple[Optional[str], bool]:
+        """
+        查找图片的描述，先按MD5精确匹配，再按感知指纹查找近似重复的图片
+        Returns:
+            Tuple[Optional[str], bool]: (描述, 是否为近似重复命中)，未命中时描述为None
+        """
+        if entry := self._entries.get(md5):
+            self._entries.move_to_end(md5)
+            self.exact_hits += 1
+            return entry[1], False
+        if self._indexable(fingerprint):
+            dhash = fingerprint.dhash  # type: ignore
+            candidates = []
+            for candidate in set().union(*(self._bands.get(key, ()) for key in self._band_keys(dhash))):
+                distance = (self._entries[candidate][0].dhash ^ dhash).bit_count()  # type: ignore
+                if distance <= self.max_distance:
+                    candidates.append((distance, candidate))
+            for distance, candidate in sorted(candidates):
+                candidate_fingerprint, description = self._entries[candidate]
+                diff = int(np.abs(candidate_fingerprint.thumbnail - fingerprint.thumbnail).max())  # type: ignore
+                if diff > self.max_thumbnail_diff:
+                    self.rejected_candidates += 1
+                    logger.debug(
+                        f"[感知哈希] 图片 {md5[:8]} 与 {candidate[:8]} 哈希接近但缩略图差异 {diff}，不复用描述"
+                    )
+                    continue
+                self._entries.move_to_end(candidate)
+                self.near_hits += 1
+                logger.debug(
+                    f"[感知哈希] 图片 {md5[:8]} 与 {candidate[:8]} 近似重复（汉明距离 {distance}，缩略图差异 {diff}）"
+                )
+                return description, True
+        self.misses += 1
+        return None, False
+
+    def put(self, md5: str, fingerprint: Optional[ImageFingerprint], description: str) -> None:
+        if self.max_size <= 0 or not description:
+            return
+        if md5 in self._entries:
+            self._remove(md5)
+        self._entries[md5] = (fingerprint, description)
+        if self._indexable(fingerprint):
+            for key in self._band_keys(fingerprint.dhash):  # type: ignore
+                self._bands.setdefault(key, set()).add(md5)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, md5: str) -> None:
+        fingerprint, _ = self._entries.pop(md5)
+        if self._indexable(fingerprint):
+            for key in self._band_keys(fingerprint.dhash):  # type: ignore
+                if bucket := self._bands.get(key):
+                    bucket.discard(md5)
+                    if not bucket:
+                        del self._bands[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "rejected_candidates": self.rejected_candidates,
+            "misses": self.misses,
+        }
@@ -10,6 +10,8 @@ from src.common.database.database import db
 from src.common.database.database_model import OnlineTime, LLMUsage, Messages
 from src.manager.async_task_manager import AsyncTask
 from src.manager.local_store_manager import local_storage
+from src.llm_models.utils import llm_usage_recorder
+from src.llm_models.model_client.base_client import client_registry
 
 logger = get_logger("maibot_statistic")
 
@@ -192,6 +194,10 @@ class StatisticOutputTask(AsyncTask):
             self._format_model_classified_stat(stats["last_hour"]),
             "",
             self._format_chat_stat(stats["last_hour"]),
+            self._format_live_model_stat(),
+            self._format_provider_stat(),
+            self._format_message_dispatch_stat(),
+            self._format_knowledge_cache_stat(),
             self.SEP_LINE,
             "",
         ]
@@ -322,6 +328,7 @@ class StatisticOutputTask(AsyncTask):
             for period_key, _ in collect_period
         }
 
+        # 使用记录批量延迟落库，最近几秒内尚未写入的记录体现在控制台输出的实时计数中
         # 以最早的时间戳为起始时间获取记录
         # Assuming LLMUsage.timestamp is a DateTimeField
         query_start_time = collect_period[-1][1]
@@ -658,6 +665,111 @@ class StatisticOutputTask(AsyncTask):
         output.append("")
         return "\n".join(output)
 
+    @staticmethod
+    def _format_live_model_stat() -> str:
+        """
+        格式化LLM使用记录器在内存中维护的按模型实时计数（自本次启动以来，含尚未落库的记录）
+        """
+        model_stats = llm_usage_recorder.get_model_stats()
+        if not model_stats:
+            return ""
+        data_fmt = "{:<32}  {:>10}  {:>12}  {:>12}  {:>12}  {:>9.2f}¥  {:>10.1f}"
+
+        output = [
+            f"本次启动以来按模型实时统计 (自{llm_usage_recorder.start_time.strftime('%Y-%m-%d %H:%M:%S')}开始):",
+            " 模型名称                          调用次数    输入Token     输出Token     Token总量     累计花费    平均耗时(秒)",
+        ]
+        for model_name, stats in sorted(model_stats.items()):
+            name = f"{model_name[:29]}..." if len(model_name) > 32 else model_name
+            requests = int(stats["requests"])
+            output.append(
+                data_fmt.format(
+                    name,
+                    requests,
+                    int(stats["prompt_tokens"]),
+                    int(stats["completion_tokens"]),
+                    int(stats["total_tokens"]),
+                    stats["cost"],
+                    stats["time_cost"] / requests if requests else 0.0,
+                )
+            )
+        if llm_usage_recorder.dropped_count:
+            output.append(f" 缓冲区溢出丢弃的记录数: {llm_usage_recorder.dropped_count}")
+
+        output.append("")
+        return "\n".join(output)
+
+    @staticmethod
+    def _format_provider_stat() -> str:
+        """
+        格式化各API提供商的并发与排队实时数据（自本次启动以来）
+        """
+        metrics = client_registry.get_metrics()
+        if not any(item["total_requests"] for item in metrics.values()):
+            return ""
+        data_fmt = "{:<32}  {:>10}  {:>10}  {:>10}  {:>10}  {:>12.2f}"
+
+        output = [
+            "API提供商并发统计:",
+            " 提供商名称                        最大并发    进行中      排队中      累计请求    平均排队(秒)",
+        ]
+        for name, item in sorted(metrics.items()):
+            max_concurrency = int(item["max_concurrency"]) or "不限"
+            output.append(
+                data_fmt.format(
+                    name[:32],
+                    max_concurrency,
+                    int(item["in_flight"]),
+                    int(item["queued"]),
+                    int(item["total_requests"]),
+                    item["avg_wait_time"],
+                )
+            )
+        output.append("")
+        return "\n".join(output)
+
+    @staticmethod
+    def _format_message_dispatch_stat() -> str:
+        """
+        格式化入站消息排队的实时统计数据（自启动以来）
+        """
+        from src.chat.message_receive.bot import chat_bot
+
+        stats = chat_bot.message_dispatcher.get_stats()
+        if stats["enqueued"] <= 0:
+            return ""
+        output = [
+            "消息处理排队:",
+            f" 正在处理 {stats['in_flight']}/{stats['max_concurrency']} 条，"
+            f"排队 {stats['queue_depth']} 条（{stats['pending_chats']} 个聊天流，单个聊天流最多 {stats['max_chat_depth']} 条）",
+            f" 已处理 {stats['processed']} 条，丢弃 {stats['dropped']} 条，合并 {stats['merged']} 条，"
+            f"平均排队 {stats['avg_wait_time']:.2f}秒，最长排队 {stats['max_wait_time']:.2f}秒",
+            "",
+        ]
+        return "\n".join(output)
+
+    @staticmethod
+    def _format_knowledge_cache_stat() -> str:
+        """
+        格式化知识库问答缓存（问题嵌入LRU与检索结果语义缓存）的实时命中统计（自启动以来）
+        """
+        from src.chat import knowledge
+
+        if knowledge.qa_manager is None:
+            return ""
+        stats = knowledge.qa_manager.cache.get_stats()
+        if stats["embedding_hits"] + stats["embedding_misses"] + stats["result_hits"] + stats["result_misses"] <= 0:
+            return ""
+        output = [
+            "知识库问答缓存:",
+            f" 问题嵌入缓存 命中 {stats['embedding_hits']} 次，未命中 {stats['embedding_misses']} 次，"
+            f"命中率 {stats['embedding_hit_rate']:.1%}，当前 {stats['embedding_size']} 条",
+            f" 检索结果缓存 命中 {stats['result_hits']} 次，未命中 {stats['result_misses']} 次，"
+            f"命中率 {stats['result_hit_rate']:.1%}，当前 {stats['result_size']} 条",
+            "",
+        ]
+        return "\n".join(output)
+
     def _get_chat_display_name_from_id(self, chat_id: str) -> str:
         """从chat_id获取显示名称"""
         try:
@@ -1137,14 +1249,21 @@ class StatisticOutputTask(AsyncTask):
             ("48h", 48, 30),  # 48小时，30分钟间隔
         ]
 
+        # 只按最长的时间范围查询一次记录，各时间范围共用
+        query_start_time = now - timedelta(hours=max(hours for _, hours, _ in time_ranges))
+        llm_records = list(LLMUsage.select().where(LLMUsage.timestamp >= query_start_time))  # type: ignore
+        messages = list(Messages.select().where(Messages.time >= query_start_time.timestamp()))  # type: ignore
+
         for range_key, hours, interval_minutes in time_ranges:
-            range_data = self._collect_interval_data(now, hours, interval_minutes)
+            range_data = self._collect_interval_data(now, hours, interval_minutes, llm_records, messages)
             chart_data[range_key] = range_data
 
         return chart_data
 
-    def _collect_interval_data(self, now: datetime, hours: int, interval_minutes: int) -> dict:
-        """收集指定时间范围内每个间隔的数据"""
+    def _collect_interval_data(
+        self, now: datetime, hours: int, interval_minutes: int, llm_records: List[LLMUsage], messages: List[Messages]
+    ) -> dict:
+        """收集指定时间范围内每个间隔的数据（llm_records 与 messages 需覆盖该时间范围，范围外的记录被忽略）"""
         # 生成时间点
         start_time = now - timedelta(hours=hours)
         time_points = []
@@ -1163,9 +1282,8 @@ class StatisticOutputTask(AsyncTask):
 
         interval_seconds = interval_minutes * 60
 
-        # 查询LLM使用记录
-        query_start_time = start_time
-        for record in LLMUsage.select().where(LLMUsage.timestamp >= query_start_time):  # type: ignore
+        # 统计LLM使用记录
+        for record in llm_records:
             record_time = record.timestamp
 
             # 找到对应的时间间隔索引
@@ -1190,9 +1308,9 @@ class StatisticOutputTask(AsyncTask):
                     cost_by_module[module_name] = [0] * len(time_points)
                 cost_by_module[module_name][interval_index] += cost
 
-        # 查询消息记录
+        # 统计消息记录
         query_start_timestamp = start_time.timestamp()
-        for message in Messages.select().where(Messages.time >= query_start_timestamp):  # type: ignore
+        for message in messages:
             message_time_ts = message.time
 
             # 找到对应的时间间隔索引
@@ -1585,11 +1703,29 @@ class AsyncStatisticOutputTask(AsyncTask):
     def _format_chat_stat(self, stats: Dict[str, Any]) -> str:
         return StatisticOutputTask._format_chat_stat(self, stats)  # type: ignore
 
+    @staticmethod
+    def _format_live_model_stat() -> str:
+        return StatisticOutputTask._format_live_model_stat()
+
+    @staticmethod
+    def _format_provider_stat() -> str:
+        return StatisticOutputTask._format_provider_stat()
+
+    @staticmethod
+    def _format_message_dispatch_stat() -> str:
+        return StatisticOutputTask._format_message_dispatch_stat()
+
+    @staticmethod
+    def _format_knowledge_cache_stat() -> str:
+        return StatisticOutputTask._format_knowledge_cache_stat()
+
     def _generate_chart_data(self, stat: dict[str, Any]) -> dict:
         return StatisticOutputTask._generate_chart_data(self, stat)  # type: ignore
 
-    def _collect_interval_data(self, now: datetime, hours: int, interval_minutes: int) -> dict:
-        return StatisticOutputTask._collect_interval_data(self, now, hours, interval_minutes)  # type: ignore
+    def _collect_interval_data(
+        self, now: datetime, hours: int, interval_minutes: int, llm_records: List[LLMUsage], messages: List[Messages]
+    ) -> dict:
+        return StatisticOutputTask._collect_interval_data(self, now, hours, interval_minutes, llm_records, messages)  # type: ignore
 
     def _generate_chart_tab(self, chart_data: dict) -> str:
         return StatisticOutputTask._generate_chart_tab(self, chart_data)  # type: ignore
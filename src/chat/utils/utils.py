@@ -7,7 +7,7 @@ import ast
 import numpy as np
 
 from collections import Counter
-from typing import Optional, Tuple, List, TYPE_CHECKING
+from typing import Dict, Optional, Tuple, List, TYPE_CHECKING
 
 from src.common.logger import get_logger
 from src.common.data_models.database_data_model import DatabaseMessages
@@ -113,10 +113,16 @@ def is_mentioned_bot_in_message(message: MessageRecv) -> tuple[bool, float]:
     return is_mentioned, reply_probability
 
 
+_embedding_requests: Dict[str, LLMRequest] = {}
+"""request_type -> LLMRequest，复用同一实例以共享负载均衡状态（客户端连接池由client_registry按事件循环复用）"""
+
+
 async def get_embedding(text, request_type="embedding") -> Optional[List[float]]:
     """获取文本的embedding向量"""
-    # 每次都创建新的LLMRequest实例以避免事件循环冲突
-    llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type=request_type)
+    llm = _embedding_requests.get(request_type)
+    if llm is None:
+        llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type=request_type)
+        _embedding_requests[request_type] = llm
     try:
         embedding, _ = await llm.get_embedding(text)
     except Exception as e:
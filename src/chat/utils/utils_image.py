@@ -5,14 +5,16 @@ import hashlib
 import uuid
 import io
 import asyncio
-import numpy as np
+import itertools
 
-from typing import Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from PIL import Image
 from rich.traceback import install
 
 from src.common.logger import get_logger
 from src.common.database.database import db
+from src.chat.utils import gif_transform
+from src.chat.utils.image_hash import ImageFingerprint, ImageHashIndex, compute_fingerprint
 from src.common.database.database_model import Images, ImageDescriptions
 from src.config.config import global_config, model_config
 from src.llm_models.utils_model import LLMRequest
@@ -21,6 +23,127 @@ install(extra_lines=3)
 
 logger = get_logger("chat_image")
 
+VLM_QUEUE_WORKERS = 2  # 同时进行的图片识别请求数
+VLM_QUEUE_MAX_SIZE = 256  # 排队等待识别的图片数上限，超出后新的普通优先级图片不再识别
+DESCRIPTION_CACHE_SIZE = 4096  # 每种描述类型在内存中缓存的图片数
+GIF_MAX_FRAMES = 15  # GIF转换为静态图时最多抽取的帧数
+GIF_FRAME_HEIGHT = 200  # 拼接图中每帧的高度
+GIF_SIMILARITY_THRESHOLD = 1000.0  # 帧与上一张选中帧的均方误差超过该值才会被选中
+GIF_COMPARE_SIZE = 64  # 比较帧差异时使用的缩略图长边像素数
+
+
+class VLMTaskQueue:
+    """
+    后台图片识别队列
+
+    接收消息时只登记图片并返回 [picid:...] 占位符，识别在后台按优先级（被提及/私聊优先）进行，
+    同一图片（按哈希）排队或识别中时不会重复提交。识别结果写入数据库，
+    构建聊天记录时按 picid 读取，识别完成前显示为“内容正在阅读”。
+    群聊消息是否提及麦麦要在整条消息处理完后才能确定，届时可通过 promote 提升已排队图片的优先级。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str], Awaitable[None]],
+        workers: int = VLM_QUEUE_WORKERS,
+        max_size: int = VLM_QUEUE_MAX_SIZE,
+    ):
+        self._handler = handler
+        self._worker_count = workers
+        self._max_size = max_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        """排队或识别中的图片哈希"""
+        self._queued: Dict[str, Tuple[int, str, str]] = {}
+        """排队中的图片ID -> (当前优先级, 哈希, base64)；队列中优先级与之不符的条目是提升优先级前留下的，取出时跳过"""
+        self._seq = itertools.count()
+        self.processed = 0
+        """已完成识别的图片数"""
+        self.dropped = 0
+        """因队列已满未识别的图片数"""
+
+    def _ensure_workers(self) -> asyncio.PriorityQueue:
+        """在当前事件循环中启动工作协程（首次提交时启动）"""
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.PriorityQueue()
+            self._pending.clear()
+            self._queued.clear()
+            self._workers = [loop.create_task(self._worker(self._queue)) for _ in range(self._worker_count)]
+        return self._queue
+
+    def submit(self, image_hash: str, image_id: str, image_base64: str, priority: bool = False) -> bool:
+        """
+        提交一张图片等待识别
+        Args:
+            priority: 是否优先识别（被提及或私聊中的图片）
+        Returns:
+            bool: 是否加入了队列（重复或队列已满时为False）
+        """
+        if image_hash in self._pending:
+            if priority:
+                self.promote(image_id)
+            return False
+        queue = self._ensure_workers()
+        if not priority and len(self._queued) >= self._max_size:
+            self.dropped += 1
+            logger.warning(f"图片识别队列已满（{len(self._queued)}），跳过图片 {image_id}")
+            return False
+        self._pending.add(image_hash)
+        self._put(queue, 0 if priority else 1, image_hash, image_id, image_base64)
+        return True
+
+    def _put(self, queue: asyncio.PriorityQueue, priority: int, image_hash: str, image_id: str, image_base64: str):
+        self._queued[image_id] = (priority, image_hash, image_base64)
+        queue.put_nowait((priority, next(self._seq), image_hash, image_id, image_base64))
+
+    def promote(self, image_id: str) -> bool:
+        """
+        把仍在排队的图片提升为优先识别
+        Returns:
+            bool: 是否提升了优先级（不在排队中或已是优先时为False）
+        """
+        entry = self._queued.get(image_id)
+        if entry is None or entry[0] == 0 or self._queue is None:
+            return False
+        _, image_hash, image_base64 = entry
+        self._put(self._queue, 0, image_hash, image_id, image_base64)
+        return True
+
+    async def _worker(self, queue: asyncio.PriorityQueue) -> None:
+        while True:
+            priority, _, image_hash, image_id, image_base64 = await queue.get()
+            entry = self._queued.get(image_id)
+            if entry is None or entry[0] != priority:
+                # 提升优先级前留下的旧条目
+                queue.task_done()
+                continue
+            del self._queued[image_id]
+            try:
+                await self._handler(image_id, image_base64)
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"后台识别图片 {image_id} 失败: {e}")
+            finally:
+                self._pending.discard(image_hash)
+                queue.task_done()
+
+    async def join(self) -> None:
+        """等待当前排队的图片全部识别完成"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queued),
+            "pending": len(self._pending),
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+
 
 class ImageManager:
     _instance = None
@@ -38,6 +161,12 @@ class ImageManager:
 
             self._initialized = True
             self.vlm = LLMRequest(model_set=model_config.model_task_config.vlm, request_type="image")
+            self.vlm_queue = VLMTaskQueue(self._process_image_with_vlm)
+            self.description_index: Dict[str, ImageHashIndex] = {
+                "image": ImageHashIndex(DESCRIPTION_CACHE_SIZE),
+                "emoji": ImageHashIndex(DESCRIPTION_CACHE_SIZE),
+            }
+            """描述类型 -> 图片描述的内存缓存（按MD5与感知哈希查找）"""
 
             try:
                 db.connect(reuse_if_open=True)
@@ -92,9 +221,32 @@ class ImageManager:
                 desc_obj.save()
         except Exception as e:
             logger.error(f"保存描述到数据库失败 (Peewee): {str(e)}")
-            
+
+    def _get_description_from_index(
+        self, image_hash: str, image_fingerprint: Optional[ImageFingerprint], description_type: str
+    ) -> Optional[str]:
+        """从内存缓存获取图片描述，先按MD5精确匹配，再按感知指纹匹配近似重复的图片
+
+        近似重复命中时把描述以当前图片的MD5写入数据库，重启后同一图片可直接从数据库读取
+
+        Args:
+            image_hash: 图片MD5
+            image_fingerprint: 图片的感知指纹，无法计算时为None（只做精确匹配）
+            description_type: 描述类型 ('emoji' 或 'image')
+
+        Returns:
+            Optional[str]: 描述文本，如果不存在则返回None
+        """
+        index = self.description_index[description_type]
+        description, is_near_duplicate = index.get(image_hash, image_fingerprint)
+        if description is not None and is_near_duplicate:
+            self._save_description_to_db(image_hash, description, description_type)
+            index.put(image_hash, image_fingerprint, description)
+        return description
+
     async def get_emoji_tag(self, image_base64: str) -> str:
         from src.chat.emoji_system.emoji_manager import get_emoji_manager
+
         emoji_manager = get_emoji_manager()
         if isinstance(image_base64, str):
             image_base64 = image_base64.encode("ascii", errors="ignore").decode("ascii")
@@ -117,10 +269,12 @@ class ImageManager:
             image_bytes = base64.b64decode(image_base64)
             image_hash = hashlib.md5(image_bytes).hexdigest()
             image_format = Image.open(io.BytesIO(image_bytes)).format.lower()  # type: ignore
+            image_fingerprint = await asyncio.to_thread(compute_fingerprint, image_bytes)
 
             # 优先使用EmojiManager查询已注册表情包的描述
             try:
                 from src.chat.emoji_system.emoji_manager import get_emoji_manager
+
                 emoji_manager = get_emoji_manager()
                 tags = await emoji_manager.get_emoji_tag_by_hash(image_hash)
                 if tags:
@@ -130,16 +284,22 @@ class ImageManager:
             except Exception as e:
                 logger.debug(f"查询EmojiManager时出错: {e}")
 
+            # 查询内存缓存（包括同一表情包重新压缩后的近似重复图片）
+            if cached_description := self._get_description_from_index(image_hash, image_fingerprint, "emoji"):
+                logger.info(f"[缓存命中] 使用内存中的表情包描述: {cached_description[:50]}...")
+                return f"[表情包：{cached_description}]"
+
             # 查询ImageDescriptions表的缓存描述
             if cached_description := self._get_description_from_db(image_hash, "emoji"):
                 logger.info(f"[缓存命中] 使用ImageDescriptions表中的描述: {cached_description[:50]}...")
+                self.description_index["emoji"].put(image_hash, image_fingerprint, cached_description)
                 return f"[表情包：{cached_description}]"
 
             # === 二步走识别流程 ===
 
             # 第一步：VLM视觉分析 - 生成详细描述
             if image_format in ["gif", "GIF"]:
-                image_base64_processed = self.transform_gif(image_base64)
+                image_base64_processed = await self.transform_gif_async(image_base64)
                 if image_base64_processed is None:
                     logger.warning("GIF转换失败，无法获取描述")
                     return "[表情包(GIF处理失败)]"
@@ -197,6 +357,7 @@ class ImageManager:
 
             if cached_description := self._get_description_from_db(image_hash, "emoji"):
                 logger.warning(f"虽然生成了描述，但是找到缓存表情包描述: {cached_description}")
+                self.description_index["emoji"].put(image_hash, image_fingerprint, cached_description)
                 return f"[表情包：{cached_description}]"
 
             # 保存表情包文件和元数据（用于可能的后续分析）
@@ -232,6 +393,7 @@ class ImageManager:
 
             # 保存最终的情感标签到缓存 (ImageDescriptions表)
             self._save_description_to_db(image_hash, final_emotion, "emoji")
+            self.description_index["emoji"].put(image_hash, image_fingerprint, final_emotion)
 
             return f"[表情包：{final_emotion}]"
 
@@ -247,8 +409,14 @@ class ImageManager:
                 image_base64 = image_base64.encode("ascii", errors="ignore").decode("ascii")
             image_bytes = base64.b64decode(image_base64)
             image_hash = hashlib.md5(image_bytes).hexdigest()
+            image_fingerprint = await asyncio.to_thread(compute_fingerprint, image_bytes)
 
-            # 优先检查Images表中是否已有完整的描述
+            # 优先查询内存缓存（包括同一图片重新压缩后的近似重复图片）
+            if cached_description := self._get_description_from_index(image_hash, image_fingerprint, "image"):
+                logger.debug(f"[缓存命中] 使用内存中的图片描述: {cached_description[:50]}...")
+                return f"[图片：{cached_description}]"
+
+            # 检查Images表中是否已有完整的描述
             existing_image = Images.get_or_none(Images.emoji_hash == image_hash)
             if existing_image:
                 # 更新计数
@@ -261,10 +429,12 @@ class ImageManager:
                 # 如果已有描述，直接返回
                 if existing_image.description:
                     logger.debug(f"[缓存命中] 使用Images表中的图片描述: {existing_image.description[:50]}...")
+                    self.description_index["image"].put(image_hash, image_fingerprint, existing_image.description)
                     return f"[图片：{existing_image.description}]"
 
             if cached_description := self._get_description_from_db(image_hash, "image"):
                 logger.debug(f"[缓存命中] 使用ImageDescriptions表中的描述: {cached_description[:50]}...")
+                self.description_index["image"].put(image_hash, image_fingerprint, cached_description)
                 return f"[图片：{cached_description}]"
 
             # 调用AI获取描述
@@ -319,6 +489,7 @@ class ImageManager:
 
             # 保存描述到ImageDescriptions表作为备用缓存
             self._save_description_to_db(image_hash, description, "image")
+            self.description_index["image"].put(image_hash, image_fingerprint, description)
 
             logger.info(f"[VLM完成] 图片描述生成: {description[:50]}...")
             return f"[图片：{description}]"
@@ -327,10 +498,13 @@ class ImageManager:
             return "[图片(处理失败)]"
 
     @staticmethod
-    def transform_gif(gif_base64: str, similarity_threshold: float = 1000.0, max_frames: int = 15) -> Optional[str]:
-        # sourcery skip: use-contextlib-suppress
+    def transform_gif(
+        gif_base64: str, similarity_threshold: float = GIF_SIMILARITY_THRESHOLD, max_frames: int = GIF_MAX_FRAMES
+    ) -> Optional[str]:
         """将GIF转换为水平拼接的静态图像, 跳过相似的帧
 
+        该方法是纯CPU计算，在事件循环中应使用 transform_gif_async。
+
         Args:
             gif_base64: GIF的base64编码字符串
             similarity_threshold: 判定帧相似的阈值 (MSE)，越小表示要求差异越大才算不同帧，默认1000.0
@@ -340,106 +514,12 @@ class ImageManager:
             Optional[str]: 拼接后的JPG图像的base64编码字符串, 或者在失败时返回None
         """
         try:
-            # 确保base64字符串只包含ASCII字符
-            if isinstance(gif_base64, str):
-                gif_base64 = gif_base64.encode("ascii", errors="ignore").decode("ascii")
-            # 解码base64
-            gif_data = base64.b64decode(gif_base64)
-            gif = Image.open(io.BytesIO(gif_data))
-
-            # 收集所有帧
-            all_frames = []
-            try:
-                while True:
-                    gif.seek(len(all_frames))
-                    # 确保是RGB格式方便比较
-                    frame = gif.convert("RGB")
-                    all_frames.append(frame.copy())
-            except EOFError:
-                pass  # 读完啦
-
-            if not all_frames:
+            result = gif_transform.transform_gif(
+                gif_base64, similarity_threshold, max_frames, GIF_FRAME_HEIGHT, GIF_COMPARE_SIZE
+            )
+            if result is None:
                 logger.warning("GIF中没有找到任何帧")
-                return None  # 空的GIF直接返回None
-
-            # --- 新的帧选择逻辑 ---
-            selected_frames = []
-            last_selected_frame_np = None
-
-            for i, current_frame in enumerate(all_frames):
-                current_frame_np = np.array(current_frame)
-
-                # 第一帧总是要选的
-                if i == 0:
-                    selected_frames.append(current_frame)
-                    last_selected_frame_np = current_frame_np
-                    continue
-
-                # 计算和上一张选中帧的差异（均方误差 MSE）
-                if last_selected_frame_np is not None:
-                    mse = np.mean((current_frame_np - last_selected_frame_np) ** 2)
-                    # logger.debug(f"帧 {i} 与上一选中帧的 MSE: {mse}") # 可以取消注释来看差异值
-
-                    # 如果差异够大，就选它！
-                    if mse > similarity_threshold:
-                        selected_frames.append(current_frame)
-                        last_selected_frame_np = current_frame_np
-                        # 检查是不是选够了
-                        if len(selected_frames) >= max_frames:
-                            # logger.debug(f"已选够 {max_frames} 帧，停止选择。")
-                            break
-                # 如果差异不大就跳过这一帧啦
-
-            # --- 帧选择逻辑结束 ---
-
-            # 如果选择后连一帧都没有（比如GIF只有一帧且后续处理失败？）或者原始GIF就没帧，也返回None
-            if not selected_frames:
-                logger.warning("处理后没有选中任何帧")
-                return None
-
-            # logger.debug(f"总帧数: {len(all_frames)}, 选中帧数: {len(selected_frames)}")
-
-            # 获取选中的第一帧的尺寸（假设所有帧尺寸一致）
-            frame_width, frame_height = selected_frames[0].size
-
-            # 计算目标尺寸，保持宽高比
-            target_height = 200  # 固定高度
-            # 防止除以零
-            if frame_height == 0:
-                logger.error("帧高度为0，无法计算缩放尺寸")
-                return None
-            target_width = int((target_height / frame_height) * frame_width)
-            # 宽度也不能是0
-            if target_width == 0:
-                logger.warning(f"计算出的目标宽度为0 (原始尺寸 {frame_width}x{frame_height})，调整为1")
-                target_width = 1
-
-            # 调整所有选中帧的大小
-            resized_frames = [
-                frame.resize((target_width, target_height), Image.Resampling.LANCZOS) for frame in selected_frames
-            ]
-
-            # 创建拼接图像
-            total_width = target_width * len(resized_frames)
-            # 防止总宽度为0
-            if total_width == 0 and resized_frames:
-                logger.warning("计算出的总宽度为0，但有选中帧，可能目标宽度太小")
-                # 至少给点宽度吧
-                total_width = len(resized_frames)
-            elif total_width == 0:
-                logger.error("计算出的总宽度为0且无选中帧")
-                return None
-
-            combined_image = Image.new("RGB", (total_width, target_height))
-
-            # 水平拼接图像
-            for idx, frame in enumerate(resized_frames):
-                combined_image.paste(frame, (idx * target_width, 0))
-
-            # 转换为base64
-            buffer = io.BytesIO()
-            combined_image.save(buffer, format="JPEG", quality=85)  # 保存为JPEG
-            return base64.b64encode(buffer.getvalue()).decode("utf-8")
+            return result
         except MemoryError:
             logger.error("GIF转换失败: 内存不足，可能是GIF太大或帧数太多")
             return None  # 内存不够啦
@@ -447,12 +527,24 @@ class ImageManager:
             logger.error(f"GIF转换失败: {str(e)}", exc_info=True)  # 记录详细错误信息
             return None  # 其他错误也返回None
 
-    async def process_image(self, image_base64: str) -> Tuple[str, str]:
+    async def transform_gif_async(self, gif_base64: str, max_frames: int = GIF_MAX_FRAMES) -> Optional[str]:
+        """
+        在线程中执行 transform_gif，避免大尺寸动图的解码与拼接阻塞事件循环
+
+        PIL 的解码、缩放与 numpy 的大数组运算会释放GIL。不使用进程池：
+        spawn/forkserver 的子进程会重新导入 bot.py（初始化日志、配置与数据库），fork 则会复制已有多个线程的进程
+        """
+        return await asyncio.to_thread(ImageManager.transform_gif, gif_base64, GIF_SIMILARITY_THRESHOLD, max_frames)
+
+    async def process_image(self, image_base64: str, priority: bool = False) -> Tuple[str, str]:
         # sourcery skip: hoist-if-from-if
         """处理图片并返回图片ID和描述
 
+        新图片只登记并提交到后台识别队列，立即返回 [picid:...] 占位符，描述在识别完成后写入数据库
+
         Args:
             image_base64: 图片的base64编码
+            priority: 是否优先识别（被提及或私聊中的图片）
 
         Returns:
             Tuple[str, str]: (图片ID, 描述)
@@ -486,6 +578,9 @@ class ImageManager:
 
                 existing_image.count += 1
                 existing_image.save()
+                if not existing_image.vlm_processed:
+                    # 之前的识别未完成（如队列已满被跳过或进程重启），重新提交；识别中的图片不会重复提交
+                    self.vlm_queue.submit(image_hash, existing_image.image_id, image_base64, priority)
                 return existing_image.image_id, f"[picid:{existing_image.image_id}]"
             else:
                 # print(f"图片不存在: {image_hash}")
@@ -502,19 +597,27 @@ class ImageManager:
             with open(file_path, "wb") as f:
                 f.write(image_bytes)
 
+            # 近似重复的图片（如同一张图被重新压缩后转发）直接复用已有描述，不再提交识别
+            image_fingerprint = await asyncio.to_thread(compute_fingerprint, image_bytes)
+            cached_description = self._get_description_from_index(image_hash, image_fingerprint, "image")
+
             # 保存到数据库
             Images.create(
                 image_id=image_id,
                 emoji_hash=image_hash,
                 path=file_path,
                 type="image",
+                description=cached_description,
                 timestamp=current_timestamp,
-                vlm_processed=False,
+                vlm_processed=cached_description is not None,
                 count=1,
             )
 
-            # 启动异步VLM处理
-            await self._process_image_with_vlm(image_id, image_base64)
+            if cached_description is not None:
+                logger.debug(f"[缓存复用] 新图片 {image_hash[:8]} 复用内存中的描述: {cached_description[:50]}...")
+            else:
+                # 提交到后台VLM识别队列，不等待识别完成
+                self.vlm_queue.submit(image_hash, image_id, image_base64, priority)
 
             return image_id, f"[picid:{image_id}]"
 
@@ -537,10 +640,20 @@ class ImageManager:
             image_bytes = base64.b64decode(image_base64)
             image_hash = hashlib.md5(image_bytes).hexdigest()
 
+            image_fingerprint = await asyncio.to_thread(compute_fingerprint, image_bytes)
+
             # 获取当前图片记录
             image = Images.get(Images.image_id == image_id)
 
-            # 优先检查是否已有其他相同哈希的图片记录包含描述
+            # 优先查询内存缓存（在排队期间可能已有相同或近似重复的图片完成识别）
+            if cached_description := self._get_description_from_index(image_hash, image_fingerprint, "image"):
+                logger.debug(f"[缓存复用] 从内存复用描述: {cached_description[:50]}...")
+                image.description = cached_description
+                image.vlm_processed = True
+                image.save()
+                return
+
+            # 检查是否已有其他相同哈希的图片记录包含描述
             existing_with_description = Images.get_or_none(
                 (Images.emoji_hash == image_hash) & (Images.description.is_null(False)) & (Images.description != "")
             )
@@ -551,6 +664,9 @@ class ImageManager:
                 image.save()
                 # 同时保存到ImageDescriptions表作为备用缓存
                 self._save_description_to_db(image_hash, existing_with_description.description, "image")
+                self.description_index["image"].put(
+                    image_hash, image_fingerprint, existing_with_description.description
+                )
                 return
 
             # 检查ImageDescriptions表的缓存描述
@@ -559,6 +675,7 @@ class ImageManager:
                 image.description = cached_description
                 image.vlm_processed = True
                 image.save()
+                self.description_index["image"].put(image_hash, image_fingerprint, cached_description)
                 return
 
             # 获取图片格式
@@ -587,6 +704,7 @@ class ImageManager:
 
             # 保存描述到ImageDescriptions表作为备用缓存
             self._save_description_to_db(image_hash, description, "image")
+            self.description_index["image"].put(image_hash, image_fingerprint, description)
 
         except Exception as e:
             logger.error(f"VLM处理图片失败: {str(e)}")
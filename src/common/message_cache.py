@@ -0,0 +1,166 @@
+import bisect
+import threading
+
+from collections import OrderedDict
+from typing import List, Optional
+
+from src.config.config import global_config
+from src.common.data_models.database_data_model import DatabaseMessages
+from src.common.database.database_model import Messages
+from src.common.logger import get_logger
+
+logger = get_logger("message_cache")
+
+RECENT_MESSAGE_CACHE_SIZE = 200  # 每个聊天最少缓存的最近消息数（实际取该值与上下文长度两倍中的较大者）
+MAX_CACHED_CHATS = 256  # 最多缓存多少个聊天，超出时淘汰最久未访问的聊天
+
+
+class _ChatMessageBuffer:
+    """单个聊天的最近消息缓冲区，按时间升序保存，超出容量时淘汰最旧的消息"""
+
+    def __init__(self, messages: List[DatabaseMessages], floor: float):
+        self.messages = messages
+        self.times = [msg.time for msg in messages]
+        self.floor = floor
+        """覆盖下界：数据库中该聊天所有 time > floor 的消息都在缓冲区中"""
+
+    def add(self, message: DatabaseMessages, capacity: int):
+        if message.time <= self.floor:
+            # 早于覆盖范围的消息（如延迟到达的旧消息）只存在于数据库中
+            return
+        index = bisect.bisect_right(self.times, message.time)
+        self.times.insert(index, message.time)
+        self.messages.insert(index, message)
+        while len(self.messages) > capacity:
+            self.floor = max(self.floor, self.times.pop(0))
+            self.messages.pop(0)
+
+
+class RecentMessageCache:
+    """
+    最近消息缓存
+
+    为每个聊天在内存中保留最近的若干条消息（由 MessageStorage 写入时同步更新，首次访问时从数据库预热），
+    使回复循环中频繁的“某聊天最近N条/某时间段内的消息”查询无需访问数据库。
+    查询范围超出缓存覆盖范围时返回 None，由调用方回退到数据库查询。
+    """
+
+    def __init__(self):
+        self._buffers: OrderedDict[str, _ChatMessageBuffer] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        """缓存命中次数"""
+        self.misses = 0
+        """回退到数据库的次数"""
+
+    @property
+    def capacity(self) -> int:
+        return max(RECENT_MESSAGE_CACHE_SIZE, global_config.chat.max_context_size * 2)
+
+    def _get_buffer(self, chat_id: str) -> Optional[_ChatMessageBuffer]:
+        """获取聊天的缓冲区，不存在时从数据库加载最近的消息；加载失败时返回 None，不缓存"""
+        if buffer := self._buffers.get(chat_id):
+            self._buffers.move_to_end(chat_id)
+            return buffer
+        capacity = self.capacity
+        # 直接查询而不经过 find_messages：后者出错时返回空列表，会被当作“该聊天没有消息”缓存下来
+        try:
+            rows = (
+                Messages.select()
+                .where((Messages.chat_id == chat_id) & (Messages.message_id != "notice"))
+                .order_by(Messages.time.desc())
+                .limit(capacity)
+            )
+            messages = [DatabaseMessages(**row.__data__) for row in sorted(rows, key=lambda row: row.time)]
+        except Exception as e:
+            logger.error(f"加载聊天 {chat_id} 的最近消息失败，本次查询回退到数据库: {e}")
+            return None
+        # 数据库中的消息不足容量时缓冲区即为全部消息，否则只能保证最旧一条之后的消息完整
+        floor = messages[0].time if len(messages) >= capacity else float("-inf")
+        buffer = _ChatMessageBuffer(messages, floor)
+        self._buffers[chat_id] = buffer
+        while len(self._buffers) > MAX_CACHED_CHATS:
+            self._buffers.popitem(last=False)
+        return buffer
+
+    def add_message(self, row: Messages):
+        """
+        记录一条刚写入数据库的消息（未缓存的聊天会在首次查询时从数据库加载，此处直接跳过）
+        Args:
+            row: Messages.create 返回的模型实例
+        """
+        chat_id = row.chat_id
+        with self._lock:
+            if chat_id not in self._buffers:
+                return
+            # 经过字段的存取转换，使缓存中的值与从数据库读出的一致（如字典被存为字符串）
+            data = {
+                name: field.python_value(field.db_value(row.__data__.get(name)))
+                for name, field in Messages._meta.fields.items()  # type: ignore
+            }
+            self._buffers[chat_id].add(DatabaseMessages(**data), self.capacity)
+
+    def update_message_id(self, chat_id: str, old_message_id: str, new_message_id: str):
+        """同步数据库中最新一条匹配消息的 message_id 更新"""
+        with self._lock:
+            if buffer := self._buffers.get(chat_id):
+                for msg in reversed(buffer.messages):
+                    if msg.message_id == old_message_id:
+                        msg.message_id = new_message_id
+                        return
+
+    def get_messages(
+        self,
+        chat_id: str,
+        timestamp_start: float,
+        timestamp_end: float,
+        limit: int = 0,
+        limit_mode: str = "latest",
+        filter_bot: bool = False,
+        filter_command: bool = False,
+        inclusive: bool = False,
+    ) -> Optional[List[DatabaseMessages]]:
+        """
+        获取聊天在时间范围内的消息，语义与 find_messages 一致（按时间升序，排除 message_id 为 "notice" 的消息）
+        Args:
+            inclusive: 是否包含时间边界
+        Returns:
+            消息列表；查询范围超出缓存覆盖范围时返回 None
+        """
+        with self._lock:
+            buffer = self._get_buffer(chat_id)
+            if buffer is None:
+                self.misses += 1
+                return None
+            if inclusive:
+                lo = bisect.bisect_left(buffer.times, timestamp_start)
+                hi = bisect.bisect_right(buffer.times, timestamp_end)
+                covered = timestamp_start > buffer.floor
+            else:
+                lo = bisect.bisect_right(buffer.times, timestamp_start)
+                hi = bisect.bisect_left(buffer.times, timestamp_end)
+                covered = timestamp_start >= buffer.floor
+            # 覆盖下界及以下的消息可能不完整
+            lo = max(lo, bisect.bisect_right(buffer.times, buffer.floor))
+            messages = [
+                msg
+                for msg in buffer.messages[lo:hi]
+                if msg.message_id != "notice"
+                and not (filter_bot and msg.user_info.user_id == global_config.bot.qq_account)
+                and not (filter_command and msg.is_command)
+            ]
+
+        if not covered:
+            # 范围超出覆盖下界时，只有“最新N条”且缓存中已有足够的消息时才能直接返回
+            if limit > 0 and limit_mode != "earliest" and len(messages) >= limit:
+                self.hits += 1
+                return messages[-limit:]
+            self.misses += 1
+            return None
+        self.hits += 1
+        if limit > 0:
+            return messages[:limit] if limit_mode == "earliest" else messages[-limit:]
+        return messages
+
+
+recent_message_cache = RecentMessageCache()
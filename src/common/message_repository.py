@@ -81,7 +81,7 @@ def find_messages(
             query = query.where(Messages.user_id != global_config.bot.qq_account)
 
         if filter_command:
-            query = query.where(not Messages.is_command)
+            query = query.where(Messages.is_command == False)  # noqa: E712
 
         if limit > 0:
             if limit_mode == "earliest":
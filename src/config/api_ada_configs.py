@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from typing import Literal
 
 from .config_base import ConfigBase
 
@@ -28,6 +29,21 @@ class APIProvider(ConfigBase):
     retry_interval: int = 10
     """重试间隔（如果API调用失败，重试的间隔时间，单位：秒）"""
 
+    max_concurrency: int = 0
+    """整个进程同时向该提供商发出的最大请求数（0表示不限制，各事件循环/线程共享），超出的请求会排队等待"""
+
+    max_connections: int = 100
+    """连接池的最大连接数"""
+
+    max_keepalive_connections: int = 20
+    """连接池中保持空闲复用的最大连接数"""
+
+    keepalive_expiry: float = 60.0
+    """空闲连接的保活时间（单位：秒）"""
+
+    http2: bool = False
+    """是否启用HTTP/2（需要安装h2库）"""
+
     def get_api_key(self) -> str:
         return self.api_key
 
@@ -88,6 +104,23 @@ class TaskConfig(ConfigBase):
     temperature: float = 0.3
     """模型温度"""
 
+    selection_strategy: Literal["p2c", "weighted"] = "p2c"
+    """多个模型间的选择策略，p2c为随机取两个模型选择预估耗时更低的一个，weighted为按预估耗时的倒数加权随机选择"""
+
+    hedge_delay: float = 0.0
+    """对冲请求等待时间（秒），请求超过该时间仍未返回时向另一个模型发出相同请求并采用先返回的结果，0为关闭"""
+
+
+@dataclass
+class UsageRecordConfig(ConfigBase):
+    """LLM使用记录配置类"""
+
+    max_buffer_size: int = 2000
+    """等待批量写入数据库的使用记录最多保留的条数"""
+
+    overflow_policy: Literal["drop_oldest", "block"] = "drop_oldest"
+    """缓冲区满时的处理方式，drop_oldest为丢弃最早的记录，block为在记录时同步写入数据库（写入完成前会阻塞事件循环）"""
+
 
 @dataclass
 class ModelTaskConfig(ConfigBase):
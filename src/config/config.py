@@ -40,6 +40,7 @@ from .api_ada_configs import (
     ModelTaskConfig,
     ModelInfo,
     APIProvider,
+    UsageRecordConfig,
 )
 
 
@@ -376,6 +377,9 @@ class APIAdapterConfig(ConfigBase):
     api_providers: List[APIProvider] = field(default_factory=list)
     """API提供商列表"""
 
+    usage_record: UsageRecordConfig = field(default_factory=UsageRecordConfig)
+    """LLM使用记录配置"""
+
     def __post_init__(self):
         if not self.models:
             raise ValueError("模型列表不能为空，请在配置中设置有效的模型列表。")
@@ -132,6 +132,15 @@ class MessageReceiveConfig(ConfigBase):
     ban_msgs_regex: set[str] = field(default_factory=lambda: set())
     """过滤正则表达式列表"""
 
+    worker_count: int = 32
+    """最多同时处理的消息数，同一聊天流的消息总是按顺序逐条处理，设为0则收到消息后直接处理"""
+
+    max_pending_per_chat: int = 50
+    """每个聊天流最多排队等待处理的消息数，设为0则不限制"""
+
+    overflow_policy: Literal["drop_oldest", "drop_newest", "merge"] = "drop_oldest"
+    """聊天流排队消息超出上限时的处理方式：丢弃最早的消息、丢弃新消息、合并到同一用户排队中的上一条消息"""
+
 @dataclass
 class ExpressionConfig(ConfigBase):
     """表达配置类"""
@@ -355,9 +364,24 @@ class MemoryConfig(ConfigBase):
     memory_ban_words: list[str] = field(default_factory=lambda: ["表情包", "图片", "回复", "聊天记录"])
     """不允许记忆的词列表"""
 
+    memory_build_concurrency: int = 4
+    """记忆构建时同时进行的话题摘要/记忆整合LLM请求数"""
+
+    memory_build_timeout: float = 60.0
+    """记忆构建时单个话题摘要/记忆整合的超时时间（秒），设为0则不限制"""
+
     enable_instant_memory: bool = True
     """是否启用即时记忆"""
 
+    keyword_extraction_algorithm: Literal["tfidf", "textrank"] = "tfidf"
+    """快速模式下本地关键词提取使用的算法"""
+
+    keyword_fallback_confidence: float = 0.4
+    """本地关键词提取置信度低于该值时回退到LLM提取，设为0则从不回退"""
+
+    keyword_cache_size: int = 1024
+    """关键词提取结果的LRU缓存大小，设为0则不缓存"""
+
 
 @dataclass
 class MoodConfig(ConfigBase):
@@ -563,5 +587,38 @@ class LPMMKnowledgeConfig(ConfigBase):
     qa_res_top_k: int = 10
     """QA最终结果的Top K数量"""
 
+    qa_cache_size: int = 256
+    """QA检索结果缓存条数，设为0则不缓存"""
+
+    qa_cache_ttl: float = 600.0
+    """QA检索结果缓存的存活时间（秒），设为0则只按条数淘汰"""
+
+    qa_cache_similarity_threshold: float = 0.95
+    """问题嵌入的余弦相似度不低于该值时复用已缓存的检索结果"""
+
     embedding_dimension: int = 1024
     """嵌入向量维度，应该与模型的输出维度一致"""
+
+    embedding_storage_dtype: Literal["float32", "float16"] = "float32"
+    """嵌入向量的存储精度，float16可减半磁盘与内存占用（仅对新建的嵌入库生效）"""
+
+    embedding_index_type: Literal["flat", "ivf_flat", "ivf_pq", "hnsw"] = "flat"
+    """嵌入向量索引类型：flat为精确检索，其余为近似检索"""
+
+    index_ivf_nlist: int = 0
+    """IVF索引的聚类中心数，0表示按 4*sqrt(向量数) 自动确定"""
+
+    index_ivf_nprobe: int = 16
+    """IVF索引检索时探查的聚类数，越大召回率越高、速度越慢"""
+
+    index_pq_m: int = 64
+    """IVF-PQ索引的子向量数，需整除嵌入维度（不能整除时自动取不超过它的最大约数）"""
+
+    index_hnsw_m: int = 32
+    """HNSW索引每个节点的连接数"""
+
+    index_hnsw_ef_construction: int = 200
+    """HNSW索引构建时的候选列表大小"""
+
+    index_hnsw_ef_search: int = 128
+    """HNSW索引检索时的候选列表大小，越大召回率越高、速度越慢"""
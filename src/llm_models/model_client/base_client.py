@@ -1,13 +1,24 @@
 import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
-from typing import Callable, Any, Optional
+from typing import AsyncIterator, Callable, Any, Deque, Optional
 
+import httpx
+
+from src.common.logger import get_logger
 from src.config.api_ada_configs import ModelInfo, APIProvider
 from ..payload_content.message import Message
 from ..payload_content.resp_format import RespFormat
 from ..payload_content.tool_option import ToolOption, ToolCall
 
+logger = get_logger("model_client")
+
 
 @dataclass
 class UsageRecord:
@@ -49,6 +60,9 @@ class APIResponse:
     embedding: list[float] | None = None
     """嵌入向量"""
 
+    embeddings: list[list[float]] | None = None
+    """批量嵌入向量，与输入顺序一致"""
+
     usage: UsageRecord | None = None
     """使用情况 (prompt_tokens, completion_tokens, total_tokens)"""
 
@@ -56,6 +70,132 @@ class APIResponse:
     """响应原始数据"""
 
 
+class ProviderLimiter:
+    """
+    单个API提供商的并发名额与请求指标
+
+    客户端按事件循环分别缓存（如嵌入流水线通过 run_coroutine_sync 在其它线程的事件循环中请求），
+    同一提供商的所有客户端共享同一个 ProviderLimiter，因此 max_concurrency 限制的是整个进程对该提供商的并发请求数。
+    名额用线程锁计数，排队的请求在各自的事件循环中等待，名额释放时直接移交给最早排队的请求。
+    """
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        """最大并发请求数，0表示不限制"""
+        self._lock = threading.Lock()
+        self._waiters: Deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self.in_flight = 0
+        """正在进行的请求数"""
+        self.queued = 0
+        """等待并发名额的请求数"""
+        self.total_requests = 0
+        """累计请求数"""
+        self.total_wait_time = 0.0
+        """累计排队等待时间（秒）"""
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.max_concurrency <= 0 or (self.in_flight < self.max_concurrency and not self._waiters):
+                self.in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+            self.queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    self.queued -= 1
+                    granted = False
+                except ValueError:
+                    # 名额已经移交给了这个请求
+                    granted = True
+            if granted:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                self.queued -= 1
+                try:
+                    # 名额直接移交，in_flight 不变
+                    loop.call_soon_threadsafe(_set_future_result, waiter)
+                    return
+                except RuntimeError:
+                    # 等待者所在的事件循环已关闭
+                    continue
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """占用一个并发名额，并记录排队等待时间"""
+        start_time = time.perf_counter()
+        await self._acquire()
+        wait_time = time.perf_counter() - start_time
+        with self._lock:
+            self.total_requests += 1
+            self.total_wait_time += wait_time
+        if wait_time > 1:
+            logger.debug(f"{self.name} 的请求排队等待了 {wait_time:.2f} 秒")
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_metrics(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "total_requests": self.total_requests,
+                "avg_wait_time": self.total_wait_time / self.total_requests if self.total_requests else 0.0,
+            }
+
+
+def _set_future_result(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+    # 等待者在移交前被取消时，由 _acquire 中的取消处理归还名额
+
+
+_provider_limiters: dict[str, ProviderLimiter] = {}
+_provider_limiters_lock = threading.Lock()
+
+
+def get_provider_limiter(api_provider: APIProvider) -> ProviderLimiter:
+    """获取API提供商（按名称）在整个进程内共享的并发名额"""
+    with _provider_limiters_lock:
+        limiter = _provider_limiters.get(api_provider.name)
+        if limiter is None:
+            limiter = _provider_limiters[api_provider.name] = ProviderLimiter(
+                api_provider.name, api_provider.max_concurrency
+            )
+        return limiter
+
+
+def get_http_pool_options(api_provider: APIProvider) -> dict[str, Any]:
+    """按API提供商的配置生成 httpx 客户端的连接池参数（limits 与 http2）"""
+    http2 = api_provider.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning(f"API提供商 {api_provider.name} 启用了HTTP/2，但未安装h2库，将使用HTTP/1.1")
+        http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=api_provider.max_connections,
+            max_keepalive_connections=api_provider.max_keepalive_connections,
+            keepalive_expiry=api_provider.keepalive_expiry,
+        ),
+        "http2": http2,
+    }
+
+
 class BaseClient(ABC):
     """
     基础客户端
@@ -65,6 +205,12 @@ class BaseClient(ABC):
 
     def __init__(self, api_provider: APIProvider):
         self.api_provider = api_provider
+        # 客户端按事件循环缓存，并发名额按提供商跨事件循环共享
+        self.limiter = get_provider_limiter(api_provider)
+
+    def request_slot(self) -> AbstractAsyncContextManager[None]:
+        """占用所属API提供商的一个并发名额，并记录正在进行与排队中的请求数"""
+        return self.limiter.slot()
 
     @abstractmethod
     async def get_response(
@@ -112,6 +258,35 @@ class BaseClient(ABC):
         """
         raise NotImplementedError("'get_embedding' method should be overridden in subclasses")
 
+    async def get_embeddings(
+        self,
+        model_info: ModelInfo,
+        embedding_inputs: list[str],
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        批量获取文本嵌入（默认逐条请求，支持批量接口的客户端应覆盖此方法）
+        :param model_info: 模型信息
+        :param embedding_inputs: 嵌入输入文本列表
+        :return: 嵌入响应，embeddings与输入顺序一致
+        """
+        response = APIResponse(embeddings=[])
+        prompt_tokens = total_tokens = 0
+        for embedding_input in embedding_inputs:
+            single = await self.get_embedding(model_info, embedding_input, extra_params)
+            response.embeddings.append(single.embedding)
+            if single.usage:
+                prompt_tokens += single.usage.prompt_tokens
+                total_tokens += single.usage.total_tokens
+        response.usage = UsageRecord(
+            model_name=model_info.name,
+            provider_name=model_info.api_provider,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=0,
+            total_tokens=total_tokens,
+        )
+        return response
+
     @abstractmethod
     async def get_audio_transcriptions(
         self,
@@ -142,7 +317,11 @@ class ClientRegistry:
         self.client_registry: dict[str, type[BaseClient]] = {}
         """APIProvider.type -> BaseClient的映射表"""
         self.client_instance_cache: dict[str, BaseClient] = {}
-        """APIProvider.name -> BaseClient的映射表"""
+        """APIProvider.name -> BaseClient的映射表（无运行中事件循环时使用）"""
+        self.loop_client_cache: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, BaseClient]] = (
+            weakref.WeakKeyDictionary()
+        )
+        """事件循环 -> (APIProvider.name -> BaseClient)，客户端内部的连接池绑定在创建它的事件循环上，因此按循环分别缓存"""
 
     def register_client_class(self, client_type: str):
         """
@@ -159,29 +338,36 @@ class ClientRegistry:
 
         return decorator
 
-    def get_client_class_instance(self, api_provider: APIProvider, force_new=False) -> BaseClient:
+    def get_client_class_instance(self, api_provider: APIProvider) -> BaseClient:
         """
         获取注册的API客户端实例
         Args:
             api_provider: APIProvider实例
-            force_new: 是否强制创建新实例（用于解决事件循环问题）
         Returns:
             BaseClient: 注册的API客户端实例
         """
-        # 如果强制创建新实例，直接创建不使用缓存
-        if force_new:
-            if client_class := self.client_registry.get(api_provider.client_type):
-                return client_class(api_provider)
-            else:
-                raise KeyError(f"'{api_provider.client_type}' 类型的 Client 未注册")
-        
-        # 正常的缓存逻辑
-        if api_provider.name not in self.client_instance_cache:
+        # 同一事件循环内复用同一个客户端（及其连接池）
+        try:
+            cache = self.loop_client_cache.setdefault(asyncio.get_running_loop(), {})
+        except RuntimeError:
+            cache = self.client_instance_cache
+        if api_provider.name not in cache:
             if client_class := self.client_registry.get(api_provider.client_type):
-                self.client_instance_cache[api_provider.name] = client_class(api_provider)
+                cache[api_provider.name] = client_class(api_provider)
             else:
                 raise KeyError(f"'{api_provider.client_type}' 类型的 Client 未注册")
-        return self.client_instance_cache[api_provider.name]
+        return cache[api_provider.name]
+
+    @staticmethod
+    def get_metrics() -> dict[str, dict[str, float]]:
+        """
+        获取各API提供商（跨所有事件循环）的请求指标
+        Returns:
+            dict: APIProvider.name -> {max_concurrency, in_flight, queued, total_requests, avg_wait_time}
+        """
+        with _provider_limiters_lock:
+            limiters = list(_provider_limiters.values())
+        return {limiter.name: limiter.get_metrics() for limiter in limiters}
 
 
 client_registry = ClientRegistry()
@@ -3,6 +3,7 @@ import io
 import base64
 from typing import Callable, AsyncIterator, Optional, Coroutine, Any, List
 
+import httpx
 from google import genai
 from google.genai.types import (
     Content,
@@ -19,6 +20,7 @@ from google.genai.types import (
     SafetySetting,
     HarmCategory,
     HarmBlockThreshold,
+    HttpOptions,
 )
 from google.genai.errors import (
     ClientError,
@@ -31,7 +33,7 @@ from google.genai.errors import (
 from src.config.api_ada_configs import ModelInfo, APIProvider
 from src.common.logger import get_logger
 
-from .base_client import APIResponse, UsageRecord, BaseClient, client_registry
+from .base_client import APIResponse, UsageRecord, BaseClient, client_registry, get_http_pool_options
 from ..exceptions import (
     RespParseException,
     NetworkConnectionError,
@@ -335,6 +337,8 @@ class GeminiClient(BaseClient):
         super().__init__(api_provider)
         self.client = genai.Client(
             api_key=api_provider.api_key,
+            # 显式传入异步 httpx 客户端，使用与openai客户端相同的连接池配置（否则安装了aiohttp时会改用aiohttp）
+            http_options=HttpOptions(httpx_async_client=httpx.AsyncClient(**get_http_pool_options(api_provider))),
         )  # 这里和openai不一样，gemini会自己决定自己是否需要retry
 
     @staticmethod
@@ -549,6 +553,46 @@ class GeminiClient(BaseClient):
 
         return response
 
+    async def get_embeddings(
+        self,
+        model_info: ModelInfo,
+        embedding_inputs: list[str],
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        批量获取文本嵌入（一次请求发送整个列表）
+        :param model_info: 模型信息
+        :param embedding_inputs: 嵌入输入文本列表
+        :return: 嵌入响应，embeddings与输入顺序一致
+        """
+        try:
+            raw_response: EmbedContentResponse = await self.client.aio.models.embed_content(
+                model=model_info.model_identifier,
+                contents=embedding_inputs,
+                config=EmbedContentConfig(task_type="SEMANTIC_SIMILARITY"),
+            )
+        except (ClientError, ServerError) as e:
+            # 重封装ClientError和ServerError为RespNotOkException
+            raise RespNotOkException(e.code) from None
+        except Exception as e:
+            raise NetworkConnectionError() from e
+
+        if not raw_response.embeddings or len(raw_response.embeddings) != len(embedding_inputs):
+            raise RespParseException(raw_response, "响应解析失败，embeddings数量与输入不一致")
+
+        response = APIResponse()
+        response.embeddings = [embedding.values for embedding in raw_response.embeddings]
+        input_length = sum(len(embedding_input) for embedding_input in embedding_inputs)
+        response.usage = UsageRecord(
+            model_name=model_info.name,
+            provider_name=model_info.api_provider,
+            prompt_tokens=input_length,
+            completion_tokens=0,
+            total_tokens=input_length,
+        )
+
+        return response
+
     def get_audio_transcriptions(
         self, model_info: ModelInfo, audio_base64: str, extra_params: dict[str, Any] | None = None
     ) -> APIResponse:
@@ -9,6 +9,7 @@ from json_repair import repair_json
 
 from openai import (
     AsyncOpenAI,
+    DefaultAsyncHttpxClient,
     APIConnectionError,
     APIStatusError,
     NOT_GIVEN,
@@ -24,7 +25,7 @@ from openai.types.chat.chat_completion_chunk import ChoiceDelta
 
 from src.config.api_ada_configs import ModelInfo, APIProvider
 from src.common.logger import get_logger
-from .base_client import APIResponse, UsageRecord, BaseClient, client_registry
+from .base_client import APIResponse, UsageRecord, BaseClient, client_registry, get_http_pool_options
 from ..exceptions import (
     RespParseException,
     NetworkConnectionError,
@@ -389,6 +390,7 @@ class OpenaiClient(BaseClient):
             api_key=api_provider.api_key,
             max_retries=0,
             timeout=api_provider.timeout,
+            http_client=DefaultAsyncHttpxClient(**get_http_pool_options(api_provider)),
         )
 
     async def get_response(
@@ -554,6 +556,53 @@ class OpenaiClient(BaseClient):
 
         return response
 
+    async def get_embeddings(
+        self,
+        model_info: ModelInfo,
+        embedding_inputs: list[str],
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        批量获取文本嵌入（一次请求发送整个列表）
+        :param model_info: 模型信息
+        :param embedding_inputs: 嵌入输入文本列表
+        :return: 嵌入响应，embeddings与输入顺序一致
+        """
+        try:
+            raw_response = await self.client.embeddings.create(
+                model=model_info.model_identifier,
+                input=embedding_inputs,
+                extra_body=extra_params,
+            )
+        except APIConnectionError as e:
+            logger.error(f"OpenAI API连接错误（嵌入模型）: {str(e)}")
+            raise NetworkConnectionError() from e
+        except APIStatusError as e:
+            # 重封装APIError为RespNotOkException
+            raise RespNotOkException(e.status_code) from e
+
+        if len(raw_response.data) != len(embedding_inputs):
+            raise RespParseException(
+                raw_response,
+                f"响应解析失败，请求{len(embedding_inputs)}条嵌入，返回{len(raw_response.data)}条。",
+            )
+
+        response = APIResponse()
+        # 按index字段还原输入顺序
+        response.embeddings = [item.embedding for item in sorted(raw_response.data, key=lambda item: item.index)]
+
+        # 解析使用情况
+        if hasattr(raw_response, "usage"):
+            response.usage = UsageRecord(
+                model_name=model_info.name,
+                provider_name=model_info.api_provider,
+                prompt_tokens=raw_response.usage.prompt_tokens or 0,
+                completion_tokens=0,
+                total_tokens=raw_response.usage.total_tokens or 0,
+            )
+
+        return response
+
     async def get_audio_transcriptions(
         self,
         model_info: ModelInfo,
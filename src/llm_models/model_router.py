@@ -0,0 +1,231 @@
+import random
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from src.common.logger import get_logger
+from .model_client.base_client import UsageRecord
+
+logger = get_logger("model_router")
+
+EWMA_ALPHA = 0.2  # 指数加权移动平均的平滑系数，越大越看重最近的请求
+CIRCUIT_FAILURE_THRESHOLD = 3  # 连续失败多少次后熔断
+CIRCUIT_BASE_COOLDOWN = 30.0  # 首次熔断的冷却时间（秒），之后每次连续熔断翻倍
+CIRCUIT_MAX_COOLDOWN = 600.0  # 熔断冷却时间上限（秒）
+MIN_SUCCESS_RATE = 0.05  # 计算预估耗时时成功率的下限，避免除零
+
+
+@dataclass
+class ModelRouteStats:
+    """单个模型的路由统计"""
+
+    ewma_latency: float | None = None
+    """请求耗时的指数加权平均（秒），None 表示尚无成功请求"""
+
+    ewma_error_rate: float = 0.0
+    """请求失败率的指数加权平均"""
+
+    ewma_tokens_per_sec: float | None = None
+    """输出速度的指数加权平均（token/秒）"""
+
+    in_flight: int = 0
+    """正在进行的请求数"""
+
+    total_requests: int = 0
+    """累计请求数（每次尝试计一次）"""
+
+    total_failures: int = 0
+    """累计失败数"""
+
+    consecutive_failures: int = 0
+    """连续失败数，成功后清零"""
+
+    circuit_trips: int = 0
+    """连续熔断次数，用于计算冷却时间，成功后清零"""
+
+    circuit_open_until: float = 0.0
+    """熔断结束时间（time.time()），在此之前不会被选中"""
+
+    def is_circuit_open(self, now: float) -> bool:
+        return now < self.circuit_open_until
+
+    def expected_cost(self, fallback_latency: float) -> float:
+        """预估耗时：平均耗时 × (正在进行的请求数 + 1) ÷ 成功率"""
+        latency = self.ewma_latency if self.ewma_latency is not None else fallback_latency
+        return latency * (self.in_flight + 1) / max(1.0 - self.ewma_error_rate, MIN_SUCCESS_RATE)
+
+
+@dataclass
+class RouteDecision:
+    """一次模型选择的记录，用于排查为什么选中了某个模型"""
+
+    model_name: str
+    strategy: str
+    reason: str
+    candidates: Dict[str, float] = field(default_factory=dict)
+    """参与比较的模型 -> 预估耗时"""
+    timestamp: float = field(default_factory=time.time)
+
+
+class ModelRouter:
+    """
+    模型路由器
+
+    按模型名称记录请求耗时、失败率、正在进行的请求数与输出速度（均为全局共享，不区分 LLMRequest 实例），
+    据此在任务的模型列表中选择预估耗时最低的模型；连续失败的模型会被熔断一段时间。
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, ModelRouteStats] = {}
+        """模型名称 -> 路由统计"""
+        self.last_decisions: Dict[str, RouteDecision] = {}
+        """任务名称 -> 最近一次的选择记录"""
+        # 嵌入流水线等可能在其它线程的事件循环中发起请求
+        self._lock = threading.Lock()
+
+    def _get_stats(self, model_name: str) -> ModelRouteStats:
+        if model_name not in self.stats:
+            self.stats[model_name] = ModelRouteStats()
+        return self.stats[model_name]
+
+    def select(
+        self,
+        task_name: str,
+        model_list: List[str],
+        strategy: str = "p2c",
+        exclude: Optional[Set[str]] = None,
+    ) -> str:
+        """
+        从模型列表中选择一个模型
+        Args:
+            task_name: 任务名称，仅用于记录选择原因
+            model_list: 候选模型名称列表
+            strategy: 选择策略，"p2c" 或 "weighted"
+            exclude: 不参与选择的模型（如对冲请求时排除已在请求的模型），排除后无候选时忽略该参数
+        Returns:
+            str: 选中的模型名称
+        """
+        if not model_list:
+            raise ValueError(f"任务 '{task_name}' 的模型列表为空")
+        now = time.time()
+        with self._lock:
+            candidates = [name for name in model_list if not exclude or name not in exclude] or list(model_list)
+            available = [name for name in candidates if not self._get_stats(name).is_circuit_open(now)]
+            if not available:
+                # 全部熔断时选择最早恢复的模型，不拒绝请求
+                model_name = min(candidates, key=lambda name: self.stats[name].circuit_open_until)
+                decision = RouteDecision(model_name, strategy, "所有候选模型均处于熔断中，选择最早恢复的模型")
+            elif len(available) == 1:
+                reason = "唯一可用模型" if len(candidates) == 1 else "其余候选模型处于熔断中"
+                decision = RouteDecision(available[0], strategy, reason)
+            else:
+                decision = self._choose(available, strategy)
+            self.last_decisions[task_name] = decision
+        logger.debug(f"任务 '{task_name}' 选择模型 {decision.model_name}：{decision.reason}")
+        return decision.model_name
+
+    def _choose(self, available: List[str], strategy: str) -> RouteDecision:
+        # 未请求过的模型按已知模型中最快的耗时估计，使其有机会被尝试
+        known_latencies = [s.ewma_latency for s in self.stats.values() if s.ewma_latency is not None]
+        fallback_latency = min(known_latencies) if known_latencies else 1.0
+        costs = {name: self.stats[name].expected_cost(fallback_latency) for name in available}
+
+        if strategy == "weighted":
+            weights = [1.0 / max(costs[name], 1e-3) for name in available]
+            model_name = random.choices(available, weights=weights)[0]
+            return RouteDecision(model_name, strategy, "按预估耗时的倒数加权随机选择", costs)
+
+        # power of two choices：随机取两个，选择预估耗时更低的一个，避免所有请求同时涌向同一个模型
+        first, second = random.sample(available, 2)
+        model_name = first if costs[first] <= costs[second] else second
+        return RouteDecision(
+            model_name,
+            strategy,
+            f"随机比较 {first}({costs[first]:.2f}s) 与 {second}({costs[second]:.2f}s)，选择预估耗时更低者",
+            {first: costs[first], second: costs[second]},
+        )
+
+    def on_request_start(self, model_name: str):
+        with self._lock:
+            self._get_stats(model_name).in_flight += 1
+
+    def on_request_end(self, model_name: str):
+        with self._lock:
+            stats = self._get_stats(model_name)
+            stats.in_flight = max(0, stats.in_flight - 1)
+
+    def record_success(self, model_name: str, latency: float, usage: UsageRecord | None = None):
+        """记录一次成功的请求（latency 不含排队等待时间）"""
+        with self._lock:
+            stats = self._get_stats(model_name)
+            stats.total_requests += 1
+            stats.ewma_latency = latency if stats.ewma_latency is None else _ewma(stats.ewma_latency, latency)
+            stats.ewma_error_rate = _ewma(stats.ewma_error_rate, 0.0)
+            if usage and usage.completion_tokens and latency > 0:
+                speed = usage.completion_tokens / latency
+                stats.ewma_tokens_per_sec = (
+                    speed if stats.ewma_tokens_per_sec is None else _ewma(stats.ewma_tokens_per_sec, speed)
+                )
+            if stats.circuit_trips:
+                logger.info(f"模型 {model_name} 请求恢复正常，解除熔断")
+            stats.consecutive_failures = 0
+            stats.circuit_trips = 0
+            stats.circuit_open_until = 0.0
+
+    def record_failure(self, model_name: str):
+        """记录一次失败的请求，连续失败达到阈值时熔断"""
+        with self._lock:
+            stats = self._get_stats(model_name)
+            stats.total_requests += 1
+            stats.total_failures += 1
+            stats.ewma_error_rate = _ewma(stats.ewma_error_rate, 1.0)
+            stats.consecutive_failures += 1
+            now = time.time()
+            # 连续失败数在成功前不清零，熔断期结束后放行的试探请求再次失败时，立即以更长的冷却时间重新熔断
+            if stats.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD and not stats.is_circuit_open(now):
+                stats.circuit_trips += 1
+                cooldown = min(CIRCUIT_BASE_COOLDOWN * 2 ** (stats.circuit_trips - 1), CIRCUIT_MAX_COOLDOWN)
+                stats.circuit_open_until = now + cooldown
+                logger.warning(f"模型 {model_name} 连续请求失败，熔断 {cooldown:.0f} 秒")
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        获取路由器状态
+        Returns:
+            dict: {"models": 模型名称 -> 统计, "decisions": 任务名称 -> 最近一次选择记录}
+        """
+        now = time.time()
+        with self._lock:
+            models = {
+                name: {
+                    "ewma_latency": stats.ewma_latency,
+                    "error_rate": round(stats.ewma_error_rate, 4),
+                    "tokens_per_sec": stats.ewma_tokens_per_sec,
+                    "in_flight": stats.in_flight,
+                    "total_requests": stats.total_requests,
+                    "total_failures": stats.total_failures,
+                    "circuit_open": stats.is_circuit_open(now),
+                    "circuit_remaining": max(0.0, stats.circuit_open_until - now),
+                }
+                for name, stats in self.stats.items()
+            }
+            decisions = {
+                task: {
+                    "model_name": d.model_name,
+                    "strategy": d.strategy,
+                    "reason": d.reason,
+                    "candidates": dict(d.candidates),
+                    "timestamp": d.timestamp,
+                }
+                for task, d in self.last_decisions.items()
+            }
+        return {"models": models, "decisions": decisions}
+
+
+def _ewma(old: float, new: float) -> float:
+    return old + EWMA_ALPHA * (new - old)
+
+
+model_router = ModelRouter()
@@ -1,13 +1,20 @@
+import asyncio
+import atexit
 import base64
 import io
+import threading
 
 from PIL import Image
+from collections import deque
 from datetime import datetime
+from typing import Any, Deque, Dict, Literal
 
 from src.common.logger import get_logger
 from src.common.database.database import db  # 确保 db 被导入用于 create_tables
 from src.common.database.database_model import LLMUsage
 from src.config.api_ada_configs import ModelInfo
+from src.config.config import model_config
+from src.manager.async_task_manager import AsyncTask
 from .payload_content.message import Message, MessageBuilder
 from .model_client.base_client import UsageRecord
 
@@ -141,18 +148,47 @@ def compress_messages(messages: list[Message], img_target_size: int = 1 * 1024 *
     return compressed_messages
 
 
+# 使用记录先写入内存缓冲区，由后台任务定期批量落库
+USAGE_FLUSH_INTERVAL = 5  # 后台批量写入的间隔（秒）
+USAGE_INSERT_BATCH_SIZE = 50  # 单条 INSERT 语句写入的记录数（受 SQLite 变量数上限约束）
+
+
 class LLMUsageRecorder:
     """
     LLM使用情况记录器
+
+    记录先进入内存缓冲区，由 LLMUsageFlushTask 定期在后台线程中以一个事务批量写入数据库，
+    避免每次请求都单独写库；关闭时（及进程退出时）会写入剩余记录。
+    缓冲区满时按 overflow_policy 丢弃最旧的记录，或在记录时同步写库（阻塞）。
+    同时在内存中维护按模型汇总的实时计数（含尚未落库的记录），供统计模块直接读取。
     """
 
-    def __init__(self):
+    def __init__(self, max_buffer_size: int, overflow_policy: Literal["drop_oldest", "block"] = "drop_oldest"):
+        """
+        Args:
+            max_buffer_size: 缓冲区最多保留的记录数
+            overflow_policy: 缓冲区满时的处理方式，"drop_oldest"为丢弃最旧的记录，"block"为在当前调用中同步写库
+        """
+        self.max_buffer_size = max(1, max_buffer_size)
+        self.overflow_policy = overflow_policy
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        # 嵌入流水线等可能在其它线程的事件循环中记录，写库也在后台线程中进行，缓冲区与计数需要加锁
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dropped_count = 0
+        """因缓冲区溢出被丢弃的记录数"""
+        self.start_time = datetime.now()
+        """实时计数的起始时间"""
+        self.model_stats: Dict[str, Dict[str, float]] = {}
+        """模型名称 -> 自启动以来的实时计数 {requests, prompt_tokens, completion_tokens, total_tokens, cost, time_cost}"""
         try:
             # 使用 Peewee 创建表，safe=True 表示如果表已存在则不会抛出错误
             db.create_tables([LLMUsage], safe=True)
             # logger.debug("LLMUsage 表已初始化/确保存在。")
         except Exception as e:
             logger.error(f"创建 LLMUsage 表失败: {str(e)}")
+        # 脚本等未启动后台写入任务的场景，在进程退出时写入剩余记录
+        atexit.register(self.flush)
 
     def record_usage_to_database(
         self, model_info: ModelInfo, model_usage: UsageRecord, user_id: str, request_type: str, endpoint: str, time_cost: float = 0.0
@@ -160,30 +196,105 @@ class LLMUsageRecorder:
         input_cost = (model_usage.prompt_tokens / 1000000) * model_info.price_in
         output_cost = (model_usage.completion_tokens / 1000000) * model_info.price_out
         total_cost = round(input_cost + output_cost, 6)
-        try:
-            # 使用 Peewee 模型创建记录
-            LLMUsage.create(
-                model_name=model_info.model_identifier,
-                model_assign_name=model_info.name,
-                model_api_provider=model_info.api_provider,
-                user_id=user_id,
-                request_type=request_type,
-                endpoint=endpoint,
-                prompt_tokens=model_usage.prompt_tokens or 0,
-                completion_tokens=model_usage.completion_tokens or 0,
-                total_tokens=model_usage.total_tokens or 0,
-                cost=total_cost or 0.0,
-                time_cost = round(time_cost or 0.0, 3),
-                status="success",
-                timestamp=datetime.now(),  # Peewee 会处理 DateTimeField
-            )
-            logger.debug(
-                f"Token使用情况 - 模型: {model_usage.model_name}, "
-                f"用户: {user_id}, 类型: {request_type}, "
-                f"提示词: {model_usage.prompt_tokens}, 完成: {model_usage.completion_tokens}, "
-                f"总计: {model_usage.total_tokens}"
-            )
-        except Exception as e:
-            logger.error(f"记录token使用情况失败: {str(e)}")
+        record = {
+            "model_name": model_info.model_identifier,
+            "model_assign_name": model_info.name,
+            "model_api_provider": model_info.api_provider,
+            "user_id": user_id,
+            "request_type": request_type,
+            "endpoint": endpoint,
+            "prompt_tokens": model_usage.prompt_tokens or 0,
+            "completion_tokens": model_usage.completion_tokens or 0,
+            "total_tokens": model_usage.total_tokens or 0,
+            "cost": total_cost or 0.0,
+            "time_cost": round(time_cost or 0.0, 3),
+            "status": "success",
+            "timestamp": datetime.now(),  # Peewee 会处理 DateTimeField
+        }
+        need_flush = False
+        with self._lock:
+            self._update_model_stats(record)
+            if len(self._buffer) >= self.max_buffer_size:
+                if self.overflow_policy == "block":
+                    need_flush = True
+                else:
+                    self._buffer.popleft()
+                    self.dropped_count += 1
+                    if self.dropped_count % 100 == 1:
+                        logger.warning(f"LLM使用记录缓冲区已满，已累计丢弃 {self.dropped_count} 条记录")
+            self._buffer.append(record)
+        if need_flush:
+            self.flush()
+        logger.debug(
+            f"Token使用情况 - 模型: {model_usage.model_name}, "
+            f"用户: {user_id}, 类型: {request_type}, "
+            f"提示词: {model_usage.prompt_tokens}, 完成: {model_usage.completion_tokens}, "
+            f"总计: {model_usage.total_tokens}"
+        )
+
+    def _update_model_stats(self, record: Dict[str, Any]):
+        stats = self.model_stats.setdefault(
+            record["model_name"],
+            {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost": 0.0, "time_cost": 0.0},
+        )
+        stats["requests"] += 1
+        stats["prompt_tokens"] += record["prompt_tokens"]
+        stats["completion_tokens"] += record["completion_tokens"]
+        stats["total_tokens"] += record["total_tokens"]
+        stats["cost"] += record["cost"]
+        stats["time_cost"] += record["time_cost"]
+
+    def get_model_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取按模型汇总的实时计数（自启动以来，含尚未落库的记录）"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.model_stats.items()}
+
+    @property
+    def pending_count(self) -> int:
+        """尚未写入数据库的记录数"""
+        return len(self._buffer)
+
+    def flush(self) -> int:
+        """
+        将缓冲区中的记录在一个事务内批量写入数据库
+        Returns:
+            int: 写入的记录数
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                records = list(self._buffer)
+                self._buffer.clear()
+            try:
+                with db.atomic():
+                    for i in range(0, len(records), USAGE_INSERT_BATCH_SIZE):
+                        LLMUsage.insert_many(records[i : i + USAGE_INSERT_BATCH_SIZE]).execute()
+            except Exception as e:
+                logger.error(f"批量写入 {len(records)} 条token使用情况失败: {str(e)}")
+                # 放回缓冲区等待下次写入，超出容量的最旧记录被丢弃
+                with self._lock:
+                    self._buffer.extendleft(reversed(records))
+                    while len(self._buffer) > self.max_buffer_size:
+                        self._buffer.popleft()
+                        self.dropped_count += 1
+                return 0
+            logger.debug(f"已批量写入 {len(records)} 条token使用情况")
+            return len(records)
+
+
+class LLMUsageFlushTask(AsyncTask):
+    """LLM使用记录定期落库任务"""
+
+    def __init__(self):
+        super().__init__(task_name="LLM Usage Flush Task", run_interval=USAGE_FLUSH_INTERVAL)
+
+    async def run(self):
+        # 写库在线程中进行，不阻塞事件循环
+        await asyncio.to_thread(llm_usage_recorder.flush)
+
 
-llm_usage_recorder = LLMUsageRecorder()
\ No newline at end of file
+llm_usage_recorder = LLMUsageRecorder(
+    max_buffer_size=model_config.usage_record.max_buffer_size,
+    overflow_policy=model_config.usage_record.overflow_policy,
+)
@@ -4,7 +4,7 @@ import time
 
 from enum import Enum
 from rich.traceback import install
-from typing import Tuple, List, Dict, Optional, Callable, Any
+from typing import Tuple, List, Dict, Optional, Callable, Any, Set
 
 from src.common.logger import get_logger
 from src.config.config import model_config
@@ -14,6 +14,7 @@ from .payload_content.resp_format import RespFormat
 from .payload_content.tool_option import ToolOption, ToolCall, ToolOptionBuilder, ToolParamType
 from .model_client.base_client import BaseClient, APIResponse, client_registry
 from .utils import compress_messages, llm_usage_recorder
+from .model_router import model_router
 from .exceptions import NetworkConnectionError, ReqAbortException, RespNotOkException, RespParseException
 
 install(extra_lines=3)
@@ -48,10 +49,6 @@ class LLMRequest:
         self.task_name = request_type
         self.model_for_task = model_set
         self.request_type = request_type
-        self.model_usage: Dict[str, Tuple[int, int, int]] = {
-            model: (0, 0, 0) for model in self.model_for_task.model_list
-        }
-        """模型使用量记录，用于进行负载均衡，对应为(total_tokens, penalty, usage_penalty)，惩罚值是为了能在某个模型请求不给力或正在被使用的时候进行调整"""
 
     async def generate_response_for_image(
         self,
@@ -157,17 +154,9 @@ class LLMRequest:
         
         tool_built = self._build_tool_options(tools)
         
-        # 模型选择
-        model_info, api_provider, client = self._select_model()
-        
-        # 请求并处理返回值
-        logger.debug(f"LLM选择耗时: {model_info.name} {time.time() - start_time}")
-        
-        response = await self._execute_request(
-            api_provider=api_provider,
-            client=client,
+        # 模型选择与请求，超过对冲等待时间仍未返回时会向另一个模型发出相同请求
+        model_info, response = await self._execute_hedged_request(
             request_type=RequestType.RESPONSE,
-            model_info=model_info,
             message_list=messages,
             temperature=temperature,
             max_tokens=max_tokens,
@@ -238,26 +227,107 @@ class LLMRequest:
 
         return embedding, model_info.name
 
-    def _select_model(self) -> Tuple[ModelInfo, APIProvider, BaseClient]:
+    async def get_embeddings(self, embedding_inputs: List[str]) -> Tuple[List[List[float]], str]:
+        """批量获取嵌入向量，一次请求发送整个列表
+        Args:
+            embedding_inputs (List[str]): 获取嵌入的目标列表
+        Returns:
+            (Tuple[List[List[float]], str]): (与输入顺序一致的嵌入向量列表，使用的模型名称)
         """
-        根据总tokens和惩罚值选择的模型
+        start_time = time.time()
+        model_info, api_provider, client = self._select_model()
+
+        response = await self._execute_request(
+            api_provider=api_provider,
+            client=client,
+            request_type=RequestType.EMBEDDING,
+            model_info=model_info,
+            embedding_inputs=embedding_inputs,
+        )
+
+        embeddings = response.embeddings
+
+        if usage := response.usage:
+            llm_usage_recorder.record_usage_to_database(
+                model_info=model_info,
+                model_usage=usage,
+                user_id="system",
+                request_type=self.request_type,
+                endpoint="/embeddings",
+                time_cost=time.time() - start_time,
+            )
+
+        if not embeddings or len(embeddings) != len(embedding_inputs):
+            raise RuntimeError("批量获取embedding失败")
+
+        return embeddings, model_info.name
+
+    def _select_model(self, exclude: Optional[Set[str]] = None) -> Tuple[ModelInfo, APIProvider, BaseClient]:
         """
-        least_used_model_name = min(
-            self.model_usage,
-            key=lambda k: self.model_usage[k][0] + self.model_usage[k][1] * 300 + self.model_usage[k][2] * 1000,
+        根据各模型的实时耗时、失败率与正在进行的请求数选择模型（见 ModelRouter）
+        Args:
+            exclude: 不参与选择的模型名称
+        """
+        model_name = model_router.select(
+            self.task_name,
+            self.model_for_task.model_list,
+            strategy=self.model_for_task.selection_strategy,
+            exclude=exclude,
         )
-        model_info = model_config.get_model_info(least_used_model_name)
+        model_info = model_config.get_model_info(model_name)
         api_provider = model_config.get_provider(model_info.api_provider)
-        
-        # 对于嵌入任务，强制创建新的客户端实例以避免事件循环问题
-        force_new_client = (self.request_type == "embedding")
-        client = client_registry.get_client_class_instance(api_provider, force_new=force_new_client)
-        
-        logger.debug(f"选择请求模型: {model_info.name}")
-        total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
-        self.model_usage[model_info.name] = (total_tokens, penalty, usage_penalty + 1)  # 增加使用惩罚值防止连续使用
+        # 客户端按事件循环缓存，同一事件循环内的请求复用同一个连接池
+        client = client_registry.get_client_class_instance(api_provider)
         return model_info, api_provider, client
 
+    async def _execute_hedged_request(self, **request_kwargs) -> Tuple[ModelInfo, APIResponse]:
+        """
+        选择模型并执行请求；配置了对冲等待时间且有多个模型时，超时未返回则向另一个模型发出相同请求，
+        采用先成功返回的结果并取消其余请求
+        Returns:
+            (Tuple[ModelInfo, APIResponse]): (实际返回结果的模型信息, 响应)
+        """
+        model_info, api_provider, client = self._select_model()
+        hedge_delay = self.model_for_task.hedge_delay
+        if hedge_delay <= 0 or len(self.model_for_task.model_list) < 2:
+            response = await self._execute_request(
+                api_provider=api_provider, client=client, model_info=model_info, **request_kwargs
+            )
+            return model_info, response
+
+        pending: Dict[asyncio.Task, ModelInfo] = {
+            asyncio.create_task(
+                self._execute_request(api_provider=api_provider, client=client, model_info=model_info, **request_kwargs)
+            ): model_info
+        }
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                hedge_info, hedge_provider, hedge_client = self._select_model(exclude={model_info.name})
+                logger.info(
+                    f"任务-'{self.task_name}' 模型-'{model_info.name}' {hedge_delay}秒内未返回，向模型-'{hedge_info.name}'发出对冲请求"
+                )
+                hedge_task = asyncio.create_task(
+                    self._execute_request(
+                        api_provider=hedge_provider, client=hedge_client, model_info=hedge_info, **request_kwargs
+                    )
+                )
+                pending[hedge_task] = hedge_info
+            last_exception: BaseException | None = None
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finished_info = pending.pop(task)
+                    if task.exception() is None:
+                        return finished_info, task.result()
+                    last_exception = task.exception()
+            assert last_exception is not None
+            raise last_exception
+        finally:
+            # 取消尚未完成的请求（包括外层被取消的情况）
+            for task in pending:
+                task.cancel()
+
     async def _execute_request(
         self,
         api_provider: APIProvider,
@@ -272,6 +342,7 @@ class LLMRequest:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         embedding_input: str = "",
+        embedding_inputs: Optional[List[str]] = None,
         audio_base64: str = "",
     ) -> APIResponse:
         """
@@ -279,64 +350,81 @@ class LLMRequest:
 
         包含了重试和异常处理逻辑
         """
-        retry_remain = api_provider.max_retry
-        compressed_messages: Optional[List[Message]] = None
-        while retry_remain > 0:
-            try:
-                if request_type == RequestType.RESPONSE:
-                    assert message_list is not None, "message_list cannot be None for response requests"
-                    return await client.get_response(
-                        model_info=model_info,
-                        message_list=(compressed_messages or message_list),
-                        tool_options=tool_options,
-                        max_tokens=self.model_for_task.max_tokens if max_tokens is None else max_tokens,
-                        temperature=self.model_for_task.temperature if temperature is None else temperature,
-                        response_format=response_format,
-                        stream_response_handler=stream_response_handler,
-                        async_response_parser=async_response_parser,
-                        extra_params=model_info.extra_params,
-                    )
-                elif request_type == RequestType.EMBEDDING:
-                    assert embedding_input, "embedding_input cannot be empty for embedding requests"
-                    return await client.get_embedding(
-                        model_info=model_info,
-                        embedding_input=embedding_input,
-                        extra_params=model_info.extra_params,
-                    )
-                elif request_type == RequestType.AUDIO:
-                    assert audio_base64 is not None, "audio_base64 cannot be None for audio requests"
-                    return await client.get_audio_transcriptions(
-                        model_info=model_info,
-                        audio_base64=audio_base64,
-                        extra_params=model_info.extra_params,
+        model_router.on_request_start(model_info.name)
+        try:
+            retry_remain = api_provider.max_retry
+            compressed_messages: Optional[List[Message]] = None
+            while retry_remain > 0:
+                try:
+                    # 占用API提供商的并发名额，重试等待期间不占用
+                    async with client.request_slot():
+                        # 排队等待名额的时间不计入模型耗时
+                        attempt_start = time.perf_counter()
+                        if request_type == RequestType.RESPONSE:
+                            assert message_list is not None, "message_list cannot be None for response requests"
+                            response = await client.get_response(
+                                model_info=model_info,
+                                message_list=(compressed_messages or message_list),
+                                tool_options=tool_options,
+                                max_tokens=self.model_for_task.max_tokens if max_tokens is None else max_tokens,
+                                temperature=self.model_for_task.temperature if temperature is None else temperature,
+                                response_format=response_format,
+                                stream_response_handler=stream_response_handler,
+                                async_response_parser=async_response_parser,
+                                extra_params=model_info.extra_params,
+                            )
+                        elif request_type == RequestType.EMBEDDING and embedding_inputs is not None:
+                            assert embedding_inputs, "embedding_inputs cannot be empty for batch embedding requests"
+                            response = await client.get_embeddings(
+                                model_info=model_info,
+                                embedding_inputs=embedding_inputs,
+                                extra_params=model_info.extra_params,
+                            )
+                        elif request_type == RequestType.EMBEDDING:
+                            assert embedding_input, "embedding_input cannot be empty for embedding requests"
+                            response = await client.get_embedding(
+                                model_info=model_info,
+                                embedding_input=embedding_input,
+                                extra_params=model_info.extra_params,
+                            )
+                        elif request_type == RequestType.AUDIO:
+                            assert audio_base64 is not None, "audio_base64 cannot be None for audio requests"
+                            response = await client.get_audio_transcriptions(
+                                model_info=model_info,
+                                audio_base64=audio_base64,
+                                extra_params=model_info.extra_params,
+                            )
+                        else:
+                            raise ValueError(f"不支持的请求类型: {request_type}")
+                        model_router.record_success(model_info.name, time.perf_counter() - attempt_start, response.usage)
+                        return response
+                except Exception as e:
+                    logger.debug(f"请求失败: {str(e)}")
+                    # 处理异常，请求被主动中断不计为模型失败
+                    if not isinstance(e, ReqAbortException):
+                        model_router.record_failure(model_info.name)
+
+                    wait_interval, compressed_messages = self._default_exception_handler(
+                        e,
+                        self.task_name,
+                        model_name=model_info.name,
+                        remain_try=retry_remain,
+                        retry_interval=api_provider.retry_interval,
+                        messages=(message_list, compressed_messages is not None) if message_list else None,
                     )
-            except Exception as e:
-                logger.debug(f"请求失败: {str(e)}")
-                # 处理异常
-                total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
-                self.model_usage[model_info.name] = (total_tokens, penalty + 1, usage_penalty)
-
-                wait_interval, compressed_messages = self._default_exception_handler(
-                    e,
-                    self.task_name,
-                    model_name=model_info.name,
-                    remain_try=retry_remain,
-                    retry_interval=api_provider.retry_interval,
-                    messages=(message_list, compressed_messages is not None) if message_list else None,
-                )
 
-                if wait_interval == -1:
-                    retry_remain = 0  # 不再重试
-                elif wait_interval > 0:
-                    logger.info(f"等待 {wait_interval} 秒后重试...")
-                    await asyncio.sleep(wait_interval)
-            finally:
-                # 放在finally防止死循环
-                retry_remain -= 1
-        total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
-        self.model_usage[model_info.name] = (total_tokens, penalty, usage_penalty - 1)  # 使用结束，减少使用惩罚值
-        logger.error(f"模型 '{model_info.name}' 请求失败，达到最大重试次数 {api_provider.max_retry} 次")
-        raise RuntimeError("请求失败，已达到最大重试次数")
+                    if wait_interval == -1:
+                        retry_remain = 0  # 不再重试
+                    elif wait_interval > 0:
+                        logger.info(f"等待 {wait_interval} 秒后重试...")
+                        await asyncio.sleep(wait_interval)
+                finally:
+                    # 放在finally防止死循环
+                    retry_remain -= 1
+            logger.error(f"模型 '{model_info.name}' 请求失败，达到最大重试次数 {api_provider.max_retry} 次")
+            raise RuntimeError("请求失败，已达到最大重试次数")
+        finally:
+            model_router.on_request_end(model_info.name)
 
     def _default_exception_handler(
         self,
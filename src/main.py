@@ -5,6 +5,7 @@ from maim_message import MessageServer
 from src.common.remote import TelemetryHeartBeatTask
 from src.manager.async_task_manager import async_task_manager
 from src.chat.utils.statistic import OnlineTimeRecordTask, StatisticOutputTask
+from src.llm_models.utils import LLMUsageFlushTask
 from src.chat.emoji_system.emoji_manager import get_emoji_manager
 from src.chat.message_receive.chat_stream import get_chat_manager
 from src.config.config import global_config
@@ -72,6 +73,9 @@ class MainSystem:
         # 添加在线时间统计任务
         await async_task_manager.add_task(OnlineTimeRecordTask())
 
+        # 添加LLM使用记录批量落库任务
+        await async_task_manager.add_task(LLMUsageFlushTask())
+
         # 添加统计信息输出任务
         await async_task_manager.add_task(StatisticOutputTask())
 
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.common.logger import get_logger
+from src.common.database.database_model import PersonInfo
+
+logger = get_logger("person_info")
+
+PERSON_CACHE_SIZE = 2048  # 缓存的用户数
+PERSON_CACHE_TTL = 300.0  # 缓存条目的存活时间（秒），过期后重新读取数据库，以免遗漏绕过 Person 直接修改数据库的情况
+
+_CACHED_FIELDS = (
+    "person_id",
+    "is_known",
+    "platform",
+    "user_id",
+    "nickname",
+    "person_name",
+    "name_reason",
+    "know_times",
+    "know_since",
+    "last_know",
+    "memory_points",
+    "attitude_to_me",
+    "attitude_to_me_confidence",
+)
+
+
+def _parse_memory_points(person_id: str, memory_points: Optional[str]) -> list:
+    """解析JSON格式的记忆点列表，过滤掉None值"""
+    if not memory_points:
+        return []
+    try:
+        loaded_points = json.loads(memory_points)
+    except (json.JSONDecodeError, TypeError):
+        logger.warning(f"解析用户 {person_id} 的points字段失败，使用默认值")
+        return []
+    return [point for point in loaded_points if point is not None] if isinstance(loaded_points, list) else []
+
+
+class PersonCache:
+    """
+    进程内的用户信息缓存
+
+    - person_id -> 用户记录（与从数据库读出的值一致，memory_points 已解析为列表），LRU + TTL 淘汰；
+      数据库中不存在的用户也会缓存，未认识的用户不会每条消息都查询数据库
+    - person_name -> person_id 索引
+    - Person.sync_to_database 写入数据库后同步写入缓存（write-through）
+
+    (platform, user_id) 经 get_person_id 计算即得到 person_id，无需单独的键。
+    构建提示词时每条上下文消息、每个@/回复都会创建 Person，缓存使这些读取不再访问数据库。
+    """
+
+    def __init__(self, max_size: int = PERSON_CACHE_SIZE, ttl: float = PERSON_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._records: OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]] = OrderedDict()
+        """person_id -> (写入时间, 用户记录)，记录为None表示数据库中不存在"""
+        self._name_index: Dict[str, str] = {}
+        """person_name -> person_id"""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _to_record(data: Dict[str, Any]) -> Dict[str, Any]:
+        """把字段值转换为从数据库读出时的值（如 TextField 字段读出为字符串），并解析记忆点"""
+        record = {}
+        for name in _CACHED_FIELDS:
+            field = PersonInfo._meta.fields[name]  # type: ignore
+            value = data.get(name)
+            record[name] = None if value is None else field.python_value(field.db_value(value))
+        record["memory_points"] = _parse_memory_points(record["person_id"], record["memory_points"])
+        return record
+
+    def _store(self, person_id: str, record: Optional[Dict[str, Any]]) -> None:
+        """写入缓存并维护名称索引（调用方持有锁）"""
+        if person_id in self._records:
+            self._unindex(person_id)
+        self._records[person_id] = (time.time(), record)
+        self._records.move_to_end(person_id)
+        if record and record["person_name"]:
+            self._name_index[record["person_name"]] = person_id
+        while len(self._records) > self.max_size:
+            self._unindex(next(iter(self._records)))
+            self._records.popitem(last=False)
+
+    def _unindex(self, person_id: str) -> None:
+        _, record = self._records[person_id]
+        if record and self._name_index.get(record["person_name"]) == person_id:
+            del self._name_index[record["person_name"]]
+
+    def get(self, person_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取用户记录，未缓存或已过期时读取数据库
+        Returns:
+            Optional[dict]: 用户记录（调用方不应修改），数据库中不存在时返回None
+        """
+        with self._lock:
+            if (entry := self._records.get(person_id)) is not None and time.time() - entry[0] < self.ttl:
+                self._records.move_to_end(person_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        db_record = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
+        record = self._to_record(db_record.__data__) if db_record else None
+        with self._lock:
+            self._store(person_id, record)
+        return record
+
+    def get_person_id_by_name(self, person_name: str) -> str:
+        """根据用户名获取person_id，不存在时返回空字符串"""
+        with self._lock:
+            if (person_id := self._name_index.get(person_name)) is not None:
+                entry = self._records[person_id]
+                if time.time() - entry[0] < self.ttl:
+                    self.hits += 1
+                    return person_id
+            self.misses += 1
+        db_record = PersonInfo.get_or_none(PersonInfo.person_name == person_name)
+        if not db_record:
+            return ""
+        with self._lock:
+            self._store(db_record.person_id, self._to_record(db_record.__data__))
+        return db_record.person_id
+
+    def put(self, data: Dict[str, Any]) -> None:
+        """数据库写入成功后同步写入缓存"""
+        record = self._to_record(data)
+        with self._lock:
+            self._store(record["person_id"], record)
+
+    def invalidate(self, person_id: Optional[str] = None) -> None:
+        """丢弃指定用户的缓存，不指定时清空缓存"""
+        with self._lock:
+            if person_id is None:
+                self._records.clear()
+                self._name_index.clear()
+            elif person_id in self._records:
+                self._unindex(person_id)
+                del self._records[person_id]
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._records),
+            }
+
+
+person_cache = PersonCache()
@@ -11,6 +11,7 @@ from typing import Union, Optional
 from src.common.logger import get_logger
 from src.common.database.database import db
 from src.common.database.database_model import PersonInfo
+from src.person_info.person_cache import person_cache
 from src.llm_models.utils_model import LLMRequest
 from src.config.config import global_config, model_config
 
@@ -30,27 +31,21 @@ def get_person_id(platform: str, user_id: Union[int, str]) -> str:
 def get_person_id_by_person_name(person_name: str) -> str:
     """根据用户名获取用户ID"""
     try:
-        record = PersonInfo.get_or_none(PersonInfo.person_name == person_name)
-        return record.person_id if record else ""
+        return person_cache.get_person_id_by_name(person_name)
     except Exception as e:
         logger.error(f"根据用户名 {person_name} 获取用户ID时出错 (Peewee): {e}")
         return ""
 
 
 def is_person_known(person_id: str = None, user_id: str = None, platform: str = None, person_name: str = None) -> bool:  # type: ignore
-    if person_id:
-        person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
-        return person.is_known if person else False
-    elif user_id and platform:
+    if not person_id and user_id and platform:
         person_id = get_person_id(platform, user_id)
-        person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
-        return person.is_known if person else False
-    elif person_name:
+    if not person_id and person_name:
         person_id = get_person_id_by_person_name(person_name)
-        person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
-        return person.is_known if person else False
-    else:
+    if not person_id:
         return False
+    person = person_cache.get(person_id)
+    return person["is_known"] if person else False
 
 
 def get_category_from_memory(memory_point: str) -> Optional[str]:
@@ -337,39 +332,25 @@ class Person:
     def load_from_database(self):
         """从数据库加载个人信息数据"""
         try:
-            # 查询数据库中的记录
-            record = PersonInfo.get_or_none(PersonInfo.person_id == self.person_id)
+            # 查询用户记录（优先从缓存读取，memory_points 已解析为列表）
+            record = person_cache.get(self.person_id)
 
             if record:
-                self.user_id = record.user_id or ""
-                self.platform = record.platform or ""
-                self.is_known = record.is_known or False
-                self.nickname = record.nickname or ""
-                self.person_name = record.person_name or self.nickname
-                self.name_reason = record.name_reason or None
-                self.know_times = record.know_times or 0
-
-                # 处理points字段（JSON格式的列表）
-                if record.memory_points:
-                    try:
-                        loaded_points = json.loads(record.memory_points)
-                        # 过滤掉None值，确保数据质量
-                        if isinstance(loaded_points, list):
-                            self.memory_points = [point for point in loaded_points if point is not None]
-                        else:
-                            self.memory_points = []
-                    except (json.JSONDecodeError, TypeError):
-                        logger.warning(f"解析用户 {self.person_id} 的points字段失败，使用默认值")
-                        self.memory_points = []
-                else:
-                    self.memory_points = []
+                self.user_id = record["user_id"] or ""
+                self.platform = record["platform"] or ""
+                self.is_known = record["is_known"] or False
+                self.nickname = record["nickname"] or ""
+                self.person_name = record["person_name"] or self.nickname
+                self.name_reason = record["name_reason"] or None
+                self.know_times = record["know_times"] or 0
+                self.memory_points = list(record["memory_points"])
 
                 # 加载性格特征相关字段
-                if record.attitude_to_me and not isinstance(record.attitude_to_me, str):
-                    self.attitude_to_me = record.attitude_to_me
+                if record["attitude_to_me"] and not isinstance(record["attitude_to_me"], str):
+                    self.attitude_to_me = record["attitude_to_me"]
 
-                if record.attitude_to_me_confidence is not None:
-                    self.attitude_to_me_confidence = float(record.attitude_to_me_confidence)
+                if record["attitude_to_me_confidence"] is not None:
+                    self.attitude_to_me_confidence = float(record["attitude_to_me_confidence"])
 
                 logger.debug(f"已从数据库加载用户 {self.person_id} 的信息")
             else:
@@ -421,6 +402,9 @@ class Person:
                 PersonInfo.create(**data)
                 logger.debug(f"已创建用户 {self.person_id} 的信息到数据库")
 
+            # 写入成功后同步更新缓存
+            person_cache.put(data)
+
         except Exception as e:
             logger.error(f"同步用户 {self.person_id} 信息到数据库时出错: {e}")
 
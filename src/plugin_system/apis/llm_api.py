@@ -11,6 +11,8 @@ from typing import Tuple, Dict, List, Any, Optional
 from src.common.logger import get_logger
 from src.llm_models.payload_content.tool_option import ToolCall
 from src.llm_models.utils_model import LLMRequest
+from src.llm_models.model_router import model_router
+from src.llm_models.model_client.base_client import client_registry
 from src.config.config import model_config
 from src.config.api_ada_configs import TaskConfig
 
@@ -48,6 +50,26 @@ def get_available_models() -> Dict[str, TaskConfig]:
         return {}
 
 
+def get_model_router_state() -> Dict[str, Any]:
+    """获取模型路由器的实时状态
+
+    Returns:
+        Dict[str, Any]: {"models": 模型名称 -> 平均耗时/失败率/输出速度/正在进行的请求数/熔断状态,
+            "decisions": 请求类型 -> 最近一次选择的模型及原因}
+    """
+    return model_router.get_state()
+
+
+def get_provider_metrics() -> Dict[str, Dict[str, float]]:
+    """获取各API提供商的并发与排队指标
+
+    Returns:
+        Dict[str, Dict[str, float]]: API提供商名称 -> {max_concurrency: 最大并发数（0为不限制）, in_flight: 正在进行的请求数,
+            queued: 等待并发名额的请求数, total_requests: 累计请求数, avg_wait_time: 平均排队时间（秒）}
+    """
+    return client_registry.get_metrics()
+
+
 async def generate_with_model(
     prompt: str,
     model_config: TaskConfig,
@@ -0,0 +1,143 @@
+import re
+
+from typing import Dict, List, Optional, Pattern, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # Python 3.10
+    import sre_parse  # type: ignore
+
+# 在 IGNORECASE 下与ASCII字母等价的非ASCII字符（İ ı ſ K），出现在前缀位置时无法按字符折叠比较
+_ASCII_CASE_VARIANTS = frozenset("İıſK")
+_SCOPED_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.VERBOSE: "x"}
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>")
+_NAMED_BACKREFERENCE = re.compile(r"\(\?P=(\w+)\)")
+_NUMBERED_BACKREFERENCE = re.compile(r"\\[1-9]")
+
+
+def _fold(char: str) -> str:
+    return char.lower() if char.isascii() else char
+
+
+def _literal_prefix(pattern: Pattern) -> str:
+    """
+    提取正则开头的固定前缀（如 r"^/help\\s+(?P<arg>.+)" -> "/help"），按 _fold 折叠大小写
+
+    只收集开头连续的单个字符（包括开头分组中的），遇到任何其他结构即停止；
+    非ASCII的有大小写字符会在 IGNORECASE 下匹配其他字符，也在此停止，保证前缀匹配是正则匹配的必要条件
+    """
+    prefix: List[str] = []
+
+    def collect(items) -> bool:
+        """返回items是否全部为字面字符（是则可以继续向后收集）"""
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                char = chr(av)
+                if not char.isascii() and (char.lower() != char or char.upper() != char):
+                    return False
+                prefix.append(_fold(char))
+            elif op is sre_parse.AT and av in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING):
+                continue
+            elif op is sre_parse.SUBPATTERN:
+                if not collect(av[-1]):
+                    return False
+            else:
+                return False
+        return True
+
+    try:
+        collect(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return ""
+    return "".join(prefix)
+
+
+def _combine(patterns: List[Pattern]) -> Optional[Pattern]:
+    """
+    把多个命令正则合并为一个交替表达式 (?flags:p1)|(?flags:p2)|...，用作预筛：合并后不匹配则其中任何一个都不匹配
+
+    各正则的命名组加上序号前缀以免重名；含有编号反向引用、ASCII等无法局部设置的标志、
+    或命名组无法可靠改名（如出现在字符集中）时放弃合并，返回None
+    """
+    alternatives = []
+    for index, pattern in enumerate(patterns):
+        source = pattern.pattern
+        if pattern.flags & (re.ASCII | re.LOCALE) or _NUMBERED_BACKREFERENCE.search(source):
+            return None
+        if len(_NAMED_GROUP.findall(source)) != len(pattern.groupindex):
+            return None
+        prefix = f"_c{index}_"
+        source = _NAMED_GROUP.sub(lambda m, prefix=prefix: f"(?P<{prefix}{m.group(1)}>", source)
+        source = _NAMED_BACKREFERENCE.sub(lambda m, prefix=prefix: f"(?P={prefix}{m.group(1)})", source)
+        enabled = "".join(letter for flag, letter in _SCOPED_FLAGS.items() if pattern.flags & flag)
+        disabled = "".join(letter for flag, letter in _SCOPED_FLAGS.items() if not pattern.flags & flag)
+        # 详细模式下正则可能以 # 注释结尾，换行后再闭合分组
+        alternatives.append(f"(?{enabled}-{disabled}:{source}{chr(10) if 'x' in enabled else ''})")
+    try:
+        return re.compile("|".join(alternatives))
+    except re.error:
+        # 例如正则中含有只能出现在开头的全局标志 (?i)
+        return None
+
+
+class _TrieNode:
+    __slots__ = ("children", "patterns")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.patterns: List[Tuple[int, Pattern]] = []
+        """以该节点为固定前缀的 (注册顺序, 正则)"""
+
+
+class CommandDispatcher:
+    """
+    命令匹配分发器
+
+    按命令正则的固定前缀（如 "/help"）建立前缀树，匹配时沿消息开头的字符走一遍前缀树，
+    只对前缀相符的命令执行正则匹配；没有固定前缀的命令合并为一个交替表达式，先整体预筛一次。
+    普通聊天消息在前缀树的第一层就会被排除，开销只与前缀长度有关，与命令数量无关。
+
+    分发器是注册表的只读快照，命令注册/移除/启用/禁用后由 ComponentRegistry 丢弃重建。
+    """
+
+    def __init__(self, patterns: Dict[Pattern, str]):
+        self.command_names = dict(patterns)
+        self._root = _TrieNode()
+        self._max_depth = 0
+        for order, pattern in enumerate(patterns):
+            prefix = _literal_prefix(pattern)
+            node = self._root
+            for char in prefix:
+                node = node.children.setdefault(char, _TrieNode())
+            node.patterns.append((order, pattern))
+            self._max_depth = max(self._max_depth, len(prefix))
+        fallback = [pattern for _, pattern in self._root.patterns]
+        self._fallback_filter = _combine(fallback) if len(fallback) > 1 else None
+        """没有固定前缀的命令的合并预筛表达式"""
+
+    def match(self, text: str) -> List[Tuple[Pattern, re.Match]]:
+        """
+        返回匹配文本的全部命令正则及其匹配结果，按注册顺序排列
+        """
+        candidates = []
+        if self._root.patterns and (self._fallback_filter is None or self._fallback_filter.match(text)):
+            candidates.extend(self._root.patterns)
+        node = self._root
+        for char in text[: self._max_depth]:
+            if char in _ASCII_CASE_VARIANTS:
+                # 无法按前缀排除，检查全部命令
+                candidates = [(order, pattern) for order, pattern in enumerate(self.command_names)]
+                break
+            node = node.children.get(_fold(char))  # type: ignore
+            if node is None:
+                break
+            candidates.extend(node.patterns)
+        if not candidates:
+            return []
+
+        candidates.sort(key=lambda item: item[0])
+        matches = []
+        for _, pattern in candidates:
+            if (match := pattern.match(text)) is not None:
+                matches.append((pattern, match))
+        return matches
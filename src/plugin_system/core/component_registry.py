@@ -16,6 +16,7 @@ from src.plugin_system.base.base_command import BaseCommand
 from src.plugin_system.base.base_action import BaseAction
 from src.plugin_system.base.base_tool import BaseTool
 from src.plugin_system.base.base_events_handler import BaseEventHandler
+from src.plugin_system.core.command_dispatcher import CommandDispatcher
 
 logger = get_logger("component_registry")
 
@@ -50,6 +51,8 @@ class ComponentRegistry:
         """Command类注册表 command名 -> command类"""
         self._command_patterns: Dict[Pattern, str] = {}
         """编译后的正则 -> command名"""
+        self._command_dispatcher: Optional[CommandDispatcher] = None
+        """按命令前缀索引的匹配分发器，_command_patterns 变化后置为None，查找时重建"""
 
         # 工具特定注册表
         self._tool_registry: Dict[str, Type[BaseTool]] = {}  # 工具名 -> 工具类
@@ -185,6 +188,7 @@ class ComponentRegistry:
             pattern = re.compile(command_info.command_pattern, re.IGNORECASE | re.DOTALL)
             if pattern not in self._command_patterns:
                 self._command_patterns[pattern] = command_name
+                self._command_dispatcher = None
             else:
                 logger.warning(
                     f"'{command_name}' 对应的命令模式与 '{self._command_patterns[pattern]}' 重复，忽略此命令"
@@ -246,6 +250,7 @@ class ComponentRegistry:
                     keys_to_remove = [k for k, v in self._command_patterns.items() if v == component_name]
                     for key in keys_to_remove:
                         self._command_patterns.pop(key)
+                    self._command_dispatcher = None
                 case ComponentType.TOOL:
                     self._tool_registry.pop(component_name)
                     self._llm_available_tools.pop(component_name)
@@ -308,6 +313,7 @@ class ComponentRegistry:
                 assert isinstance(target_component_info, CommandInfo)
                 pattern = target_component_info.command_pattern
                 self._command_patterns[re.compile(pattern)] = component_name
+                self._command_dispatcher = None
             case ComponentType.TOOL:
                 assert isinstance(target_component_info, ToolInfo)
                 assert issubclass(target_component_class, BaseTool)
@@ -345,6 +351,7 @@ class ComponentRegistry:
                     self._default_actions.pop(component_name)
                 case ComponentType.COMMAND:
                     self._command_patterns = {k: v for k, v in self._command_patterns.items() if v != component_name}
+                    self._command_dispatcher = None
                 case ComponentType.TOOL:
                     self._llm_available_tools.pop(component_name)
                 case ComponentType.EVENT_HANDLER:
@@ -503,16 +510,23 @@ class ComponentRegistry:
             Tuple: (命令类, 匹配的命名组, 是否拦截消息, 插件名) 或 None
         """
 
-        candidates = [pattern for pattern in self._command_patterns if pattern.match(text)]
+        if self._command_dispatcher is None:
+            self._command_dispatcher = CommandDispatcher(self._command_patterns)
+        dispatcher = self._command_dispatcher
+
+        candidates = dispatcher.match(text)
         if not candidates:
             return None
         if len(candidates) > 1:
-            logger.warning(f"文本 '{text}' 匹配到多个命令模式: {candidates}，使用第一个匹配")
-        command_name = self._command_patterns[candidates[0]]
+            logger.warning(
+                f"文本 '{text}' 匹配到多个命令模式: {[pattern for pattern, _ in candidates]}，使用第一个匹配"
+            )
+        pattern, match = candidates[0]
+        command_name = dispatcher.command_names[pattern]
         command_info: CommandInfo = self.get_registered_command_info(command_name)  # type: ignore
         return (
             self._command_registry[command_name],
-            candidates[0].match(text).groupdict(),  # type: ignore
+            match.groupdict(),
             command_info,
         )
 